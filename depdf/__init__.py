@@ -7,6 +7,7 @@ into structured markup language [eg. html] from embedding pdf pages.
 You can also use it to convert page/pdf to html.
 """
 
+from depdf.aio import *
 from depdf.api import *
 from depdf.config import Config
 from depdf.pdf import DePDF
@@ -19,6 +20,19 @@ __all__ = [
     'DePage',
     'convert_pdf_to_html',
     'convert_page_to_html',
+    'convert_pdf_to_markdown',
+    'convert_pdf_to_text',
     'extract_page_tables',
     'extract_page_paragraphs',
+    'convert_pages_to_html',
+    'extract_tables',
+    'extract_paragraphs',
+    'convert_pdf_to_jsonl',
+    'convert_pdf_tables_to_csv',
+    'convert_batch',
+    'iter_html_pages_async',
+    'convert_pdf_to_html_async',
+    'convert_page_to_html_async',
+    'extract_page_tables_async',
+    'extract_page_paragraphs_async',
 ]
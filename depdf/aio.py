@@ -0,0 +1,163 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import os
+
+from depdf.api import load_pdf, convert_page_to_html, extract_page_tables, extract_page_paragraphs
+from depdf.config import DEFAULT_CONFIG, DEFAULT_CONFIG_KEYS, check_config_type
+from depdf.log import logger_init
+from depdf.pdf import DePDF
+from depdf.pdf_tools import wrap_html_pages
+
+log = logger_init(__name__)
+_async_executors = {}
+# a forked child must not reuse the thread pools of its parent
+os.register_at_fork(after_in_child=_async_executors.clear)
+_pages_end = object()
+
+
+def get_async_executor(max_calls):
+    """
+    :param max_calls: maximum number of blocking calls running at the same time
+    :return: thread pool shared by all async conversions of the process with the same size
+    """
+    if max_calls not in _async_executors:
+        _async_executors[max_calls] = ThreadPoolExecutor(max_workers=max_calls, thread_name_prefix='depdf-async')
+    return _async_executors[max_calls]
+
+
+def resolve_config(pdf_file_path, config=None, **kwargs):
+    """
+    :return: config which the pdf is converted with
+    """
+    if isinstance(pdf_file_path, DePDF):
+        return pdf_file_path.config
+    if config is None:
+        config = DEFAULT_CONFIG
+    check_config_type(config)
+    return config.copy(**{k: v for k, v in kwargs.items() if k in DEFAULT_CONFIG_KEYS})
+
+
+def async_executor_for(config):
+    return get_async_executor(max(int(getattr(config, 'async_max_concurrency')), 1))
+
+
+async def wait_executor_future(future, deadline, loop):
+    """
+    :param future: concurrent.futures.Future of the async executor, cancelled on timeout if not started yet
+    :param deadline: loop time of the timeout or None
+    :param loop: running event loop
+    :return: future result
+    """
+    timeout = None if deadline is None else max(deadline - loop.time(), 0)
+    return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+
+
+def close_page_iterator(html_pages, pdf):
+    if html_pages is not None:
+        html_pages.close()
+    pdf.close()
+
+
+def close_loaded_pdf(future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+async def iter_html_pages_async(pdf_file_path, timeout=None, config=None, **kwargs):
+    """
+    Convert pages one by one in the async executor, every page html is yielded as soon as it is converted.
+    Cancellation and timeout stop the conversion between pages, the page being converted is finished
+    in the background and the pdf is closed afterwards.
+    :param pdf_file_path: pdf file path, pdfplumber.pdf.PDF or depdf.pdf.DePDF class
+    :param timeout: seconds for the whole conversion, asyncio.TimeoutError is raised once exceeded
+    :param config: depdf config class
+    :param kwargs: config keyword arguments, eg. workers=4 to convert pages in worker processes
+    :return: async generator of page html strings in page order
+    """
+    executor = async_executor_for(resolve_config(pdf_file_path, config=config, **kwargs))
+    loop = asyncio.get_running_loop()
+    deadline = None if timeout is None else loop.time() + timeout
+    pdf = html_pages = None
+    closed = False
+    future = executor.submit(load_pdf, pdf_file_path, config=config, **kwargs)
+    try:
+        pdf = await wait_executor_future(future, deadline, loop)
+        html_pages = pdf.iter_html_pages()
+        while True:
+            future = executor.submit(next, html_pages, _pages_end)
+            html_page = await wait_executor_future(future, deadline, loop)
+            if html_page is _pages_end:
+                break
+            yield html_page
+        closed = True
+        await loop.run_in_executor(executor, close_page_iterator, html_pages, pdf)
+    finally:
+        if not closed and pdf is None:
+            future.add_done_callback(close_loaded_pdf)
+        elif not closed:
+            future.add_done_callback(lambda _: executor.submit(close_page_iterator, html_pages, pdf))
+
+
+async def convert_pdf_to_html_async(pdf_file_path, timeout=None, config=None, **kwargs):
+    """
+    :param pdf_file_path: pdf file path, pdfplumber.pdf.PDF or depdf.pdf.DePDF class
+    :param timeout: seconds for the whole conversion, asyncio.TimeoutError is raised once exceeded
+    :param config: depdf config class
+    :param kwargs: config keyword arguments
+    :return: pdf html string
+    """
+    pdf_class = getattr(resolve_config(pdf_file_path, config=config, **kwargs), 'pdf_class')
+    html_pages = []
+    async for html_page in iter_html_pages_async(pdf_file_path, timeout=timeout, config=config, **kwargs):
+        html_pages.append(html_page)
+    return ''.join(wrap_html_pages(html_pages, pdf_class))
+
+
+async def run_page_api(api_func, pdf_file_path, pid, timeout=None, config=None, **kwargs):
+    """
+    :param api_func: blocking depdf.api function of a single page
+    :return: api function result, the page being converted can not be stopped on timeout or cancellation
+    """
+    executor = async_executor_for(resolve_config(pdf_file_path, config=config, **kwargs))
+    loop = asyncio.get_running_loop()
+    future = executor.submit(partial(api_func, pdf_file_path, pid, config=config, **kwargs))
+    deadline = None if timeout is None else loop.time() + timeout
+    return await wait_executor_future(future, deadline, loop)
+
+
+async def convert_page_to_html_async(pdf_file_path, pid, timeout=None, config=None, **kwargs):
+    """
+    :param pdf_file_path: pdf file path
+    :param pid: page number start from 1
+    :param timeout: seconds for the page conversion
+    :param config: depdf config class
+    :param kwargs: config keyword arguments
+    :return: page html string
+    """
+    return await run_page_api(convert_page_to_html, pdf_file_path, pid, timeout=timeout, config=config, **kwargs)
+
+
+async def extract_page_tables_async(pdf_file_path, pid, timeout=None, config=None, **kwargs):
+    """
+    :param pdf_file_path: pdf file path
+    :param pid: page number start from 1
+    :param timeout: seconds for the page extraction
+    :param config: depdf config class
+    :param kwargs: config keyword arguments
+    :return: page tables list
+    """
+    return await run_page_api(extract_page_tables, pdf_file_path, pid, timeout=timeout, config=config, **kwargs)
+
+
+async def extract_page_paragraphs_async(pdf_file_path, pid, timeout=None, config=None, **kwargs):
+    """
+    :param pdf_file_path: pdf file path
+    :param pid: page number start from 1
+    :param timeout: seconds for the page extraction
+    :param config: depdf config class
+    :param kwargs: config keyword arguments
+    :return: page paragraphs list
+    """
+    return await run_page_api(extract_page_paragraphs, pdf_file_path, pid, timeout=timeout, config=config,
+                              **kwargs)
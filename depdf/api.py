@@ -1,29 +1,42 @@
 from functools import wraps
+import os
+import time
+import traceback
 
 from pdfplumber.pdf import PDF
 
+from depdf.config import check_config, DEFAULT_CONFIG_KEYS
 from depdf.error import PDFTypeError
 from depdf.log import logger_init
 from depdf.pdf import DePDF
 from depdf.page import DePage
+from depdf.pool import WorkerPool
 
 log = logger_init(__name__)
 
 
+def load_pdf(pdf_file_path, config=None, **kwargs):
+    """
+    :param pdf_file_path: pdf file path, pdfplumber.pdf.PDF or depdf.pdf.DePDF class
+    :param config: depdf config class
+    :param kwargs: config and pdfplumber.open keyword arguments
+    :return: depdf.pdf.DePDF class
+    """
+    if isinstance(pdf_file_path, DePDF):
+        return pdf_file_path
+    elif isinstance(pdf_file_path, PDF):
+        return DePDF(pdf_file_path, config=config, **kwargs)
+    elif isinstance(pdf_file_path, str):
+        return DePDF.load(pdf_file_path, config=config, **kwargs)
+    raise PDFTypeError(pdf_file_path)
+
+
 def api_load_pdf(api_func):
     @wraps(api_func)
     def wrapper(pdf_file_path, *args, **kwargs):
         pid = args[0] if args else -1
         pid = pid if isinstance(pid, int) else 1
-        config = kwargs['config'] if 'config' in kwargs else None
-        if isinstance(pdf_file_path, DePDF):
-            pdf = pdf_file_path
-        elif isinstance(pdf_file_path, PDF):
-            pdf = DePDF(pdf_file_path, config=config, **kwargs)
-        elif isinstance(pdf_file_path, str):
-            pdf = DePDF.load(pdf_file_path, config=config, **kwargs)
-        else:
-            raise PDFTypeError
+        pdf = load_pdf(pdf_file_path, **kwargs)
         res = api_func(pdf, pid) if pid > 0 else api_func(pdf)
         pdf.close()
         return res
@@ -34,12 +47,32 @@ def api_load_pdf(api_func):
 def convert_pdf_to_html(pdf, **kwargs):
     """
     :param pdf: pdf file path
-    :param kwargs: config keyword arguments
+    :param kwargs: config keyword arguments, eg. workers=4 to convert pages in parallel
     :return: pdf html string
     """
     return pdf.html
 
 
+@api_load_pdf
+def convert_pdf_to_markdown(pdf, **kwargs):
+    """
+    :param pdf: pdf file path
+    :param kwargs: config keyword arguments
+    :return: pdf markdown string, no html is built
+    """
+    return pdf.render(backend='markdown')
+
+
+@api_load_pdf
+def convert_pdf_to_text(pdf, **kwargs):
+    """
+    :param pdf: pdf file path
+    :param kwargs: config keyword arguments
+    :return: pdf plain text string, pages are separated by form feeds, no html is built
+    """
+    return pdf.render(backend='text')
+
+
 @api_load_pdf
 def convert_page_to_html(pdf, pid, **kwargs):
     """
@@ -48,7 +81,8 @@ def convert_page_to_html(pdf, pid, **kwargs):
     :param kwargs: config keyword arguments
     :return: page html string
     """
-    page = DePage(pdf.pdf.pages[pid - 1], pid=pid, same=pdf.same, logo=pdf.logo, config=pdf.config)
+    page = DePage(pdf.pdf.pages[pid - 1], pid=pid, same=pdf.same, logo=pdf.logo, config=pdf.config,
+                  image_registry=pdf.image_registry)
     return page.html
 
 
@@ -60,7 +94,8 @@ def extract_page_tables(pdf, pid, **kwargs):
     :param kwargs: config keyword arguments
     :return: page tables list
     """
-    page = DePage(pdf.pdf.pages[pid - 1],  pid=pid, same=pdf.same, logo=pdf.logo, config=pdf.config)
+    page = DePage(pdf.pdf.pages[pid - 1], pid=pid, same=pdf.same, logo=pdf.logo, config=pdf.config,
+                  image_registry=pdf.image_registry)
     return page.tables
 
 
@@ -72,5 +107,183 @@ def extract_page_paragraphs(pdf, pid, **kwargs):
     :param kwargs: config keyword arguments
     :return: page paragraphs list
     """
-    page = DePage(pdf.pdf.pages[pid - 1], pid=pid, same=pdf.same, logo=pdf.logo, config=pdf.config)
+    page = DePage(pdf.pdf.pages[pid - 1], pid=pid, same=pdf.same, logo=pdf.logo, config=pdf.config,
+                  image_registry=pdf.image_registry)
     return page.paragraphs
+
+
+def api_load_pdf_pages(page_func):
+    """
+    :param page_func: function of a single depdf.page.DePage
+    :return: function of (pdf_file_path, pages=None, **kwargs), the pdf is opened once for all pages
+    and the result is a dict of page number => page_func result
+    """
+    @wraps(page_func)
+    def wrapper(pdf_file_path, pages=None, **kwargs):
+        pdf = load_pdf(pdf_file_path, **kwargs)
+        try:
+            page_ids = range(1, pdf.page_num + 1) if pages is None else pages
+            results = {}
+            for pid in page_ids:
+                if not 1 <= pid <= pdf.page_num:
+                    raise IndexError('page number out of range: {}'.format(pid))
+                page = pdf.create_page(pid - 1)  # header & footer and logo are computed once for the pdf
+                results[pid] = page_func(page)
+                page.page.flush_cache()
+            return results
+        finally:
+            pdf.close()
+    return wrapper
+
+
+@api_load_pdf_pages
+def convert_pages_to_html(page):
+    """
+    usage: convert_pages_to_html(pdf_file_path, pages=range(3, 41), **kwargs)
+    pages start from 1, all pages by default, see api_load_pdf_pages
+    :param page: depdf.page.DePage class
+    :return: page html string, collected into dict of page number => page html string
+    """
+    return page.html
+
+
+@api_load_pdf_pages
+def extract_tables(page):
+    """
+    usage: extract_tables(pdf_file_path, pages=range(3, 41), **kwargs)
+    pages start from 1, all pages by default, see api_load_pdf_pages
+    :param page: depdf.page.DePage class
+    :return: page tables list, collected into dict of page number => page tables list
+    """
+    return page.tables
+
+
+@api_load_pdf_pages
+def extract_paragraphs(page):
+    """
+    usage: extract_paragraphs(pdf_file_path, pages=range(3, 41), **kwargs)
+    pages start from 1, all pages by default, see api_load_pdf_pages
+    :param page: depdf.page.DePage class
+    :return: page paragraphs list, collected into dict of page number => page paragraphs list
+    """
+    return page.paragraphs
+
+
+def convert_pdf_to_jsonl(pdf_file_path, fp, **kwargs):
+    """
+    :param pdf_file_path: pdf file path
+    :param fp: output file path or writable text stream, one table or paragraph json object per line
+    :param kwargs: config keyword arguments
+    :return: number of records written
+    """
+    pdf = load_pdf(pdf_file_path, **kwargs)
+    try:
+        return pdf.write_jsonl(fp)
+    finally:
+        pdf.close()
+
+
+def convert_pdf_tables_to_csv(pdf_file_path, output_dir='', **kwargs):
+    """
+    :param pdf_file_path: pdf file path
+    :param output_dir: directory of the csv files, current directory by default, created if missing
+    :param kwargs: config keyword arguments
+    :return: list of csv file names, one file per table
+    """
+    pdf = load_pdf(pdf_file_path, **kwargs)
+    try:
+        return pdf.save_tables_csv(output_dir=output_dir)
+    finally:
+        pdf.close()
+
+
+class BatchResult(object):
+    """
+    Conversion result of a single pdf of convert_batch, either html or the exception is set.
+    """
+
+    def __init__(self, index, path, html=None, exception=None, error=None, elapsed=0, stats=None, page_errors=None):
+        """
+        :param index: position of the pdf in the batch
+        :param path: pdf file path
+        :param html: pdf html string
+        :param exception: exception raised while converting the pdf
+        :param error: formatted traceback of the exception
+        :param elapsed: conversion wall time (seconds)
+        :param stats: per-stage document stats, see depdf.pdf.DePDF.stats
+        :param page_errors: page number => traceback of pages which failed inside worker processes
+        """
+        self.index = index
+        self.path = path
+        self.html = html
+        self.exception = exception
+        self.error = error
+        self.elapsed = elapsed
+        self.stats = stats
+        self.page_errors = page_errors or {}
+
+    def __repr__(self):
+        status = 'ok' if self.ok else type(self.exception).__name__
+        return '<depdf.BatchResult: ({}, {}, {:.3f}s)>'.format(self.path, status, self.elapsed)
+
+    @property
+    def ok(self):
+        return self.exception is None
+
+
+def convert_batch_document(index, path, config, open_kwargs):
+    """
+    :return: BatchResult of a single pdf, exceptions are caught so that every pdf of the batch is isolated
+    """
+    start = time.perf_counter()
+    try:
+        with DePDF.load(path, config=config, **open_kwargs) as pdf:
+            html = pdf.to_html
+            return BatchResult(index, path, html=html, elapsed=time.perf_counter() - start, stats=pdf.stats,
+                               page_errors=pdf.page_errors)
+    except Exception as e:
+        return BatchResult(index, path, exception=e, error=traceback.format_exc(), elapsed=time.perf_counter() - start)
+
+
+@check_config
+def convert_batch(paths, workers=None, config=None, max_in_flight=None, max_docs_per_worker=None, progress=None,
+                  **kwargs):
+    """
+    :param paths: iterable of pdf file paths, consumed lazily
+    :param workers: number of worker processes converting whole documents, defaults to the cpu count,
+        1 converts the documents one by one in the current process
+    :param config: depdf config class
+    :param max_in_flight: maximum number of documents submitted and not yet yielded, defaults to 2 * workers
+    :param max_docs_per_worker: restart the worker processes after workers * N documents to keep memory bounded
+    :param progress: callable which receives (done count, total count or None, BatchResult) of every document
+    :param kwargs: config and pdfplumber.open keyword arguments
+    :return: generator of BatchResult in completion order
+    a worker process which dies (eg. killed for memory) only fails the document it was converting
+    with BrokenProcessPool, the pool is restarted for the other documents
+    """
+    config = config.copy(**{k: v for k, v in kwargs.items() if k in DEFAULT_CONFIG_KEYS})
+    open_kwargs = {k: v for k, v in kwargs.items() if k not in DEFAULT_CONFIG_KEYS}
+    workers = workers or os.cpu_count() or 1
+    total = len(paths) if hasattr(paths, '__len__') else None
+    done = 0
+
+    def report(result):
+        nonlocal done
+        done += 1
+        if progress is not None:
+            progress(done, total, result)
+        return result
+
+    if workers <= 1:
+        for index, path in enumerate(paths):
+            yield report(convert_batch_document(index, path, config, open_kwargs))
+        return
+
+    # documents are the unit of work, pages of a document are converted in its worker process
+    config = config.copy(workers=1)
+    pool = WorkerPool(workers, max_tasks_per_worker=max_docs_per_worker)
+    tasks = (((index, path), (index, path, config, open_kwargs)) for index, path in enumerate(paths))
+    for (index, path), result, e in pool.imap_unordered(convert_batch_document, tasks, max_in_flight=max_in_flight):
+        if e is not None:
+            result = BatchResult(index, path, exception=e, error=''.join(traceback.format_exception_only(type(e), e)))
+        yield report(result)
@@ -1,10 +1,12 @@
 from decimal import Decimal
 
 from depdf.error import BoxValueError
+from depdf.render import render
 from depdf.utils import convert_html_to_soup, repr_str
 
 
 class Box(object):
+    number_type = Decimal  # Decimal or float, depends on config numeric_backend
     x0 = Decimal(0)
     x1 = Decimal(0)
     top = Decimal(0)
@@ -29,19 +31,19 @@ class Box(object):
     @bbox.setter
     def bbox(self, value):
         if value is not None:
-            bbox = self.normalize_bbox(value)
+            bbox = self.normalize_bbox(value, number_type=self.number_type)
             self.x0, self.top, self.x1, self.bottom = bbox
             self._bbox = bbox
 
     @staticmethod
-    def normalize_bbox(bbox):
+    def normalize_bbox(bbox, number_type=Decimal):
         if not (isinstance(bbox, list) or isinstance(bbox, tuple)):
             raise BoxValueError(bbox)
         if isinstance(bbox, str):
             raise BoxValueError(bbox)
         if len(bbox) != 4:
             raise BoxValueError(bbox)
-        bbox = [Decimal(i) for i in bbox]
+        bbox = [number_type(i) for i in bbox]
         return bbox
 
 
@@ -54,18 +56,54 @@ class Base(object):
 
     @property
     def html(self):
+        """
+        :return: html rendered from the extracted object by to_html, memoized until rerender
+        """
+        if not self._html and hasattr(self, 'to_html'):
+            self._html = self.to_html
         return self._html
 
     @html.setter
     def html(self, html_value):
         self._html = html_value
 
+    @property
+    def to_html(self):
+        return self.render()
+
+    def render(self, fp=None, backend='html'):
+        """
+        :param fp: writable text stream, the rendered string is returned if not set
+        :param backend: 'html', 'markdown', 'text' or a depdf.render.Renderer subclass
+        :return: rendered string if fp is not set
+        """
+        return render(self, fp=fp, backend=backend)
+
     @property
     def soup(self):
-        return convert_html_to_soup(self._html)
+        return convert_html_to_soup(self.html)
 
     def to_soup(self, parser):
-        return convert_html_to_soup(self._html, parser=parser)
+        return convert_html_to_soup(self.html, parser=parser)
+
+    @property
+    def render_children(self):
+        return []
+
+    def rerender(self, config):
+        """
+        keep the extracted object and render its html again on next access
+        :param config: config to take the rendering values from, eg. table_class
+        """
+        if getattr(self, 'config', None) is not None:
+            self.config = self.config.copy(**config.rendering_values)
+        self.rerender_children(config)
+
+    def rerender_children(self, config):
+        self.__dict__.pop('_html', None)
+        for obj in self.render_children:
+            if hasattr(obj, 'rerender'):
+                obj.rerender(config)
 
     def write_to(self, file_name):
         with open(file_name, "w") as file:
@@ -75,7 +113,8 @@ class Base(object):
     def to_dict(self):
         return {
             i: getattr(self, i, None) for i in dir(self)
-            if not i.startswith('_') and i not in ['to_dict', 'refresh', 'reset', 'write_to', 'to_soup']
+            if not i.startswith('_') and i not in ['to_dict', 'refresh', 'reset', 'write_to', 'to_soup', 'render', 'rerender',
+                                                 'rerender_children', 'render_children']
         }
 
     def _get_cached_property(self, key, calculate_function, *args, **kwargs):
@@ -94,7 +133,7 @@ class Base(object):
 
     def refresh(self):
         for p in self._cached_properties:
-            if hasattr(self, p):
+            if p in self.__dict__:  # class level defaults such as _html are kept
                 delattr(self, p)
         self.reset()
 
@@ -109,6 +148,10 @@ class InnerWrapper(Base):
     def inner_objects(self):
         return self._inner_objects
 
+    @property
+    def render_children(self):
+        return self._inner_objects or []
+
     @property
     def to_dict(self):
         return [obj.to_dict if hasattr(obj, 'to_dict') else obj for obj in self._inner_objects]
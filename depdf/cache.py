@@ -0,0 +1,151 @@
+from contextlib import closing
+from decimal import Decimal
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import weakref
+
+from depdf.log import logger_init
+from depdf.settings import DEFAULT_CACHE_SIZE_LIMIT
+from depdf.version import __version__
+
+log = logger_init(__name__)
+CACHE_DB_NAME = 'depdf_cache.sqlite3'
+_pdf_digests = weakref.WeakKeyDictionary()
+
+
+def pdf_digest(plumber_pdf):
+    """
+    :param plumber_pdf: pdfplumber.pdf.PDF class
+    :return: sha256 hex digest of the pdf file content, computed once per pdf object
+    """
+    if plumber_pdf in _pdf_digests:
+        return _pdf_digests[plumber_pdf]
+    stream = plumber_pdf.stream
+    position = stream.tell()
+    stream.seek(0)
+    sha = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(1 << 20), b''):
+        sha.update(chunk)
+    stream.seek(position)
+    digest = sha.hexdigest()
+    _pdf_digests[plumber_pdf] = digest
+    return digest
+
+
+def encode_value(value):
+    """
+    :param value: str, number, bool, None, Decimal, or list / tuple / dict (str keys) of them
+    :return: json-safe copy of value, Decimal and tuple are tagged so that they are restored exactly
+    """
+    if isinstance(value, Decimal):
+        return {'__decimal__': str(value)}
+    if isinstance(value, tuple):
+        return {'__tuple__': [encode_value(i) for i in value]}
+    if isinstance(value, list):
+        return [encode_value(i) for i in value]
+    if isinstance(value, dict):
+        if not all(isinstance(k, str) for k in value):
+            raise TypeError('cache value dict keys must be str')
+        return {k: encode_value(v) for k, v in value.items()}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise TypeError('cache value of type {} is not supported'.format(type(value).__name__))
+
+
+def decode_object(obj):
+    if '__decimal__' in obj:
+        return Decimal(obj['__decimal__'])
+    if '__tuple__' in obj:
+        return tuple(obj['__tuple__'])
+    return obj
+
+
+def make_cache_key(*parts):
+    key_parts = [str(i) for i in parts] + [__version__]
+    return hashlib.sha256('\x00'.join(key_parts).encode('utf-8')).hexdigest()
+
+
+class PageCache(object):
+    """
+    On-disk result cache backed by sqlite, safe to share between processes.
+    Least recently used entries are evicted once the total size exceeds size_limit (bytes).
+    Values are stored as json, reading the cache never executes code, but whoever can write to
+    cache_dir can still change the conversion results, so only use directories writable by trusted users.
+    """
+
+    def __init__(self, cache_dir, size_limit=DEFAULT_CACHE_SIZE_LIMIT):
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, CACHE_DB_NAME)
+        self.size_limit = size_limit
+        with closing(self.connect()) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache '
+                '(key TEXT PRIMARY KEY, value BLOB, size INTEGER, accessed REAL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)')
+            conn.commit()
+
+    def __repr__(self):
+        return '<depdf.PageCache: {}>'.format(self.db_path)
+
+    def connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get(self, key):
+        """
+        :param key: cache key string
+        :return: cached value or None if not found
+        """
+        try:
+            with closing(self.connect()) as conn:
+                row = conn.execute('SELECT value FROM cache WHERE key = ?', (key,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute('UPDATE cache SET accessed = ? WHERE key = ?', (time.time(), key))
+                conn.commit()
+            return json.loads(row[0].decode('utf-8'), object_hook=decode_object)
+        except Exception as e:
+            log.warning('page cache read failed: {}'.format(e))
+            return None
+
+    def set(self, key, value):
+        """
+        :param key: cache key string
+        :param value: value supported by encode_value, eg. dict of lists, str and Decimal numbers
+        """
+        try:
+            blob = json.dumps(encode_value(value), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            with closing(self.connect()) as conn:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.execute(
+                    'INSERT OR REPLACE INTO cache (key, value, size, accessed) VALUES (?, ?, ?, ?)',
+                    (key, blob, len(blob), time.time())
+                )
+                self.evict(conn)
+                conn.commit()
+        except Exception as e:
+            log.warning('page cache write failed: {}'.format(e))
+
+    def evict(self, conn):
+        if self.size_limit is None:
+            return
+        total_size = conn.execute('SELECT COALESCE(SUM(size), 0) FROM cache').fetchone()[0]
+        if total_size <= self.size_limit:
+            return
+        evict_keys = []
+        for key, size in conn.execute('SELECT key, size FROM cache ORDER BY accessed'):
+            if total_size <= self.size_limit:
+                break
+            evict_keys.append((key,))
+            total_size -= size
+        conn.executemany('DELETE FROM cache WHERE key = ?', evict_keys)
+
+    def clear(self):
+        with closing(self.connect()) as conn:
+            conn.execute('DELETE FROM cache')
+            conn.commit()
@@ -1,6 +1,7 @@
 from depdf.base import Base, Box
 from depdf.config import check_config
 from depdf.log import logger_init
+from depdf.utils import get_number_type
 
 log = logger_init(__name__)
 
@@ -10,18 +11,14 @@ class Image(Base, Box):
 
     @check_config
     def __init__(self, bbox=None, src='', percent=100, pid='1', img_idx=1, scan=False, config=None):
+        self.number_type = get_number_type(getattr(config, 'numeric_backend'))
         self.bbox = bbox
         self.scan = scan
         self.src = src
         self.img_idx = img_idx
         self.pid = pid
-        img_id = 'page-{pid}-image-{img_idx}'.format(pid=pid, img_idx=img_idx)
-        img_class = '{img_class} page-{pid}'.format(img_class=getattr(config, 'image_class'), pid=pid)
-        html = '<img id="{img_id}" class="{img_class}" src="{src}" width="{percent}%">'.format(
-            img_id=img_id, img_class=img_class, src=src, percent=min(round(percent), 100)
-        )
-        html += '</img>'
-        self.html = html
+        self.percent = percent
+        self.config = config
 
     def __repr__(self):
         scan_flag = '[scan]' if self.scan else ''
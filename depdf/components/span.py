@@ -1,7 +1,7 @@
 from depdf.base import Base, Box
 from depdf.config import check_config
 from depdf.log import logger_init
-from depdf.utils import construct_style, repr_str
+from depdf.utils import get_number_type, repr_str
 
 log = logger_init(__name__)
 
@@ -11,13 +11,11 @@ class Span(Base, Box):
 
     @check_config
     def __init__(self, bbox=None, span_text='', config=None, style=None):
+        self.number_type = get_number_type(getattr(config, 'numeric_backend'))
         self.bbox = bbox
         self.text = span_text
-        span_class = getattr(config, 'span_class')
-        style_text = construct_style(style=style)
-        self.html = '<span class="{span_class}"{style_text}>{span_text}</span>'.format(
-            span_class=span_class, span_text=span_text, style_text=style_text
-        )
+        self.config = config
+        self.style = style
 
     def __repr__(self):
         return '<depdf.Span: {}>'.format(repr_str(self.text))
@@ -1,7 +1,7 @@
 from depdf.base import Base, Box, InnerWrapper
 from depdf.config import check_config
 from depdf.log import logger_init
-from depdf.utils import calc_bbox, repr_str
+from depdf.utils import calc_bbox, get_number_type, repr_str
 
 log = logger_init(__name__)
 
@@ -9,15 +9,15 @@ log = logger_init(__name__)
 class Cell(InnerWrapper, Box):
     object_type = 'cell'
 
-    def __init__(self, bbox=None, text='', inner_objects=None):
+    @check_config
+    def __init__(self, bbox=None, text='', inner_objects=None, config=None):
+        self.number_type = get_number_type(getattr(config, 'numeric_backend'))
         self.bbox = bbox
+        self.config = config
         if text:
             self.text = text
-            self.html = text
         else:
             self._inner_objects = inner_objects
-            for obj in inner_objects:
-                self.html += getattr(obj, 'html', '')
 
     def __repr__(self):
         if hasattr(self, 'text'):
@@ -34,6 +34,7 @@ class Table(Base, Box):
         self.tid = tid
         self.rows = rows
         self.config = config
+        self.number_type = get_number_type(getattr(config, 'numeric_backend'))
         self.bbox = bbox if bbox else calc_bbox(rows)
 
     def __repr__(self):
@@ -50,25 +51,22 @@ class Table(Base, Box):
         ]
         return table_dict
 
-    def save_html(self):
-        table_file_name = '{}_page_{}_table_{}.html'.format(self.config.unique_prefix, self.pid, self.tid)
-        return super().write_to(table_file_name)
-
     @property
-    def html(self):
-        if not self._html and hasattr(self, 'to_html'):
-            return self.to_html
-        return self._html
+    def render_children(self):
+        return [cell for row in self.rows for cell in row if cell]
 
     @property
-    def to_html(self):
-        table_class = getattr(self.config, 'table_class')
-        table_cell_merge_tolerance = getattr(self.config, 'table_cell_merge_tolerance')
-        skip_empty_table = getattr(self.config, 'skip_empty_table')
-        return convert_table_to_html(
-            self.to_dict, pid=self.pid, tid=self.tid, tc_mt=table_cell_merge_tolerance,
-            table_class=table_class, skip_et=skip_empty_table
-        )
+    def cell_spans(self):
+        """
+        :return: dict of (row index, column index) => (rowspan, colspan) of every cell, same as the html rendering
+        """
+        cell_sizes = [[{'width': cell.width, 'height': cell.height} if cell else cell for cell in row]
+                      for row in self.rows]
+        return calc_cell_spans(cell_sizes, tc_mt=getattr(self.config, 'table_cell_merge_tolerance'))
+
+    def save_html(self):
+        table_file_name = '{}_page_{}_table_{}.html'.format(self.config.unique_prefix, self.pid, self.tid)
+        return super().write_to(table_file_name)
 
 
 def gen_column_cell_sizes(t):
@@ -86,30 +84,29 @@ def gen_column_cell_sizes(t):
     return cell_num, cell_sizes
 
 
-def convert_table_to_html(table_dict, pid='1', tid=1, tc_mt=5, table_class='pdf-table', skip_et=False):
-    empty_table_html = ''
-    none_text_table = True
-    html_table_string = '<table id="page-{pid}-table-{tid}" class="{table_class} page-{pid}">'.format(
-        pid=pid, tid=tid, table_class=table_class
-    )
+def calc_cell_spans(table_dict, tc_mt=5):
+    """
+    :param table_dict: rows of cell dicts with width & height, None for the positions covered by merged cells
+    :param tc_mt: table cell merge tolerance
+    :return: dict of (row index, column index) => (rowspan, colspan) of every cell
+    """
     row_num = len(table_dict)
     row_heights = [min([tc['height'] for tc in tr if tc]) for tr in table_dict]
     try:
         column_num, column_widths = gen_column_cell_sizes(table_dict)
     except Exception as e:
-        log.debug('convert_table_to_html error: {}'.format(e))
+        log.debug('calc_cell_spans error: {}'.format(e))
         column_num = max([len(tr) for tr in table_dict])
         column_widths = [
             min([tc['width'] for tc in tr if tc])
             if not all(v is None for v in tr) else 0
             for tr in map(list, zip(*table_dict))
         ]
+    spans = {}
     for rid, tr in enumerate(table_dict):
-        html_table_string += '<tr>'
         for cid, tc in enumerate(tr):
             if tc is None:
                 continue
-            html_table_string += '<td'
             row_span = col_span = 1
             for i in range(rid + 1, row_num):
                 if abs(tc['height'] - sum(row_heights[rid:i])) > tc_mt:
@@ -121,14 +118,5 @@ def convert_table_to_html(table_dict, pid='1', tid=1, tc_mt=5, table_class='pdf-
                     col_span += 1
                 else:
                     break
-            if row_span > 1:
-                html_table_string += ' rowspan="{}"'.format(row_span)
-            if col_span > 1:
-                html_table_string += ' colspan="{}"'.format(col_span)
-            html_table_string += '>{tc_text}</td>'.format(tc_text=tc['html'])
-            none_text_table = False if tc['html'] else none_text_table
-        html_table_string += '</tr>'
-    html_table_string += '</table>'
-    if skip_et and none_text_table:
-        return empty_table_html
-    return html_table_string
+            spans[rid, cid] = row_span, col_span
+    return spans
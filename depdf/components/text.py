@@ -1,14 +1,17 @@
 from depdf.base import Base, Box
-from depdf.utils import repr_str
+from depdf.config import check_config
+from depdf.utils import get_number_type, repr_str
 
 
 class Text(Base, Box):
     object_type = 'text'
 
-    def __init__(self, bbox='', text=''):
+    @check_config
+    def __init__(self, bbox='', text='', config=None):
+        self.number_type = get_number_type(getattr(config, 'numeric_backend'))
         self.bbox = bbox
         self.text = text
-        self.html = text
+        self.config = config
 
     def __repr__(self):
         return '<depdf.Text: {}>'.format(repr_str(self.text))
@@ -1,4 +1,5 @@
 from functools import wraps
+import hashlib
 import os
 
 from depdf.error import ConfigTypeError
@@ -8,116 +9,230 @@ from depdf.settings import *
 log = logger_init(__name__)
 
 
-class Config(object):
+CONFIG_DEFAULTS = {
     # pdf
-    logo_flag = DEFAULT_LOGO_FLAG
-    header_footer_flag = DEFAULT_HEADER_FOOTER_FLAG
-    temp_dir_prefix = DEFAULT_TEMP_DIR_PREFIX
-    unique_prefix = None  # 该参数会根据 pdf 的文件名自动更新
+    'logo_flag': DEFAULT_LOGO_FLAG,
+    'header_footer_flag': DEFAULT_HEADER_FOOTER_FLAG,
+    'temp_dir_prefix': DEFAULT_TEMP_DIR_PREFIX,
+    'max_cached_pages': DEFAULT_MAX_CACHED_PAGES,
+    'unique_prefix': None,  # 该参数会根据 pdf 的文件名自动更新
 
     # page
-    table_flag = DEFAULT_TABLE_FLAG
-    paragraph_flag = DEFAULT_PARAGRAPH_FLAG
-    image_flag = DEFAULT_IMAGE_FLAG
-    resolution = DEFAULT_RESOLUTION
-    main_frame_tolerance = None  # 该参数可通过页面内容自动分析
-    x_tolerance = None  # 该参数可通过页面内容自动分析
-    y_tolerance = None  # 该参数可通过页面内容自动分析
-    page_num_top_fraction = DEFAULT_PAGE_NUM_TOP_FRACTION
-    page_num_left_fraction = DEFAULT_PAGE_NUM_LEFT_FRACTION
-    page_num_right_fraction = DEFAULT_PAGE_NUM_RIGHT_FRACTION
-    dotted_line_flag = True
-    curved_line_flag = False
+    'table_flag': DEFAULT_TABLE_FLAG,
+    'paragraph_flag': DEFAULT_PARAGRAPH_FLAG,
+    'image_flag': DEFAULT_IMAGE_FLAG,
+    'resolution': DEFAULT_RESOLUTION,
+    'numeric_backend': DEFAULT_NUMERIC_BACKEND,
+    'main_frame_tolerance': None,  # 该参数可通过页面内容自动分析
+    'x_tolerance': None,  # 该参数可通过页面内容自动分析
+    'y_tolerance': None,  # 该参数可通过页面内容自动分析
+    'page_num_top_fraction': DEFAULT_PAGE_NUM_TOP_FRACTION,
+    'page_num_left_fraction': DEFAULT_PAGE_NUM_LEFT_FRACTION,
+    'page_num_right_fraction': DEFAULT_PAGE_NUM_RIGHT_FRACTION,
+    'dotted_line_flag': True,
+    'curved_line_flag': False,
 
     # mini page
-    multiple_columns_flag = DEFAULT_MULTIPLE_COLUMNS_FLAG
-    max_columns = DEFAULT_MAX_COLUMNS
-    column_region_half_width = DEFAULT_COLUMN_REGION_HALF_WIDTH
-    min_column_region_objects = DEFAULT_MIN_COLUMN_REGION_OBJECTS
+    'multiple_columns_flag': DEFAULT_MULTIPLE_COLUMNS_FLAG,
+    'max_columns': DEFAULT_MAX_COLUMNS,
+    'column_region_half_width': DEFAULT_COLUMN_REGION_HALF_WIDTH,
+    'min_column_region_objects': DEFAULT_MIN_COLUMN_REGION_OBJECTS,
+    'min_column_width_fraction': DEFAULT_MIN_COLUMN_WIDTH_FRACTION,
+    'min_column_objects_fraction': DEFAULT_MIN_COLUMN_OBJECTS_FRACTION,
 
     # chars
-    char_overlap_size = DEFAULT_CHAR_OVERLAP_SIZE
-    default_char_size = DEFAULT_CHAR_SIZE
-    char_size_upper = DEFAULT_CHAR_SIZE_UPPER
-    char_size_lower = DEFAULT_CHAR_SIZE_LOWER
+    'char_overlap_size': DEFAULT_CHAR_OVERLAP_SIZE,
+    'default_char_size': DEFAULT_CHAR_SIZE,
+    'char_size_upper': DEFAULT_CHAR_SIZE_UPPER,
+    'char_size_lower': DEFAULT_CHAR_SIZE_LOWER,
 
     # table
-    snap_flag = DEFAULT_SNAP_FLAG
-    add_line_flag = DEFAULT_ADD_LINE_FLAG
-    min_double_line_tolerance = DEFAULT_MIN_DOUBLE_LINE_TOLERANCE  # used in page class
-    max_double_line_tolerance = DEFAULT_MAX_DOUBLE_LINE_TOLERANCE  # used in page class
-    vertical_double_line_tolerance = DEFAULT_VERTICAL_DOUBLE_LINE_TOLERANCE  # used in page class
-    table_cell_merge_tolerance = DEFAULT_TABLE_CELL_MERGE_TOLERANCE
-    skip_empty_table = DEFAULT_SKIP_EMPTY_TABLE
-    add_vertical_lines_flag = DEFAULT_ADD_VERTICAL_LINES_FLAG
-    add_horizontal_lines_flag = DEFAULT_ADD_HORIZONTAL_LINES_FLAG
-    add_horizontal_line_tolerance = DEFAULT_ADD_HORIZONTAL_LINE_TOLERANCE
+    'snap_flag': DEFAULT_SNAP_FLAG,
+    'add_line_flag': DEFAULT_ADD_LINE_FLAG,
+    'min_double_line_tolerance': DEFAULT_MIN_DOUBLE_LINE_TOLERANCE,  # used in page class
+    'max_double_line_tolerance': DEFAULT_MAX_DOUBLE_LINE_TOLERANCE,  # used in page class
+    'vertical_double_line_tolerance': DEFAULT_VERTICAL_DOUBLE_LINE_TOLERANCE,  # used in page class
+    'table_cell_merge_tolerance': DEFAULT_TABLE_CELL_MERGE_TOLERANCE,
+    'skip_empty_table': DEFAULT_SKIP_EMPTY_TABLE,
+    'add_vertical_lines_flag': DEFAULT_ADD_VERTICAL_LINES_FLAG,
+    'add_horizontal_lines_flag': DEFAULT_ADD_HORIZONTAL_LINES_FLAG,
+    'add_horizontal_line_tolerance': DEFAULT_ADD_HORIZONTAL_LINE_TOLERANCE,
 
     # image
-    min_image_size = DEFAULT_MIN_IMAGE_SIZE
-    image_resolution = DEFAULT_IMAGE_RESOLUTION
+    'min_image_size': DEFAULT_MIN_IMAGE_SIZE,
+    'image_dedupe_flag': DEFAULT_IMAGE_DEDUPE_FLAG,
+    'image_resolution': DEFAULT_IMAGE_RESOLUTION,
+    'max_concurrent_renders': DEFAULT_MAX_CONCURRENT_RENDERS,
+
+    # parallel
+    'workers': DEFAULT_WORKERS,
+    'max_pages_per_worker': DEFAULT_MAX_PAGES_PER_WORKER,
+    'async_max_concurrency': DEFAULT_ASYNC_MAX_CONCURRENCY,
+
+    # cache
+    'cache_dir': DEFAULT_CACHE_DIR,
+    'cache_size_limit': DEFAULT_CACHE_SIZE_LIMIT,
 
     # head & tail
-    default_head_tail_page_offset_percent = DEFAULT_HEAD_TAIL_PAGE_OFFSET_PERCENT
+    'default_head_tail_page_offset_percent': DEFAULT_HEAD_TAIL_PAGE_OFFSET_PERCENT,
 
     # log
-    log_level = DEFAULT_LOG_LEVEL
-    verbose_flag = DEFAULT_VERBOSE_FLAG
-    debug_flag = DEFAULT_DEBUG_FLAG
+    'log_level': DEFAULT_LOG_LEVEL,
+    'verbose_flag': DEFAULT_VERBOSE_FLAG,
+    'debug_flag': DEFAULT_DEBUG_FLAG,
 
     # html
-    span_class = DEFAULT_SPAN_CLASS
-    paragraph_class = DEFAULT_PARAGRAPH_CLASS
-    table_class = DEFAULT_TABLE_CLASS
-    pdf_class = DEFAULT_PDF_CLASS
-    image_class = DEFAULT_IMAGE_CLASS
-    page_class = DEFAULT_PAGE_CLASS
-    mini_page_class = DEFAULT_MINI_PAGE_CLASS
+    'span_class': DEFAULT_SPAN_CLASS,
+    'paragraph_class': DEFAULT_PARAGRAPH_CLASS,
+    'table_class': DEFAULT_TABLE_CLASS,
+    'pdf_class': DEFAULT_PDF_CLASS,
+    'image_class': DEFAULT_IMAGE_CLASS,
+    'page_class': DEFAULT_PAGE_CLASS,
+    'mini_page_class': DEFAULT_MINI_PAGE_CLASS,
+}
+# config keys which do not change extraction results
+FINGERPRINT_IGNORED_KEYS = [
+    'log_level', 'verbose_flag', 'debug_flag',
+    'workers', 'max_pages_per_worker', 'async_max_concurrency', 'cache_dir', 'cache_size_limit',
+    'max_concurrent_renders', 'max_cached_pages',
+]
+# config keys which only change the html rendering of the extracted layout
+RENDERING_KEYS = [
+    'span_class', 'paragraph_class', 'table_class', 'pdf_class', 'image_class', 'page_class', 'mini_page_class',
+    'table_cell_merge_tolerance', 'skip_empty_table',
+]
+
+
+class Config(object):
+    """
+    Immutable configuration snapshot, use Config.copy(**kwargs) to derive a new one with overrides.
+    Creating a config has no side effects, see init_config_environment.
+    """
+    __slots__ = ('_values', '_fingerprint')
 
     def __init__(self, **kwargs):
+        values = dict(CONFIG_DEFAULTS)
         # set log level automatically if debug mode enabled
         if kwargs.get('debug_flag'):
-            self.log_level = logging.DEBUG
+            values['log_level'] = logging.DEBUG
         if kwargs.get('verbose_flag'):
-            self.log_level = logging.INFO
+            values['log_level'] = logging.INFO
+        values.update(check_config_keys(kwargs))
+        object.__setattr__(self, '_values', values)
+        object.__setattr__(self, '_fingerprint', None)
 
-        # add configuration parameters
-        self.update(**kwargs)
-        self._kwargs = kwargs
+    def __repr__(self):
+        kwargs = {k: v for k, v in self._values.items() if v != CONFIG_DEFAULTS[k]}
+        return '<depdf.Config: {}>'.format(kwargs)
 
-        # create temporary folder
-        if not os.path.isdir(self.temp_dir_prefix):
-            os.mkdir(self.temp_dir_prefix)
+    def __setattr__(self, key, value):
+        raise AttributeError('depdf.Config is immutable, use Config.copy({}=...) instead'.format(key))
 
-        # set logging level by log_level parameter
-        logging.getLogger('depdf').setLevel(self.log_level)
+    def __delattr__(self, key):
+        raise AttributeError('depdf.Config is immutable')
 
-    def __repr__(self):
-        return '<depdf.Config: {}>'.format(self._kwargs)
+    def __eq__(self, other):
+        return isinstance(other, Config) and self._values == other._values
+
+    def __hash__(self):
+        return hash(self.fingerprint)
+
+    def __reduce__(self):
+        return self.__class__._from_values, (self._values,)
+
+    @classmethod
+    def _from_values(cls, values):
+        config = cls.__new__(cls)
+        object.__setattr__(config, '_values', values)
+        object.__setattr__(config, '_fingerprint', None)
+        return config
 
     @property
     def to_dict(self):
-        return {
-            i: getattr(self, i, None) for i in dir(self)
-            if not i.startswith('_') and i not in ['to_dict', 'copy', 'update']
-        }
+        return dict(self._values)
+
+    @property
+    def fingerprint(self):
+        """
+        :return: stable sha256 hex digest of config values which affect extraction results
+        """
+        if self._fingerprint is None:
+            items = sorted(
+                (k, v) for k, v in self._values.items() if k not in FINGERPRINT_IGNORED_KEYS and k not in RENDERING_KEYS
+            )
+            object.__setattr__(self, '_fingerprint', hashlib.sha256(repr(items).encode('utf-8')).hexdigest())
+        return self._fingerprint
+
+    @property
+    def rendering_values(self):
+        return {k: self._values[k] for k in RENDERING_KEYS}
 
     def copy(self, **kwargs):
-        copied_config = Config(**self.to_dict)
-        copied_config.update(**kwargs)
-        return copied_config
+        """
+        :param kwargs: config values to override
+        :return: new config, the current one is returned if nothing changes
+        """
+        if not kwargs:
+            return self
+        values = self._values.copy()
+        values.update(check_config_keys(kwargs))
+        if values == self._values:
+            return self
+        return self._from_values(values)
 
     def update(self, **kwargs):
-        for key, value in kwargs.items():
-            if hasattr(self, key):
-                setattr(self, key, value)
-            else:
-                log.warning('config attributes not found: {}'.format(key))
+        """
+        removed, configs used to be updated in place, use config = config.copy(**kwargs) instead
+        """
+        raise AttributeError('depdf.Config is immutable and can not be updated in place, '
+                             'use config = config.copy(**kwargs) instead')
+
+
+def is_rendering_change(old_config, new_config):
+    """
+    :return: True if the extracted layout of old_config is still valid with new_config, ie. only rendering keys
+        (or keys which do not change results at all) differ
+    """
+    return old_config.fingerprint == new_config.fingerprint
+
+
+def config_value(key):
+    return property(lambda self: self._values[key])
+
+
+# read-only attribute access to config values, eg. config.table_flag
+for _key in CONFIG_DEFAULTS:
+    setattr(Config, _key, config_value(_key))
+
+
+def check_config_keys(kwargs):
+    valid_kwargs = {}
+    for key, value in kwargs.items():
+        if key in CONFIG_DEFAULTS:
+            valid_kwargs[key] = value
+        else:
+            log.warning('config attributes not found: {}'.format(key))
+    return valid_kwargs
+
+
+_prepared_temp_dirs = set()
+
+
+def init_config_environment(config):
+    """
+    create temporary folder and set logging level, done once per document instead of per config copy
+    :param config: depdf config class
+    """
+    temp_dir = getattr(config, 'temp_dir_prefix')
+    if temp_dir and temp_dir not in _prepared_temp_dirs:
+        os.makedirs(temp_dir, exist_ok=True)
+        _prepared_temp_dirs.add(temp_dir)
+    logging.getLogger('depdf').setLevel(getattr(config, 'log_level'))
 
 
 DEFAULT_CONFIG = Config()
 PDF_IMAGE_KEYS = ['srcsize', 'height', 'width', 'bits']
-DEFAULT_CONFIG_KEYS = list(DEFAULT_CONFIG.to_dict.keys())
+DEFAULT_CONFIG_KEYS = list(CONFIG_DEFAULTS.keys())
 
 
 def check_config(func):
@@ -133,6 +248,14 @@ def check_config(func):
     return wrapper
 
 
+def config_fingerprint(config):
+    """
+    :param config: depdf config class
+    :return: stable hash of config values which affect extraction results
+    """
+    return config.fingerprint
+
+
 def check_config_type(config):
     if not isinstance(config, Config):
         raise ConfigTypeError(config)
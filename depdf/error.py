@@ -16,7 +16,19 @@ class PageTypeError(TypeError):
         super().__init__('DePDF page: "{}"'.format(str(value)))
 
 
+class NumericBackendError(ValueError):
+
+    def __init__(self, value):
+        super().__init__('DePDF numeric backend: "{}"'.format(value))
+
+
 class BoxValueError(ValueError):
 
     def __init__(self, value):
         super().__init__('DePDF bbox: "{}"'.format(value))
+
+
+class RenderBackendError(ValueError):
+
+    def __init__(self, value):
+        super().__init__('DePDF render backend: "{}"'.format(value))
@@ -0,0 +1,174 @@
+import csv
+import json
+import os
+
+from depdf.components import Cell, Paragraph, Span, Table
+from depdf.page import DePage
+
+
+def plain_text(obj):
+    """
+    :param obj: extracted depdf object, eg. table, cell, paragraph or mini page
+    :return: text without html markup, lines are joined with '\n' and table cells with '\t'
+    """
+    if isinstance(obj, Table):
+        return '\n'.join('\t'.join(plain_text(cell) for cell in row if cell) for row in obj.rows)
+    if isinstance(obj, Paragraph) and not hasattr(obj, 'text'):
+        text = ''
+        for i in obj.inner_objects:
+            separator = ' ' if isinstance(i, Span) else '\n'  # span continues the line of the previous object
+            text += (separator if text else '') + plain_text(i)
+        return text
+    if isinstance(obj, Cell) and not hasattr(obj, 'text'):
+        return '\n'.join(i for i in map(plain_text, obj.inner_objects) if i)
+    if isinstance(obj, DePage):
+        return '\n'.join(i for i in map(plain_text, obj.objects) if i)
+    text = getattr(obj, 'text', '')
+    return text.replace('<br>', '\n') if isinstance(obj, Cell) else text
+
+
+def number_list(bbox):
+    return [float(i) for i in bbox] if bbox else None
+
+
+def skip_table(table):
+    """
+    :return: True if the table has no text and skip_empty_table is set, same as the html rendering
+    """
+    if not getattr(table.config, 'skip_empty_table'):
+        return False
+    return not any(plain_text(cell) for row in table.rows for cell in row if cell)
+
+
+def table_record(table, page_num):
+    """
+    :param table: depdf.components.Table class
+    :param page_num: number of the pdf page, tables of mini pages have pid like '1.2'
+    :return: table dict of the export schema, None for an empty table skipped by skip_empty_table
+    """
+    if skip_table(table):
+        return None
+    spans = table.cell_spans
+    cells = []
+    for rid, row in enumerate(table.rows):
+        for cid, cell in enumerate(row):
+            if cell is None:
+                continue
+            row_span, col_span = spans[rid, cid]
+            cells.append({
+                'row': rid, 'column': cid, 'rowspan': row_span, 'colspan': col_span,
+                'bbox': number_list(cell.bbox), 'text': plain_text(cell),
+            })
+    return {
+        'type': 'table', 'page': page_num, 'pid': str(table.pid), 'tid': table.tid, 'bbox': number_list(table.bbox),
+        'rows': len(table.rows), 'columns': max([len(row) for row in table.rows] or [0]), 'cells': cells,
+    }
+
+
+def paragraph_record(paragraph, page_num):
+    """
+    :param paragraph: depdf.components.Paragraph class
+    :param page_num: number of the pdf page
+    :return: paragraph dict of the export schema
+    """
+    return {
+        'type': 'paragraph', 'page': page_num, 'pid': str(paragraph.pid), 'para_id': paragraph.para_id,
+        'bbox': number_list(paragraph.bbox), 'text': plain_text(paragraph),
+    }
+
+
+def iter_page_records(page, page_num=None):
+    """
+    :param page: depdf.page.DePage class
+    :param page_num: number of the pdf page, int(page.pid) by default
+    :return: generator of table and paragraph dicts in page order, objects of mini pages included
+    """
+    page_num = int(page.pid) if page_num is None else page_num
+    for obj in page.objects:
+        if isinstance(obj, DePage):
+            yield from iter_page_records(obj, page_num)
+        elif isinstance(obj, Table):
+            record = table_record(obj, page_num)
+            if record is not None:
+                yield record
+        elif isinstance(obj, Paragraph):
+            yield paragraph_record(obj, page_num)
+
+
+def iter_records(pdf):
+    """
+    :param pdf: depdf.pdf.DePDF class
+    :return: generator of table and paragraph dicts of the whole pdf, pages are processed one by one
+    """
+    for page in pdf.iter_pages():
+        yield from iter_page_records(page)
+
+
+def write_jsonl(pdf, fp):
+    """
+    :param pdf: depdf.pdf.DePDF class
+    :param fp: file path or writable text stream
+    :return: number of records written, one json object per line
+    """
+    if isinstance(fp, str):
+        with open(fp, 'w', encoding='utf-8') as file:
+            return write_jsonl(pdf, file)
+    count = 0
+    for record in iter_records(pdf):
+        fp.write(json.dumps(record, ensure_ascii=False))
+        fp.write('\n')
+        count += 1
+    return count
+
+
+def table_grid(table):
+    """
+    :param table: depdf.components.Table class
+    :return: rows of cell texts, positions covered by merged cells are empty strings
+    """
+    column_num = max([len(row) for row in table.rows] or [0])
+    return [
+        [plain_text(cell) if cell else '' for cell in row] + [''] * (column_num - len(row))
+        for row in table.rows
+    ]
+
+
+def write_table_csv(table, fp):
+    """
+    :param table: depdf.components.Table class
+    :param fp: file path or writable text stream
+    """
+    if isinstance(fp, str):
+        with open(fp, 'w', encoding='utf-8', newline='') as file:
+            return write_table_csv(table, file)
+    csv.writer(fp).writerows(table_grid(table))
+
+
+def iter_page_tables(page):
+    """
+    :param page: depdf.page.DePage class
+    :return: generator of the page tables, tables of mini pages included
+    """
+    for obj in page.objects:
+        if isinstance(obj, DePage):
+            yield from iter_page_tables(obj)
+        elif isinstance(obj, Table) and not skip_table(obj):
+            yield obj
+
+
+def save_tables_csv(pdf, output_dir=''):
+    """
+    :param pdf: depdf.pdf.DePDF class
+    :param output_dir: directory of the csv files, current directory by default, created if missing
+    :return: list of csv file names, one file per table named like Table.save_html
+    """
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    file_names = []
+    for page in pdf.iter_pages():
+        for table in iter_page_tables(page):
+            file_name = '{}_page_{}_table_{}.csv'.format(pdf.prefix, table.pid, table.tid)
+            file_name = os.path.join(output_dir, file_name)
+            write_table_csv(table, file_name)
+            file_names.append(file_name)
+    return file_names
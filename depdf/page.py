@@ -1,20 +1,31 @@
 import os
-from statistics import mean, median
+from statistics import median
 import uuid
 
 from pdfplumber.page import Page
+from pdfplumber.utils import decimalize, extract_words
 
 from depdf.base import Base
+from depdf.cache import PageCache, make_cache_key, pdf_digest
 from depdf.components import Paragraph, Text, Span, Image, Table, Cell
-from depdf.config import check_config, check_config_type
+from depdf.config import (
+    check_config, check_config_type, config_fingerprint, init_config_environment, is_rendering_change
+)
 from depdf.error import PageTypeError
+from depdf.stats import PageStats
+from depdf.utils import convert_object_numbers, freeze_object, get_number_type
 from depdf.page_tools import *
 
 log = logger_init(__name__)
 
 
 class DePage(Base):
-    _cached_properties = Base._cached_properties + ['_screenshot', '_objects']
+    object_type = 'page'
+    _cached_properties = Base._cached_properties + [
+        '_screenshot', '_objects', '_char_index', '_cache', '_multi_column_separator'
+    ]
+    # page attributes restored from the on-disk cache instead of processing the page
+    _cached_state_keys = ['new_para_start_flag', 'new_para_end_flag', 'toc_flag']
 
     # 一般而言 下一页的 new_para_start_flag = False 并且
     # 上一页的 new_para_end_flag = False 表示跨页面段落出现
@@ -37,6 +48,8 @@ class DePage(Base):
     h_edges = []  # 表格横线
     verbose = False
     debug = False
+    number_type = Decimal  # Decimal or float, depends on config numeric_backend
+    store = None  # columnar page chars & phrases, only with numpy and float numeric backend
     temp_dir = 'temp'
     prefix = uuid.uuid4()
     _tables = []
@@ -50,7 +63,7 @@ class DePage(Base):
     toc_flag = False
 
     @check_config
-    def __init__(self, page, pid='1', same=None, logo=None, config=None, columns=1, mini=False):
+    def __init__(self, page, pid='1', same=None, logo=None, config=None, columns=1, mini=False, image_registry=None):
         """
         :param page: pdfplumber page object
         :param pid: page number start from 1
@@ -59,6 +72,7 @@ class DePage(Base):
         :param config: depdf config
         :param columns: page column number
         :param mini: if page is mini
+        :param image_registry: document wide ImageRegistry shared by pages
         """
         check_page_type(page)
         self._page = page
@@ -67,13 +81,19 @@ class DePage(Base):
         self.mini = mini
         check_config_type(config)
         self._config = config
+        if not mini:
+            init_config_environment(config)
+        self.number_type = get_number_type(getattr(config, 'numeric_backend'))
         self.same = same if same else []
         self.same_tmp = [{k: v for k, v in i.items() if k != 'mode'} for i in self.same]
         self.logo = logo if logo else []
+        self._table_phrases, self._image_phrases = [], []
+        self._image_renders = []  # pending image render futures, joined before objects are returned
+        self.image_registry = image_registry if image_registry is not None else ImageRegistry()
+        self.stats = PageStats(pid)
         self.frame_bottom = self.width
         self.border = (0, self.width, 0, self.height)
         self.set_global()
-        self.multi_column_separator = self.check_multi_column_page()
 
     def __repr__(self):
         return '<depdf.DePage: ({}, {})>'.format(self.prefix, self.pid)
@@ -85,8 +105,19 @@ class DePage(Base):
     @config.setter
     def config(self, value):
         check_config_type(value)
-        self._config = value
-        self.refresh()
+        old_config, self._config = self._config, value
+        if is_rendering_change(old_config, value):
+            self.set_global()
+            self.rerender_children(value)  # extracted objects are kept, only their html is rendered again
+        else:
+            self.refresh()
+
+    @property
+    def render_children(self):
+        return self.__dict__.get('_objects') or []
+
+    def rerender(self, config):
+        self.config = self.config.copy(**config.rendering_values)
 
     def set_global(self):
         prefix = getattr(self.config, 'unique_prefix')
@@ -97,6 +128,7 @@ class DePage(Base):
             self.temp_dir = getattr(self.config, 'temp_dir_prefix')
         self.verbose = getattr(self.config, 'verbose_flag')
         self.debug = getattr(self.config, 'debug_flag')
+        self.number_type = get_number_type(getattr(self.config, 'numeric_backend'))
 
     def refresh(self):
         self.set_global()
@@ -123,11 +155,11 @@ class DePage(Base):
 
     @property
     def width(self):
-        return self.page.width
+        return self.number_type(self.page.width)
 
     @property
     def height(self):
-        return self.page.height
+        return self.number_type(self.page.height)
 
     def to_screenshot(self):
         res = getattr(self.config, 'resolution')
@@ -142,14 +174,80 @@ class DePage(Base):
     def chars(self):
         return self.page.chars
 
+    @property
+    def char_index(self):
+        return self._get_cached_property('_char_index', CharIndex, self.page.chars)
+
+    def crop_chars(self, bbox):
+        return self.char_index.crop(self.page.decimalize(bbox))
+
+    def within_bbox_chars(self, bbox):
+        return self.char_index.within_bbox(self.page.decimalize(bbox))
+
     @property
     def objects(self):
+        return self._get_cached_property('_objects', self.load_objects)
+
+    def load_objects(self):
+        if self.cache is not None:
+            with self.stats.stage('cache_read') as stage:
+                object_list = self.read_cache()
+                stage['hit'] = object_list is not None
+            if object_list is not None:
+                return object_list
         if self.multi_column_separator:
-            object_list = self._get_cached_property('_objects', self.process_mini_page)
+            object_list = self.process_mini_page()
         else:
-            object_list = self._get_cached_property('_objects', self.process_page)
+            object_list = self.process_page()
+        self.write_cache(object_list)
         return object_list
 
+    @property
+    def cache(self):
+        cache_dir = getattr(self.config, 'cache_dir')
+        if not cache_dir or self.mini:
+            return None
+        size_limit = getattr(self.config, 'cache_size_limit')
+        return self._get_cached_property('_cache', PageCache, cache_dir, size_limit=size_limit)
+
+    @property
+    def cache_key(self):
+        return make_cache_key(pdf_digest(self.page.pdf), 'page', self.pid, config_fingerprint(self.config))
+
+    def read_cache(self):
+        cache = self.cache
+        if cache is None:
+            return None
+        state = cache.get(self.cache_key)
+        if state is None:
+            return None
+        try:
+            # objects are rebuilt with the current config, rendering values may differ from the cached ones
+            object_list = [load_object(i, self.config) for i in state['objects']]
+            multi_column_separator = [self.number_type(i) for i in state['multi_column_separator']]
+            cached_state = {key: state[key] for key in self._cached_state_keys}
+        except (KeyError, TypeError, ValueError) as e:
+            log.warning('{0} / page-{1} invalid cache entry: {2}'.format(self.prefix, self.pid, e))
+            return None
+        if self.verbose:
+            log.info('{0} / page-{1} loaded from cache'.format(self.prefix, self.pid))
+        self._multi_column_separator = multi_column_separator
+        for key, value in cached_state.items():
+            setattr(self, key, value)
+        self._tables = [i for i in object_list if isinstance(i, Table)]
+        self._images = [i for i in object_list if isinstance(i, Image)]
+        self._paragraphs = [i for i in object_list if isinstance(i, Paragraph)]
+        return object_list
+
+    def write_cache(self, object_list):
+        cache = self.cache
+        if cache is None:
+            return
+        state = {key: getattr(self, key) for key in self._cached_state_keys}
+        state['multi_column_separator'] = self.multi_column_separator
+        state['objects'] = [dump_object(i) for i in object_list]
+        cache.set(self.cache_key, state)
+
     @property
     def paragraphs(self):
         paragraph_list = [i for i in self.objects if isinstance(i, Paragraph)]
@@ -177,21 +275,15 @@ class DePage(Base):
         return super().write_to(page_file_name)
 
     @property
-    def html(self):
-        if not self._html and hasattr(self, 'to_html'):
-            return self.to_html
-        return self._html
+    def multi_column_separator(self):
+        """
+        :return: x positions of the column separators, empty for single column pages
+        """
+        return self._get_cached_property('_multi_column_separator', self.detect_columns)
 
-    @property
-    def to_html(self):
-        page_class = getattr(self.config, 'page_class')
-        html = '<div id="page-{}" class="{}" new_para_start="{}" new_para_end="{}">'.format(
-            self.pid, page_class, self.new_para_start_flag, self.new_para_end_flag
-        )
-        for obj in self.objects:
-            html += getattr(obj, 'html', '')
-        html += '</div>'
-        return html
+    def detect_columns(self):
+        with self.stats.stage('multi_column_check'):
+            return self.check_multi_column_page()
 
     def check_multi_column_page(self):
         separator = []
@@ -201,35 +293,29 @@ class DePage(Base):
         mmc = getattr(self.config, 'max_columns')
         mcr_hw = getattr(self.config, 'column_region_half_width')
         mcr_on = getattr(self.config, 'min_column_region_objects')
-        for column_number in range(2, int(mmc) + 1):
-            column_size = self.width / column_number
-            for i in range(1, column_number):
-                s = column_size * i
-                check_bbox = (s - mcr_hw, 0, s + mcr_hw, self.height)
-                column_region = self.page.crop(check_bbox)
-                items = []
-                for k in column_region.objects:
-                    items.extend(column_region.objects[k])
-                if len(items) <= mcr_on:
-                    separator.append(s)
-            if separator:
-                if len(separator) != column_number - 1:
-                    separator = []
-                break
-        self.columns = len(separator) + 1
-        return separator
+        mcw = getattr(self.config, 'min_column_width_fraction')
+        mco = getattr(self.config, 'min_column_objects_fraction')
+        objects = [i for k in self.page.objects.values() for i in k]
+        separator = find_column_separators(objects, self.width, max_columns=int(mmc), half_width=mcr_hw,
+                                           max_objects=mcr_on, min_column_width=float(self.width) * float(mcw),
+                                           min_column_objects=float(mco), height=self.height)
+        # separators are float midpoints between object edges, rounded to 1/1000 pt for the Decimal backend
+        return [self.number_type('{:.3f}'.format(i)) for i in separator]
 
     def process_mini_page(self):
         object_list = []
         mis = getattr(self.config, 'min_image_size')
         separator_list = [0] + self.multi_column_separator + [self.width]
+        columns = len(separator_list) - 1
         for sid in range(len(separator_list) - 1):
             bbox = (separator_list[sid], 0, separator_list[sid + 1], self.height)
             mini_column = self.page.crop(bbox)
             config = self.config.copy(min_image_size=mis/len(self.multi_column_separator))
-            mini_page = MiniDePage(mini_column, pid='{}.{}'.format(self.pid, sid + 1),
-                                   config=config, columns=self.columns, mini=True)
+            mini_page = MiniDePage(mini_column, pid='{}.{}'.format(self.pid, sid + 1), config=config,
+                                   columns=columns, mini=True, image_registry=self.image_registry)
             object_list.append(mini_page)
+            self.stats.children.append(mini_page.stats)
+        self.stats.record('mini_pages', columns=len(object_list))
         return object_list
 
     def process_page(self):
@@ -238,30 +324,50 @@ class DePage(Base):
         # 预处理页面
         #  - [1] 删除重叠的字符
         overlap_size = getattr(self.config, 'char_overlap_size')
-        remove_duplicate_chars(self.page.chars, overlap_size=overlap_size)
+        with self.stats.stage('dedupe_chars') as stage:
+            chars = self.page.chars
+            stage['chars_in'] = len(chars)
+            remove_duplicate_chars(chars, overlap_size=overlap_size)
+            stage['chars_out'] = len(chars)
 
         # 分析页面的字符元素
         #  - [2] 分析页面内字符的基本信息
-        self.analyze_page_attributes()
+        with self.stats.stage('page_attributes', chars=len(self.page.chars)):
+            self.analyze_page_attributes()
         #  - [3] 分析页面的正文主要区域
-        self.analyze_main_frame()
+        with self.stats.stage('main_frame'):
+            self.analyze_main_frame()
         #  - [4] 分析页面内的短语和行
-        self.extract_phrases()
+        with self.stats.stage('phrases') as stage:
+            self.extract_phrases()
+            stage['phrases'] = len(self.phrases)
 
         # 解析页面内的 objects[表格 + 段落]
         #  - [5] 分析页面内的线段
         if getattr(self.config, 'table_flag'):
-            self.analyze_lines()
+            with self.stats.stage('lines'):
+                self.analyze_lines()
         #  - [6] 获取页面内表格
-            self.extract_tables()
+            with self.stats.stage('tables') as stage:
+                self.extract_tables()
+                stage.update(tables_raw=len(self._tables_raw), tables=len(self._tables))
         #  - [7] 获取页面内图像
         if getattr(self.config, 'image_flag'):
-            self.extract_images()
+            with self.stats.stage('images') as stage:
+                self.extract_images()
+                stage.update(figures=len(self._images_raw), images=len(self._images),
+                             renders=len(self._image_renders))
         if getattr(self.config, 'paragraph_flag'):
             #  - [8] 分析页面段落边界
-            self.analyze_paragraph_border()
+            with self.stats.stage('paragraph_border'):
+                self.analyze_paragraph_border()
             #  - [9] 获取页面内的段落
-            self.extract_paragraph()
+            with self.stats.stage('paragraphs') as stage:
+                self.extract_paragraph()
+                stage['paragraphs'] = len(self._paragraphs)
+        #  - [10] 等待页面内图像渲染完成
+        with self.stats.stage('image_renders'):
+            self.join_image_renders()
 
         # 集合页面内的所有 objects
         object_list = []
@@ -285,25 +391,27 @@ class DePage(Base):
         dcs = getattr(self.config, 'default_char_size')
         csu = getattr(self.config, 'char_size_upper')
         csl = getattr(self.config, 'char_size_lower')
-        self.ave_cs, self.min_cs = analyze_char_size(self.page.chars, char_size_upper=csu,
-                                                     char_size_lower=csl, default_char_size=dcs)
+        self.store = create_page_store(self.page.chars, number_type=self.number_type)
+        self.ave_cs, self.min_cs = analyze_char_size(self.page.chars, char_size_upper=csu, char_size_lower=csl,
+                                                     default_char_size=dcs, number_type=self.number_type,
+                                                     store=self.store)
         self.orientation = analyze_page_orientation(self.page)
         y_tolerance = 3 if self.ave_cs / 3 <= 3 else self.ave_cs / 2
         cyt = getattr(self.config, 'y_tolerance')
-        self.y_tolerance = Decimal(cyt) if cyt is not None else y_tolerance
+        self.y_tolerance = self.number_type(cyt) if cyt is not None else y_tolerance
         cxt = getattr(self.config, 'x_tolerance')
-        self.x_tolerance = Decimal(cxt) if cxt is not None else self.ave_cs * 3 / 2
+        self.x_tolerance = self.number_type(cxt) if cxt is not None else self.ave_cs * 3 / 2
 
     def analyze_main_frame(self):
         original_keys = ['x0', 'top', 'x1', 'bottom', 'text']
-        same_head_original = [
-            {k: i[k] for k in i if k in original_keys}
+        same_head_original = {
+            freeze_object({k: i[k] for k in i if k in original_keys})
             for i in self.same if i['mode'] == self.orientation and i['level'] == 'head'
-        ]
-        same_tail_original = [
-            {k: i[k] for k in i if k in original_keys}
+        }
+        same_tail_original = {
+            freeze_object({k: i[k] for k in i if k in original_keys})
             for i in self.same if i['mode'] == self.orientation and i['level'] == 'tail'
-        ]
+        }
         # top_line's bottom
         tls = [i['bottom'] for i in self.same if i['mode'] == self.orientation and i['level'] == 'head']
         # bottom_line's tops
@@ -311,54 +419,60 @@ class DePage(Base):
         main_top, main_bottom = 0, self.height
         if tls:
             main_top = max_tls = max(tls)
-            head_words = self.page.within_bbox((0, 0, self.width, max_tls)).extract_words()
+            head_words = [
+                convert_object_numbers(w, self.number_type)
+                for w in extract_words(self.within_bbox_chars((0, 0, self.width, max_tls)))
+            ]
             if not head_words:
                 main_top = 0
             for h_w in head_words:
-                if h_w not in same_head_original:
+                if freeze_object(h_w) not in same_head_original:
                     main_top = 0
                     break
         if bls:
             main_bottom = min_bls = min(bls)
-            tail_words = self.page.within_bbox((0, min_bls, self.width, self.height)).extract_words()
+            tail_words = [
+                convert_object_numbers(w, self.number_type)
+                for w in extract_words(self.within_bbox_chars((0, min_bls, self.width, self.height)))
+            ]
             if not tail_words:
                 main_bottom = self.height
             for t_w in tail_words:
-                if t_w not in same_tail_original:
+                if freeze_object(t_w) not in same_tail_original:
                     main_bottom = self.height
                     break
         mft = getattr(self.config, 'main_frame_tolerance')
         if mft is None:
-            mft = Decimal(self.ave_cs / 4)
+            mft = self.number_type(self.ave_cs / 4)
         self.frame_top, self.frame_bottom = main_top + mft, main_bottom
         return main_top, main_bottom
 
     def extract_phrases(self):
         phrases = [
-            i for i in self.page.extract_words(x_tolerance=self.x_tolerance,
-                                               y_tolerance=self.y_tolerance,
-                                               keep_blank_chars=True)
+            convert_object_numbers(i, self.number_type)
+            for i in self.page.extract_words(x_tolerance=self.x_tolerance,
+                                             y_tolerance=self.y_tolerance,
+                                             keep_blank_chars=True)
             if 'top' in i and i['top'] >= self.frame_top and 'bottom' in i and i['bottom'] <= self.frame_bottom
         ]
         self.phrases = phrases
-        line_heights = list(
-            filter(lambda x: x > 0, [phrases[i + 1]['top'] - phrases[i]['bottom'] for i in range(len(phrases) - 1)])
-        )
+        if self.store is not None:
+            self.store.load_phrases(phrases)
         # 平均行高
-        self.ave_lh = mean(line_heights) if line_heights else self.ave_cs / 2
+        self.ave_lh = analyze_line_height(phrases, self.ave_cs / 2, store=self.store)
         # 页面底部的页码行
-        pn_tf = getattr(self.config, 'page_num_top_fraction')
-        pn_lf = getattr(self.config, 'page_num_left_fraction')
-        pn_rf = getattr(self.config, 'page_num_right_fraction')
+        pn_tf = self.number_type(getattr(self.config, 'page_num_top_fraction'))
+        pn_lf = self.number_type(getattr(self.config, 'page_num_left_fraction'))
+        pn_rf = self.number_type(getattr(self.config, 'page_num_right_fraction'))
         self.pagination_phrases = analyze_page_num_word(phrases, self.height, self.width, top_fraction=pn_tf,
                                                         left_fraction=pn_lf, right_fraction=pn_rf)
         # normalize page word boundary (EN/NUM chars are taller and slimmer than CN chars)
         for w in self.phrases:
             try:
                 bbox = (w['x0'], w['top'], w['x1'], w['bottom'])
-                c = self.page.crop(bbox)
-                top = median([j['top'] for j in c.chars])
-                bottom = median([j['bottom'] for j in c.chars])
+                chars = self.crop_chars(bbox)
+                top = median([self.number_type(j['top']) for j in chars])
+                bottom = median([self.number_type(j['bottom']) for j in chars])
                 w['top'], w['bottom'] = top, bottom
             except:
                 pass
@@ -369,25 +483,26 @@ class DePage(Base):
             page_image.save(img_file, format='png')
 
     def analyze_lines(self):
-        rect_edges_raw = self.page.edges
+        rect_edges_raw = [convert_object_numbers(i, self.number_type) for i in self.page.edges]
         h_lines, v_lines = edges_to_lines(rect_edges_raw)
 
         # 去除特别细的单线（干扰线）
-        v_dlt = getattr(self.config, 'vertical_double_line_tolerance')
-        max_dlt = getattr(self.config, 'max_double_line_tolerance')
-        min_dlt = getattr(self.config, 'min_double_line_tolerance')
+        v_dlt = self.number_type(getattr(self.config, 'vertical_double_line_tolerance'))
+        max_dlt = self.number_type(getattr(self.config, 'max_double_line_tolerance'))
+        min_dlt = self.number_type(getattr(self.config, 'min_double_line_tolerance'))
         h_lines = remove_single_lines(h_lines, max_double=max_dlt, min_double=min_dlt, vertical_double=v_dlt)
         v_lines = remove_single_lines(v_lines, max_double=max_dlt, min_double=min_dlt, vertical_double=v_dlt, m='v')
 
         # 有些时候表格会隐藏在 pdf_page.lines 中，比如虚线
         if getattr(self.config, 'dotted_line_flag'):
-            page_lines = self.page.lines
+            page_lines = [convert_object_numbers(i, self.number_type) for i in self.page.lines]
             h_lines.extend([i for i in page_lines if i['height'] == 0])
             v_lines.extend([i for i in page_lines if i['width'] == 0])
 
         # 有些表格的边框是曲线
         curved_line_flag = getattr(self.config, 'curved_line_flag')
         page_curves = self.page.curves if curved_line_flag else []
+        page_curves = [convert_object_numbers(i, self.number_type) for i in page_curves]
         h_curves, v_curves = curve_to_lines(page_curves)
         h_lines.extend(h_curves)
         v_lines.extend(v_curves)
@@ -400,14 +515,18 @@ class DePage(Base):
 
         # 增加顶部和底部的横线
         add_hlf = getattr(self.config, 'add_horizontal_lines_flag')
-        vlts_tolerance = getattr(self.config, 'add_horizontal_line_tolerance')
+        vlts_tolerance = self.number_type(getattr(self.config, 'add_horizontal_line_tolerance'))
         if add_hlf:
             h_lines_add = add_horizontal_lines(v_lines, h_lines, vlts_tolerance=vlts_tolerance)
             h_lines.extend(h_lines_add)
 
         # 设定页面的横竖线列表
+        self.stats.record('lines', edges_raw=len(rect_edges_raw), h_lines=len(h_lines), v_lines=len(v_lines))
         self.h_edges = [{'top': i['top'], 'x0': i['x0'], 'x1': i['x1']} for i in h_lines]
         self.v_edges = [{'x': i['x0'], 'top': i['top'], 'bottom': i['bottom']} for i in v_lines]
+        if self.number_type is not Decimal:  # the pdfplumber table finder calculates in Decimal
+            self.h_edges = [{k: decimalize(v) for k, v in i.items()} for i in self.h_edges]
+            self.v_edges = [{k: decimalize(v) for k, v in i.items()} for i in self.v_edges]
 
         if self.debug:
             page_image = self.screenshot
@@ -425,9 +544,9 @@ class DePage(Base):
             'horizontal_strategy': 'explicit',
             'explicit_vertical_lines': self.v_edges,
             'explicit_horizontal_lines': self.h_edges,
-            'edge_min_length': self.ave_cs,
-            'join_tolerance': self.ave_cs,
-            'intersection_tolerance': self.ave_cs,
+            'edge_min_length': decimalize(self.ave_cs),
+            'join_tolerance': decimalize(self.ave_cs),
+            'intersection_tolerance': decimalize(self.ave_cs),
         }
         try:
             tables_raw = sorted(self.page.find_tables(table_settings=table_params), key=lambda x: x.bbox[1])
@@ -441,7 +560,8 @@ class DePage(Base):
             img_file = os.path.join(self.temp_dir, self.prefix + '_table_cell_border_{0}.png'.format(self.pid))
             page_image.save(img_file, format='png')
         table_clean = [
-            convert_plumber_table(self.page, table, pid=self.pid, tid=tid + 1, config=self.config, min_cs=self.min_cs)
+            convert_plumber_table(self.page, table, pid=self.pid, tid=tid + 1, config=self.config,
+                                  min_cs=self.min_cs, image_registry=self.image_registry)
             for tid, table in enumerate(tables_raw)
         ]
         self._tables = [i for i in table_clean if i is not None]
@@ -457,16 +577,26 @@ class DePage(Base):
 
         mis = getattr(self.config, 'min_image_size')
         res = getattr(self.config, 'image_resolution')
+        max_renders = getattr(self.config, 'max_concurrent_renders')
+        executor = get_render_executor(max_renders) if max_renders and max_renders > 1 else None
+        dedupe = getattr(self.config, 'image_dedupe_flag')
         images = []
         for fid, i in enumerate(images_raw):
             if i['height'] <= mis or i['width'] <= mis:
                 continue
-            img_file = os.path.join(self.temp_dir, self.prefix + '_{0}_image_{1}.png'.format(self.pid, fid + 1))
-            bbox = (i['x0'], i['top'], i['x1'], i['bottom'])
-            image = self.page.within_bbox(bbox)
-            pic = image.to_image(resolution=res)
-            pic.save(img_file, format='png')
-            scan = i['width'] * i['height'] / self.width / self.height >= 0.7
+            bbox = tuple(self.number_type(i[k]) for k in ('x0', 'top', 'x1', 'bottom'))
+            signature = image_signature(i, bbox, res) if dedupe else None
+            if signature:
+                img_file = os.path.join(self.temp_dir, self.prefix + '_image_{0}.png'.format(signature[:16]))
+                render_flag = self.image_registry.claim(img_file)
+            else:
+                img_file = os.path.join(self.temp_dir, self.prefix + '_{0}_image_{1}.png'.format(self.pid, fid + 1))
+                render_flag = True
+            if render_flag and executor is None:
+                render_image(self.page.within_bbox(bbox), img_file, res)
+            elif render_flag:
+                self._image_renders.append(executor.submit(render_image, self.page.within_bbox(bbox), img_file, res))
+            scan = self.number_type(i['width']) * self.number_type(i['height']) / self.width / self.height >= 0.7
             percent = round((bbox[2] - bbox[0]) * self.columns / self.width * 100)
             image = Image(bbox=bbox, percent=percent, src=img_file, pid=self.pid,
                           img_idx=fid + 1, config=self.config, scan=scan)
@@ -480,12 +610,20 @@ class DePage(Base):
         image_words = []
         for image in images_raw:
             try:
-                image_area = self.page.within_bbox(image['bbox'])
-                image_words.extend(image_area.extract_words(x_tolerance=self.ave_cs * 3 / 2, keep_blank_chars=True))
+                image_chars = self.within_bbox_chars(image['bbox'])
+                image_words.extend(
+                    convert_object_numbers(w, self.number_type)
+                    for w in extract_words(image_chars, x_tolerance=self.ave_cs * 3 / 2, keep_blank_chars=True)
+                )
             except:
                 pass
         self._image_phrases = image_words
 
+    def join_image_renders(self):
+        image_renders, self._image_renders = self._image_renders, []
+        for future in image_renders:
+            future.result()
+
     def analyze_paragraph_border(self):
         border = calculate_paragraph_border(self)
         self.border = border
@@ -505,9 +643,13 @@ class DePage(Base):
         ave_lh, page_width = self.ave_lh, self.width
         div_flag = center_flag = right_flag = False
         para_style = {}
+        excluded_keys = {
+            freeze_object(i)
+            for phrases in (self.same_tmp, self._image_phrases, self._table_phrases, self.pagination_phrases)
+            for i in phrases
+        }
         for i in self.phrases:
-            if i in self.same_tmp or i in self._image_phrases or \
-               i in self._table_phrases or i in self.pagination_phrases:
+            if freeze_object(i) in excluded_keys:
                 continue
 
             new_line_flag, new_para_flag = True, False
@@ -570,7 +712,7 @@ class DePage(Base):
                         para_style.update({'align': 'right'})
 
             if new_line_flag:
-                paragraph_objects.append(Text(bbox=bbox, text=text))
+                paragraph_objects.append(Text(bbox=bbox, text=text, config=self.config))
             else:
                 span_style = {'margin-left': '{0}px'.format(round(left - p_left))}
                 paragraph_objects.append(Span(bbox=bbox, span_text=text, config=self.config, style=span_style))
@@ -609,27 +751,144 @@ class DePage(Base):
 
 
 class MiniDePage(DePage):
+    object_type = 'mini_page'
 
     def save_html(self):
         mini_page_file_name = '{}_mini_page_{}.html'.format(self.prefix, self.pid)
         return super().write_to(mini_page_file_name)
 
     @property
-    def to_html(self):
-        mini_page_class = getattr(self.config, 'mini_page_class')
-        html = '<div id="mini-page-{}" class="{}" new_para_start="{}" new_para_end="{}">'.format(
-            self.pid, mini_page_class, self.new_para_start_flag, self.new_para_end_flag
-        )
-        for obj in self.objects:
-            html += getattr(obj, 'html', '')
-        html += '</div>'
-        return html
+    def page(self):
+        if self._page is None:
+            raise AttributeError('{} is restored from the page cache without its pdfplumber page'.format(self))
+        return self._page
+
+    @page.setter
+    def page(self, value):
+        DePage.page.fset(self, value)
+
+    @property
+    def bbox(self):
+        """
+        :return: (x0, top, x1, bottom) of the column on the pdf page
+        """
+        if self._page is None:
+            return self._bbox
+        return tuple(self.number_type(i) for i in self._page.bbox)
+
+    @property
+    def width(self):
+        if self._page is None:
+            return self._width
+        return self.number_type(self._page.width)
+
+    @property
+    def height(self):
+        if self._page is None:
+            return self._height
+        return self.number_type(self._page.height)
+
+    @classmethod
+    def restore(cls, pid, objects, config, size, columns=1, new_para_start_flag=None, new_para_end_flag=None):
+        """
+        :param size: (bbox, width, height) of the column on the pdf page
+        :return: processed mini page without the pdfplumber page, eg. loaded from the page cache
+        """
+        mini_page = cls.__new__(cls)
+        mini_page._page = None
+        mini_page._pid = pid
+        mini_page._config = config
+        mini_page.columns = columns
+        mini_page.mini = True
+        mini_page.same, mini_page.same_tmp, mini_page.logo = [], [], []
+        mini_page._image_renders = []
+        mini_page.image_registry = None
+        mini_page.stats = PageStats(pid)
+        mini_page.set_global()
+        bbox, width, height = size
+        mini_page._bbox = tuple(mini_page.number_type(i) for i in bbox)
+        mini_page._width, mini_page._height = mini_page.number_type(width), mini_page.number_type(height)
+        mini_page._multi_column_separator = []
+        mini_page._objects = objects
+        mini_page.new_para_start_flag = new_para_start_flag
+        mini_page.new_para_end_flag = new_para_end_flag
+        return mini_page
+
+
+def dump_object(obj):
+    """
+    :param obj: processed depdf object, eg. Paragraph, Table or MiniDePage
+    :return: plain dict of the object, see load_object
+    """
+    record = {'type': obj.object_type}
+    if obj.object_type == 'mini_page':
+        objects = [dump_object(i) for i in obj.objects]  # paragraph flags are set while processing the mini page
+        record.update(pid=obj.pid, bbox=list(obj.bbox), width=obj.width, height=obj.height, columns=obj.columns,
+                      new_para_start_flag=obj.new_para_start_flag, new_para_end_flag=obj.new_para_end_flag,
+                      objects=objects)
+        return record
+    record['bbox'] = list(obj.bbox)
+    if obj.object_type == 'table':
+        record.update(pid=obj.pid, tid=obj.tid,
+                      rows=[[dump_object(cell) if cell else cell for cell in row] for row in obj.rows])
+    elif obj.object_type == 'image':
+        record.update(src=obj.src, percent=obj.percent, pid=obj.pid, img_idx=obj.img_idx, scan=obj.scan)
+    elif obj.object_type == 'span':
+        record.update(text=obj.text, style=obj.style)
+    elif obj.object_type == 'paragraph':
+        record.update(pid=obj.pid, para_idx=obj.para_id, style=obj.style, align=obj.align)
+    elif obj.object_type == 'text':
+        record['text'] = obj.text
+    if obj.object_type in ('paragraph', 'cell'):
+        if hasattr(obj, 'text'):
+            record['text'] = obj.text
+        else:
+            record['inner_objects'] = [dump_object(i) for i in obj.inner_objects or []]
+    return record
+
+
+def load_object(record, config):
+    """
+    :param record: dict of dump_object
+    :param config: depdf config of the restored objects
+    :return: depdf object
+    """
+    object_type = record['type']
+    if object_type == 'mini_page':
+        objects = [load_object(i, config) for i in record['objects']]
+        size = record['bbox'], record['width'], record['height']
+        return MiniDePage.restore(record['pid'], objects, config, size, columns=record['columns'],
+                                  new_para_start_flag=record['new_para_start_flag'],
+                                  new_para_end_flag=record['new_para_end_flag'])
+    inner_objects = [load_object(i, config) for i in record.get('inner_objects', [])]
+    if object_type == 'table':
+        rows = [[load_object(cell, config) if cell else cell for cell in row] for row in record['rows']]
+        return Table(rows, pid=record['pid'], tid=record['tid'], config=config, bbox=record['bbox'])
+    if object_type == 'image':
+        return Image(bbox=record['bbox'], src=record['src'], percent=record['percent'], pid=record['pid'],
+                     img_idx=record['img_idx'], scan=record['scan'], config=config)
+    if object_type == 'span':
+        return Span(bbox=record['bbox'], span_text=record['text'], config=config, style=record['style'])
+    if object_type == 'text':
+        return Text(bbox=record['bbox'], text=record['text'], config=config)
+    if object_type == 'paragraph':
+        return Paragraph(bbox=record['bbox'], text=record.get('text', ''), pid=record['pid'],
+                         para_idx=record['para_idx'], config=config, inner_objects=inner_objects,
+                         style=record['style'], align=record['align'])
+    if object_type == 'cell':
+        return Cell(bbox=record['bbox'], text=record.get('text', ''), inner_objects=inner_objects, config=config)
+    raise ValueError('unknown cached object type: {}'.format(object_type))
 
 
 @check_config
-def convert_plumber_table(pdf_page, table, pid='1', tid=1, config=None, min_cs=1):
+def convert_plumber_table(pdf_page, table, pid='1', tid=1, config=None, min_cs=1, image_registry=None):
     if table is None:
         return None
+    cells = [
+        cell for row in table.rows for cell in row.cells
+        if cell and cell[2] - cell[0] >= min_cs and cell[3] - cell[1] >= min_cs
+    ]
+    cell_objects = CellIndex(cells).assign(pdf_page.objects) if cells else []  # objects of every cell in one sweep
     cid, table_rows = 0, []
     for row in table.rows:
         table_row = []
@@ -643,18 +902,13 @@ def convert_plumber_table(pdf_page, table, pid='1', tid=1, config=None, min_cs=1
             c_h = cell[3] - cell[1]
             if c_w < min_cs or c_h < min_cs:
                 continue
-            cell_region = pdf_page.filter(
-                lambda x: 'top' in x and 'bottom' in x and 'x0' in x and 'x1' in x and
-                          x['top'] >= cell[1] - (x['bottom'] - x['top']) / 2 and
-                          x['bottom'] <= cell[3] + (x['bottom'] - x['top']) / 2 and
-                          x['x0'] >= cell[0] - (x['x1'] - x['x0']) / 2 and
-                          x['x1'] <= cell[2] + (x['x1'] - x['x0']) / 2
-            )
+            cell_region = CellRegionPage(pdf_page, cell_objects[cid])
             cid += 1
             text = cell_region.extract_text()
             bbox = (cell[0], cell[1], cell[2], cell[3])
             table_row_dict.append({'width': c_w, 'height': c_h, 'text': text})
-            cell_obj = extract_cell_region(cell_region, bbox, config=config, pid=pid, tid=tid, cid=cid)
+            cell_obj = extract_cell_region(cell_region, bbox, config=config, pid=pid, tid=tid, cid=cid,
+                                           image_registry=image_registry, text=text)
             table_row.append(cell_obj)
         if table_row_dict and not all(v is None for v in table_row_dict):
             table_rows.append(table_row)
@@ -662,17 +916,21 @@ def convert_plumber_table(pdf_page, table, pid='1', tid=1, config=None, min_cs=1
 
 
 @check_config
-def extract_cell_region(cell_region, bbox, config=None, pid='1', tid=1, cid=1):
-    if cell_region.images or cell_region.figures or cell_region.extract_tables():
+def extract_cell_region(cell_region, bbox, config=None, pid='1', tid=1, cid=1, image_registry=None, text=None):
+    """
+    :param text: cell_region.extract_text() if already extracted
+    """
+    if cell_region.images or cell_region.figures or (
+            may_contain_table(cell_region) and cell_region.extract_tables()):
         config = config.copy(min_image_size=0)
         mini_pid = '{}.{}.{}'.format(pid, tid, cid)
-        mini_page = MiniDePage(cell_region, pid=mini_pid, config=config, mini=True)
-        cell = Cell(bbox=bbox, inner_objects=[mini_page])
+        mini_page = MiniDePage(cell_region, pid=mini_pid, config=config, mini=True, image_registry=image_registry)
+        cell = Cell(bbox=bbox, inner_objects=[mini_page], config=config)
     else:
-        text = cell_region.extract_text()
+        text = cell_region.extract_text() if text is None else text
         text = text.strip().replace('\n', '<br>') if text else ''
         text = '……' if text == '„„' else text
-        cell = Cell(bbox=bbox, text=text)
+        cell = Cell(bbox=bbox, text=text, config=config)
     return cell
 
 
@@ -1,10 +1,26 @@
-from collections import Counter
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
+from itertools import product
+import hashlib
+from math import floor
+import os
 import re
+from statistics import mean
+import threading
+
+from pdfplumber.page import DerivedPage
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, page statistics fall back to pure python
+    np = None
 
 from depdf.config import PDF_IMAGE_KEYS
 from depdf.log import logger_init
-from depdf.utils import calc_overlap
+from depdf.settings import DEFAULT_CELL_INDEX_CELL_SIZE, DEFAULT_CHAR_INDEX_CELL_SIZE
+from depdf.utils import calc_overlap, freeze_object
 
 log = logger_init(__name__)
 PAGE_PORTRAIT = 'portrait'
@@ -19,44 +35,308 @@ TOC_SYMBOLS = '.…·'  # add to toc symbol list if new separator is found
 TOC_OCCURRENCE = '+'
 TOC_LINE_RE = re.compile(r"^(.*?)[{}]{}[-－]*[0-9]+[-－]*$".format(TOC_SYMBOLS, TOC_OCCURRENCE))
 
+RULING_OBJECT_TYPES = ('line', 'rect', 'curve')
+
+
+def obj_inside_bbox_score(obj, bbox):
+    """
+    :param obj: pdfplumber page object
+    :param bbox: decimalized bbox
+    :return: number of the object corners inside the bbox, 0 to 4
+    """
+    x0, top, x1, bottom = bbox
+    inside_x = [x0 <= x <= x1 for x in (obj['x0'], obj['x1'])]
+    inside_y = [top <= y <= bottom for y in (obj['top'], obj['bottom'])]
+    return sum(x and y for x in inside_x for y in inside_y)
+
+
+def clip_obj(obj, bbox, score):
+    """
+    :param obj: pdfplumber page object
+    :param bbox: decimalized bbox
+    :param score: obj_inside_bbox_score of the object
+    :return: the object if it lies within the bbox, otherwise a copy clipped to the bbox, as pdfplumber's crop
+    """
+    if score == 4:
+        return obj
+    x0, top, x1, bottom = bbox
+    clipped = dict(obj)
+    x_changed = y_changed = False
+    if clipped['x0'] < x0:
+        clipped['x0'], x_changed = x0, True
+    if clipped['x1'] > x1:
+        clipped['x1'], x_changed = x1, True
+    if clipped['top'] < top:
+        diff = top - clipped['top']
+        clipped['top'], clipped['doctop'], clipped['y1'] = top, clipped['doctop'] + diff, clipped['y1'] - diff
+        y_changed = True
+    if clipped['bottom'] > bottom:
+        diff = bottom - clipped['bottom']
+        clipped['bottom'], clipped['y0'] = bottom, clipped['y0'] + diff
+        y_changed = True
+    if x_changed:
+        clipped['width'] = clipped['x1'] - clipped['x0']
+    if y_changed:
+        clipped['height'] = clipped['bottom'] - clipped['top']
+    return clipped
+
+
+class CharIndex(object):
+    """
+    Uniform grid over page chars, built once per page.
+    Region lookups only visit the grid cells covered by the bbox and return
+    the same chars (in page order) as pdfplumber's crop / within_bbox.
+    """
+
+    def __init__(self, chars, cell_size=DEFAULT_CHAR_INDEX_CELL_SIZE):
+        self.chars = chars
+        self.cell_size = cell_size
+        self.grid = defaultdict(list)
+        for idx, char in enumerate(chars):
+            for key in self.cell_keys((char['x0'], char['top'], char['x1'], char['bottom'])):
+                self.grid[key].append(idx)
+
+    def cell_keys(self, bbox):
+        x0, top, x1, bottom = [floor(float(i) / self.cell_size) for i in bbox]
+        return product(range(min(x0, x1), max(x0, x1) + 1), range(min(top, bottom), max(top, bottom) + 1))
+
+    def candidates(self, bbox):
+        char_ids = set()
+        for key in self.cell_keys(bbox):
+            char_ids.update(self.grid.get(key, []))
+        return [self.chars[i] for i in sorted(char_ids)]
+
+    def crop(self, bbox):
+        """
+        :param bbox: decimalized bbox
+        :return: chars overlapping the bbox and clipped to it, same as page.crop(bbox).chars
+        """
+        cropped = []
+        for char in self.candidates(bbox):
+            score = obj_inside_bbox_score(char, bbox)
+            if score > 0:
+                cropped.append(clip_obj(char, bbox, score))
+        return cropped
+
+    def within_bbox(self, bbox):
+        """
+        :param bbox: decimalized bbox
+        :return: chars fully within the bbox, same as page.within_bbox(bbox).chars
+        """
+        return [char for char in self.candidates(bbox) if obj_inside_bbox_score(char, bbox) == 4]
+
+
+def cell_contains(cell, obj):
+    """
+    :param cell: table cell bbox (x0, top, x1, bottom)
+    :param obj: pdfplumber page object
+    :return: whether the object (by its center point) lies in the cell
+    """
+    return 'top' in obj and 'bottom' in obj and 'x0' in obj and 'x1' in obj and \
+        obj['top'] >= cell[1] - (obj['bottom'] - obj['top']) / 2 and \
+        obj['bottom'] <= cell[3] + (obj['bottom'] - obj['top']) / 2 and \
+        obj['x0'] >= cell[0] - (obj['x1'] - obj['x0']) / 2 and \
+        obj['x1'] <= cell[2] + (obj['x1'] - obj['x0']) / 2
+
+
+class CellIndex(object):
+    """
+    Uniform grid over the cells of a table, every page object is assigned to
+    the cells containing its center point in a single sweep, instead of
+    filtering all page objects once per cell.
+    """
+
+    def __init__(self, cells, cell_size=DEFAULT_CELL_INDEX_CELL_SIZE):
+        self.cells = cells
+        self.cell_size = cell_size
+        self.grid = defaultdict(list)
+        for idx, cell in enumerate(cells):
+            x0, top, x1, bottom = [floor(float(i) / cell_size) for i in cell]
+            for key in product(range(x0, x1 + 1), range(top, bottom + 1)):
+                self.grid[key].append(idx)
+
+    def assign(self, objects):
+        """
+        :param objects: pdfplumber page objects dict, object kind => list of objects
+        :return: objects dict of every cell, same as page.filter(lambda x: cell_contains(cell, x)).objects
+        """
+        cell_objects = [{kind: [] for kind in objects} for _ in self.cells]
+        for kind, kind_objects in objects.items():
+            for obj in kind_objects:
+                if 'top' not in obj or 'bottom' not in obj or 'x0' not in obj or 'x1' not in obj:
+                    continue
+                key = (floor(float((obj['x0'] + obj['x1']) / 2) / self.cell_size),
+                       floor(float((obj['top'] + obj['bottom']) / 2) / self.cell_size))
+                for idx in self.grid.get(key, []):
+                    if cell_contains(self.cells[idx], obj):
+                        cell_objects[idx][kind].append(obj)
+        return cell_objects
+
+
+class CellRegionPage(DerivedPage):
+    """
+    Derived pdfplumber page of a table cell with pre-assigned objects, see CellIndex.
+    """
+
+    def __init__(self, parent_page, objects):
+        super().__init__(parent_page)
+        self.bbox = parent_page.bbox
+        self._cell_objects = objects
+
+    @property
+    def objects(self):
+        return self._cell_objects
+
+
+def may_contain_table(pdf_page):
+    """
+    Cheap necessary condition of pdf_page.extract_tables() (default table settings) finding any table:
+    a table cell needs at least two horizontal and two vertical edges at distinct positions,
+    snapping and joining edges in the table finder can only reduce the number of positions.
+    :param pdf_page: pdfplumber page
+    :return: False if the page certainly contains no table
+    """
+    if not pdf_page.rects and len(pdf_page.lines) < 4:
+        return False
+    h_tops, v_xs = set(), set()
+    for edge in pdf_page.edges:
+        if edge['orientation'] == 'h':
+            h_tops.add(edge['top'])
+        else:
+            v_xs.add(edge['x0'])
+    return len(h_tops) >= 2 and len(v_xs) >= 2
+
+
+class PageStore(object):
+    """
+    Columnar float arrays of page chars and phrases, loaded once per page,
+    so that page statistics run as vectorized numpy operations.
+    """
+    char_keys = ['x0', 'x1', 'top', 'bottom', 'size', 'adv', 'width']
+    phrase_keys = ['x0', 'x1', 'top', 'bottom']
+
+    def __init__(self, chars=None):
+        self.chars = self.columnize(chars or [], self.char_keys)
+        self.phrases = self.columnize([], self.phrase_keys)
+
+    def load_phrases(self, phrases):
+        self.phrases = self.columnize(phrases, self.phrase_keys)
+
+    @staticmethod
+    def columnize(objects, keys):
+        return {k: np.fromiter((float(i[k]) for i in objects), dtype=float, count=len(objects)) for k in keys}
+
+
+def create_page_store(chars, number_type=Decimal):
+    """
+    :param chars: page chars
+    :param number_type: Decimal or float
+    :return: PageStore if numpy is installed and float numeric backend is used, otherwise None
+    """
+    if np is None or number_type is not float:
+        return None
+    return PageStore(chars)
+
 
 def remove_duplicate_chars(chars, overlap_size=3):
     # 去除通过叠加字符来实现加粗的多余字符
-    delete_index_list = []
-    for char_index, char in enumerate(chars):
-        for i in reversed(range(char_index)):
-            tmp_char = chars[i]
-            if abs(tmp_char['x0'] - char['x0']) < overlap_size and \
-                    abs(tmp_char['y0'] - char['y0']) < overlap_size and \
-                    abs(tmp_char['x1'] - char['x1']) < overlap_size and \
-                    abs(tmp_char['y1'] - char['y1']) < overlap_size and \
-                    tmp_char['text'] == char['text']:
-                delete_index_list.append(char_index)
+    # chars are bucketed by text and quantized (x0, y0), so only neighbouring buckets are compared
+    if overlap_size <= 0:
+        return []
+    bucket_size = float(overlap_size)
+    buckets = defaultdict(list)
+    kept_chars, deleted_chars = [], []
+    for char in chars:
+        qx, qy = floor(float(char['x0']) / bucket_size), floor(float(char['y0']) / bucket_size)
+        duplicate = False
+        for dx, dy in product((-1, 0, 1), (-1, 0, 1)):
+            for tmp_char in buckets.get((char['text'], qx + dx, qy + dy), []):
+                if abs(tmp_char['x0'] - char['x0']) < overlap_size and \
+                        abs(tmp_char['y0'] - char['y0']) < overlap_size and \
+                        abs(tmp_char['x1'] - char['x1']) < overlap_size and \
+                        abs(tmp_char['y1'] - char['y1']) < overlap_size:
+                    duplicate = True
+                    break
+            if duplicate:
                 break
-    deleted_chars = []
-    deleted_count = 0
-    for each_delete_index in delete_index_list:
-        deleted_chars.append(chars[each_delete_index - deleted_count])
-        del chars[each_delete_index - deleted_count]
-        deleted_count += 1
+        buckets[(char['text'], qx, qy)].append(char)
+        if duplicate:
+            deleted_chars.append(char)
+        else:
+            kept_chars.append(char)
+    chars[:] = kept_chars
     return deleted_chars
 
 
-def analyze_char_size(chars, char_size_upper=30, char_size_lower=3, default_char_size=12):
+def analyze_char_size(chars, char_size_upper=30, char_size_lower=3, default_char_size=12, number_type=Decimal,
+                      store=None):
+    dcs = number_type(default_char_size)
+    if store is not None:
+        return analyze_char_size_vectorized(store, char_size_upper=char_size_upper,
+                                            char_size_lower=char_size_lower, default_char_size=dcs)
     char_sizes = []
-    dcs = Decimal(default_char_size)
     for char in chars:
-        cs_tmp = char['width'] / char['adv']
+        cs_tmp = number_type(char['width']) / number_type(char['adv'])
         if not (char_size_lower <= cs_tmp <= char_size_upper):
-            cs_tmp = char['size']
+            cs_tmp = number_type(char['size'])
         if not (char_size_lower <= cs_tmp <= char_size_upper):
             cs_tmp = dcs
         char_sizes.append(cs_tmp)
-    ave_cs = max(set(char_sizes), key=char_sizes.count) if char_sizes else dcs
+    ave_cs = most_frequent_value(char_sizes) if char_sizes else dcs
     min_cs = min(char_sizes) if char_sizes else dcs
     return ave_cs, min_cs
 
 
+def analyze_char_size_vectorized(store, char_size_upper=30, char_size_lower=3, default_char_size=12.0):
+    if not store.chars['size'].size:
+        return default_char_size, default_char_size
+    upper, lower = float(char_size_upper), float(char_size_lower)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        char_sizes = store.chars['width'] / store.chars['adv']
+    char_sizes = np.where((lower <= char_sizes) & (char_sizes <= upper), char_sizes, store.chars['size'])
+    char_sizes = np.where((lower <= char_sizes) & (char_sizes <= upper), char_sizes, default_char_size)
+    values, counts = np.unique(char_sizes, return_counts=True)
+    most_frequent = values[counts == counts.max()]
+    ave_cs = float(most_frequent[0]) if most_frequent.size == 1 else most_frequent_value(char_sizes.tolist())
+    return ave_cs, float(char_sizes.min())
+
+
+def most_frequent_value(values):
+    # ties are resolved in the same order as max(set(values), key=values.count)
+    counts = Counter(values)
+    return max(set(values), key=counts.get)
+
+
+def analyze_line_height(phrases, default_line_height, store=None):
+    """
+    :param phrases: page phrases
+    :param default_line_height: line height used when no positive gap between phrases is found
+    :param store: PageStore with phrases loaded
+    :return: average gap between consecutive phrases
+    """
+    if store is not None:
+        line_heights = store.phrases['top'][1:] - store.phrases['bottom'][:-1]
+        line_heights = line_heights[line_heights > 0].tolist()
+    else:
+        line_heights = list(
+            filter(lambda x: x > 0, [phrases[i + 1]['top'] - phrases[i]['bottom'] for i in range(len(phrases) - 1)])
+        )
+    return mean(line_heights) if line_heights else default_line_height
+
+
+def most_common_ints(values, n=1):
+    """
+    :param values: list of numbers or numpy array
+    :param n: number of most common values
+    :return: same as Counter(sorted([int(i) for i in values])).most_common(n)
+    """
+    if np is not None and isinstance(values, np.ndarray):
+        int_values, counts = np.unique(np.trunc(values).astype(int), return_counts=True)
+        order = np.argsort(-counts, kind='stable')[:n]
+        return [(int(int_values[i]), int(counts[i])) for i in order]
+    return Counter(sorted([int(i) for i in values])).most_common(n)
+
+
 def analyze_page_orientation(plumber_page):
     """
     :param plumber_page: pdfplumber.page.Page class
@@ -84,33 +364,54 @@ def analyze_page_num_word(phrases, page_height, page_width, top_fraction=Decimal
 
 def edges_to_lines(edges):
     h_lines, v_lines = [], []
+    h_keys, v_keys = set(), set()
     for i in edges:
+        key = freeze_object(i)
         if i['orientation'] == 'h':
-            if i not in h_lines:
+            if key not in h_keys:
+                h_keys.add(key)
                 h_lines.append(i)
         else:
-            if i not in v_lines:
+            if key not in v_keys:
+                v_keys.add(key)
                 v_lines.append(i)
     return h_lines, v_lines
 
 
 def remove_single_lines(lines, max_double=3, min_double=0.05, vertical_double=2, m='h'):
     new_lines = []
+    new_line_keys = set()
     key_1 = 'y0' if m == 'h' else 'x0'
     key_2 = 'x0' if m == 'h' else 'y0'
     key_3 = 'x1' if m == 'h' else 'y1'
-    for i, li in enumerate(lines):
-        if li not in new_lines:
-            nearest_lines = list(filter(
-                lambda x:
-                    min_double < abs(li[key_1] - x[key_1]) <= max_double
-                    and abs(li[key_2] - x[key_2]) <= vertical_double
-                    and abs(li[key_3] - x[key_3]) <= vertical_double
-                    and li != x, lines[:]
-            ))
-            if nearest_lines:
-                new_lines.append(li)
-                new_lines.extend(nearest_lines)
+    # bucket lines by (key_1, key_2) with cell sizes no smaller than the tolerances,
+    # so double line candidates only come from the neighbouring cells and are then checked exactly
+    size_1 = max(float(max_double), 0) + 1e-6
+    size_2 = max(float(vertical_double), 0) + 1e-6
+    grid = defaultdict(list)
+    for idx, li in enumerate(lines):
+        grid[(floor(float(li[key_1]) / size_1), floor(float(li[key_2]) / size_2))].append(idx)
+    for li in lines:
+        li_key = freeze_object(li)
+        if li_key in new_line_keys:
+            continue
+        k1 = li[key_1]
+        q1, q2 = floor(float(k1) / size_1), floor(float(li[key_2]) / size_2)
+        candidate_ids = []
+        for d1, d2 in product((-1, 0, 1), (-1, 0, 1)):
+            candidate_ids.extend(grid.get((q1 + d1, q2 + d2), []))
+        nearest_lines = [
+            lines[x] for x in sorted(candidate_ids)
+            if min_double < abs(k1 - lines[x][key_1]) <= max_double
+            and abs(li[key_2] - lines[x][key_2]) <= vertical_double
+            and abs(li[key_3] - lines[x][key_3]) <= vertical_double
+            and li != lines[x]
+        ]
+        if nearest_lines:
+            new_lines.append(li)
+            new_lines.extend(nearest_lines)
+            new_line_keys.add(li_key)
+            new_line_keys.update(freeze_object(x) for x in nearest_lines)
     return new_lines
 
 
@@ -191,28 +492,123 @@ def add_horizontal_lines(v_lines, h_lines, vlts_tolerance=0.1):
     extra_hl = []
     # 补表格顶部缺失的横线
     vlts = [i['top'] for i in v_lines if 'height' in i and i['height'] > 3]
-    vltls = [i for i in v_lines if abs(i['top'] - min(vlts)) < vlts_tolerance] if vlts else []
-    vhls = [i for i in h_lines if i['width'] > 3 and abs(i['top'] - min(vlts)) < vlts_tolerance] if vlts else []
+    vlt = min(vlts) if vlts else None
+    vltls = [i for i in v_lines if abs(i['top'] - vlt) < vlts_tolerance] if vlts else []
+    vhls = [i for i in h_lines if i['width'] > 3 and abs(i['top'] - vlt) < vlts_tolerance] if vlts else []
     if vltls and vhls:
         vhlsl, vhlsr = min([i['x0'] for i in vhls]), max([i['x1'] for i in vhls])
         vltl, vltr = min([i['x0'] for i in vltls]), max([i['x1'] for i in vltls])
         if abs(vhlsl - vltl) > vlts_tolerance or abs(vhlsr - vltr) > vlts_tolerance:
-            extra_hl.append({'orientation': 'h', 'x0': vltl, 'x1': vltr, 'top': min(vlts), 'bottom': min(vlts)})
+            extra_hl.append({'orientation': 'h', 'x0': vltl, 'x1': vltr, 'top': vlt, 'bottom': vlt})
     # 补表格底部缺失的横线
     vl_bs = [i["bottom"] for i in v_lines if "height" in i and i["height"] > 3]
-    vl_bls = [i for i in v_lines if abs(i["bottom"] - max(vl_bs)) < vlts_tolerance] if vl_bs else []
+    vl_b = max(vl_bs) if vl_bs else None
+    vl_bls = [i for i in v_lines if abs(i["bottom"] - vl_b) < vlts_tolerance] if vl_bs else []
     vhls = [
         i for i in h_lines
-        if "width" in i and i["width"] > 3 and abs(i["bottom"] - max(vl_bs)) < vlts_tolerance
+        if "width" in i and i["width"] > 3 and abs(i["bottom"] - vl_b) < vlts_tolerance
     ] if vl_bs else []
     if vl_bs and vhls:
         vhlsl, vhlsr = min([i['x0'] for i in vhls]), max([i['x1'] for i in vhls])
         vl_bl, vl_br = min([i['x0'] for i in vl_bls]), max([i['x1'] for i in vl_bls])
         if abs(vhlsl - vl_bl) > vlts_tolerance or abs(vhlsr - vl_br) > vlts_tolerance:
-            extra_hl.append({'orientation': 'h', 'x0': vl_bl, 'x1': vl_br, 'top': max(vl_bs), 'bottom': max(vl_bs)})
+            extra_hl.append({'orientation': 'h', 'x0': vl_bl, 'x1': vl_br, 'top': vl_b, 'bottom': vl_b})
     return extra_hl
 
 
+def find_column_separators(objects, width, max_columns=3, half_width=4, max_objects=1, min_column_width=0,
+                           min_column_objects=0, height=None):
+    """
+    Vertical whitespace projection profile of the page objects: every position across the page
+    counts the objects overlapping the full height region of 2 * half_width around it.
+    Gutters are the runs of positions with at most max_objects objects and no rulings (line, rect and curve
+    objects), and more than max_objects objects on both sides, so that page margins are not gutters.
+    The rules of a ruled table cross every gap between its cells, so the table is not split into columns.
+    :param objects: page objects, objects wider than half of the page (banners, backgrounds) are ignored
+        except rulings, rulings larger than half of the page in both directions (page frames) are ignored
+    :param width: page width
+    :param max_columns: maximum number of columns
+    :param half_width: half width of the gutter region
+    :param max_objects: maximum number of objects in the gutter region
+    :param min_column_width: minimum width of every column
+    :param min_column_objects: minimum fraction of the objects overlapping every column
+    :param height: page height, no ruling is a page frame if None
+    :return: sorted column separators at the gutter centers, widest gutters first, at most max_columns - 1
+    the gutter center is the midpoint between the objects on both sides, not the middle of the scanned positions
+    """
+    width, half_width = float(width), float(half_width)
+    x0s, x1s, ruling_x0s, ruling_x1s = [], [], [], []
+    for obj in objects:
+        if 'x0' not in obj or 'x1' not in obj:
+            continue
+        x0, x1 = float(obj['x0']), float(obj['x1'])
+        if obj.get('object_type') in RULING_OBJECT_TYPES:
+            if height is not None and x1 - x0 > width / 2 and \
+                    float(obj['bottom']) - float(obj['top']) > float(height) / 2:
+                continue
+            ruling_x0s.append(x0)
+            ruling_x1s.append(x1)
+            continue
+        if x1 - x0 > width / 2:
+            continue
+        x0s.append(x0)
+        x1s.append(x1)
+    x0s.sort()
+    x1s.sort()
+    ruling_x0s.sort()
+    ruling_x1s.sort()
+    total = len(x0s)
+
+    def count_left(x):  # objects ending before x
+        return bisect_left(x1s, x)
+
+    def count_right(x):  # objects starting after x
+        return total - bisect_right(x0s, x)
+
+    def count_rulings(x0, x1):  # rulings overlapping x0 ~ x1
+        return bisect_right(ruling_x0s, x1) - bisect_left(ruling_x1s, x0)
+
+    def gap_center(start, end):
+        # midpoint between the last object ending before and the first object starting after the blank positions
+        # start ~ end, the objects tolerated inside the gutter region do not move it, rulings are never inside
+        left = bisect_right(x1s, start + 1 - half_width) or bisect_right(x1s, start)
+        right = bisect_left(x0s, end - 1 + half_width)
+        if right == total:
+            right = bisect_left(x0s, end)
+        if not left or right == total:
+            return (start + end) / 2
+        left, right = x1s[left - 1], x0s[right]
+        ruling_left, ruling_right = bisect_left(ruling_x1s, start), bisect_right(ruling_x0s, end)
+        if ruling_left:
+            left = max(left, ruling_x1s[ruling_left - 1])
+        if ruling_right < len(ruling_x0s):
+            right = min(right, ruling_x0s[ruling_right])
+        return (left + right) / 2
+
+    gutters, run_start = [], None
+    for pos in range(int(width) + 2):
+        blank = pos < width and \
+            total - count_left(pos - half_width) - count_right(pos + half_width) <= max_objects and \
+            not count_rulings(pos - half_width, pos + half_width)
+        if blank and run_start is None:
+            run_start = pos
+        elif not blank and run_start is not None:
+            if count_left(run_start) > max_objects and count_right(pos - 1) > max_objects:
+                gutters.append((pos - run_start, gap_center(run_start, pos - 1)))
+            run_start = None
+
+    separators = []
+    for _, center in sorted(gutters, key=lambda x: -x[0]):
+        if len(separators) >= max_columns - 1:
+            break
+        bounds = sorted(separators + [center])
+        columns = list(zip([0] + bounds, bounds + [width]))
+        if all(j - i >= min_column_width for i, j in columns) and \
+                all(total - count_left(i) - count_right(j) >= min_column_objects * total for i, j in columns):
+            separators = bounds
+    return separators
+
+
 def merge_page_figures(pdf_page, tables_raw=None, logo=None, min_width=3, min_height=3, pid='1'):
     logo_figures, figures_in_table = [], []
     fig_merge = pdf_page.figures
@@ -246,17 +642,49 @@ def merge_page_figures(pdf_page, tables_raw=None, logo=None, min_width=3, min_he
             img_tmp = {k: v for k, v in i.items() if k in PDF_IMAGE_KEYS}
             if img_tmp in logo:
                 logo_figures.append(figures_ori[idx])
+    excluded_ids = {id(i) for i in figures_in_table + logo_figures}
     figures_raw = sorted([
         i for i in figures_ori
-        if i not in figures_in_table and i not in logo_figures and i is not None
+        if i is not None and id(i) not in excluded_ids
     ], key=lambda x: x['top'])
     return figures_raw
 
 
+class IntervalIndex(object):
+    """
+    Static index of closed intervals (eg. vertical extent of tables & images) over their sorted endpoints.
+    Point lookups bisect the endpoints, instead of checking every interval.
+    """
+
+    def __init__(self, intervals):
+        """
+        :param intervals: list of (start, end, value)
+        """
+        self.points = sorted({i[0] for i in intervals} | {i[1] for i in intervals})
+        # slot 2k + 1 is the endpoint points[k], slot 2k is the open gap before it
+        self.slots = [[] for _ in range(len(self.points) * 2 + 1)]
+        for start, end, value in intervals:
+            if start > end:
+                continue
+            for slot in range(self.slot(start), self.slot(end) + 1):
+                self.slots[slot].append(value)
+
+    def slot(self, point):
+        idx = bisect_left(self.points, point)
+        return idx * 2 + 1 if idx < len(self.points) and self.points[idx] == point else idx * 2
+
+    def query(self, point):
+        """
+        :return: values of the intervals containing the point, in insertion order
+        """
+        return self.slots[self.slot(point)]
+
+
 def calculate_paragraph_border(depdf_page_object):
     tables_raw = depdf_page_object.tables_raw
     images_raw = depdf_page_object.images_raw
     ave_cs = depdf_page_object.ave_cs
+    number_type = depdf_page_object.number_type
     pagination_phrases = depdf_page_object.pagination_phrases
     phrases = depdf_page_object.phrases
     same = depdf_page_object.same
@@ -265,23 +693,34 @@ def calculate_paragraph_border(depdf_page_object):
     same_tmp = depdf_page_object.same_tmp
     table_words = depdf_page_object._table_phrases
     image_words = depdf_page_object._image_phrases
+    store = depdf_page_object.store
 
-    tts, tbs, lls, lrs = [], [], [], []
+    # phrases are compared by value, header & footer and image words are extracted separately
+    excluded_keys = {freeze_object(i) for i in image_words} | {freeze_object(i) for i in pagination_phrases}
+    same_keys = {freeze_object(i) for i in same_tmp} if same else set()
+    table_index = IntervalIndex([(table.bbox[1], table.bbox[3], table) for table in tables_raw])
+    image_index = IntervalIndex([
+        (number_type(img['bbox'][1]) - ave_cs, number_type(img['bbox'][3]) + ave_cs, img)
+        for img in images_raw if 'bbox' in img
+    ])
+    tts, tbs, lls, lrs, border_ids = [], [], [], [], []
     tt = tb = ll = lr = None  # top-top, top-bottom, left-left, left-right
-    for i in phrases:
-        if (same and i in same_tmp) or i in image_words or i in pagination_phrases:
+    for idx, i in enumerate(phrases):
+        key = freeze_object(i)
+        if key in same_keys or key in excluded_keys:
             continue
         inside = 0
-        for idx, table in enumerate(tables_raw):
-            if table.bbox[1] <= (i['top'] + i['bottom']) / 2 <= table.bbox[3]:
-                inside = 1
-                table_words.append(i)
-        for img in images_raw:
-            if 'bbox' in img and i['top'] >= img['bbox'][1] - ave_cs and i['bottom'] <= img['bbox'][3] + ave_cs:
+        for _ in table_index.query((i['top'] + i['bottom']) / 2):
+            inside = 1
+            table_words.append(i)
+        for img in image_index.query(i['top']):
+            if i['bottom'] <= number_type(img['bbox'][3]) + ave_cs:
                 image_words.append(i)
+                excluded_keys.add(key)
                 inside = 1
         if inside:
             continue
+        border_ids.append(idx)
         tts.append(i['top'])
         tbs.append(i['bottom'])
         lls.append(i['x0'])
@@ -298,14 +737,88 @@ def calculate_paragraph_border(depdf_page_object):
     tb = page_height if tb is None else tb
     ll = 0 if ll is None else ll
     lr = page_width if lr is None else lr
-    ll_mc = Counter(sorted([int(i) for i in lls])).most_common(5)
-    lr_mc = Counter(sorted([int(i) for i in lrs])).most_common(1)
+    if store is not None:
+        lls, lrs = store.phrases['x0'][border_ids], store.phrases['x1'][border_ids]
+    ll_mc = most_common_ints(lls, 5)
+    lr_mc = most_common_ints(lrs, 1)
     lls = [k[0] for k in ll_mc if k[1] >= 5] if ll_mc else []
-    ll = Decimal(min(lls)) if lls else ll
-    lr = Decimal(lr_mc[0][0]) if lr_mc else lr
+    ll = number_type(min(lls)) if lls else ll
+    lr = number_type(lr_mc[0][0]) if lr_mc else lr
     lr = page_width * 4 / 5 if lr <= page_width * 7 / 10 else lr
     return ll, tt, lr, tb
 
 
 def format_text(text):
     return text.strip().replace('\xa0', '').replace('\n', '')
+
+
+# (process id, max renders) => thread pool, threads of the parent process do not exist in forked worker processes
+# so every process creates its own pools, os.register_at_fork is not available before python 3.7
+_render_executors = {}
+
+
+def get_render_executor(max_renders):
+    """
+    :param max_renders: maximum concurrent image renders
+    :return: thread pool shared by all pages of the process with the same size
+    """
+    key = (os.getpid(), max_renders)
+    if key not in _render_executors:
+        _render_executors[key] = ThreadPoolExecutor(max_workers=max_renders, thread_name_prefix='depdf-render')
+    return _render_executors[key]
+
+
+def render_image(image_page, img_file, resolution):
+    """
+    :param image_page: pdfplumber page cropped to the image bbox
+    :param img_file: png file path
+    :param resolution: image resolution
+    :return: png file path
+    """
+    pic = image_page.to_image(resolution=resolution)
+    temp_file = '{}.{}.tmp'.format(img_file, os.getpid())
+    pic.save(temp_file, format='png')
+    os.replace(temp_file, img_file)  # shared image files might be written by several processes
+    return img_file
+
+
+def image_signature(image, bbox, resolution):
+    """
+    :param image: pdfplumber image object
+    :param bbox: image crop bbox
+    :param resolution: image resolution
+    :return: content hash of the embedded image stream and the crop size, None if image has no stream
+    """
+    stream = image.get('stream')
+    if stream is None or not hasattr(stream, 'get_rawdata'):
+        return None
+    sha = hashlib.sha256(stream.get_rawdata() or b'')
+    srcsize = 'x'.join('{:.0f}'.format(i) for i in image.get('srcsize') or ())
+    crop_size = '{:.3f}x{:.3f}'.format(bbox[2] - bbox[0], bbox[3] - bbox[1])  # same for decimal & float backend
+    sha.update('{}|{}|{}|{}'.format(srcsize, image.get('bits'), crop_size, resolution).encode('utf-8'))
+    return sha.hexdigest()
+
+
+class ImageRegistry(object):
+    """
+    Document wide registry of image files, repeated images are rendered only once.
+    Files which already exist (rendered by another worker process) are not rendered again.
+    """
+
+    def __init__(self):
+        self.files = set()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '<depdf.ImageRegistry: {} images>'.format(len(self.files))
+
+    def claim(self, img_file):
+        """
+        :param img_file: content addressed image file path
+        :return: if the caller should render the image file
+        """
+        with self._lock:
+            if img_file in self.files:
+                return False
+            self.files.add(img_file)
+        return not os.path.isfile(img_file)
@@ -1,21 +1,31 @@
+from collections import OrderedDict
+from collections.abc import Sequence
 import ntpath
 import re
 
 import pdfplumber
 
 from depdf.base import Base
+from depdf.cache import PageCache, make_cache_key, pdf_digest
 from depdf.error import PDFTypeError
-from depdf.config import check_config_type, check_config
+from depdf.config import (
+    check_config_type, check_config, config_fingerprint, init_config_environment, is_rendering_change, DEFAULT_CONFIG_KEYS
+)
+from depdf.export import save_tables_csv, write_jsonl
 from depdf.log import logger_init
 from depdf.page import DePage
-from depdf.pdf_tools import pdf_logo, pdf_head_tail
+from depdf.page_tools import ImageRegistry
+from depdf.pdf_tools import DocumentProfile, pdf_profile, pdf_pages_to_html, wrap_html_pages
+from depdf.stats import aggregate_page_stats
 
 log = logger_init(__name__)
 pdf_appendix_re = re.compile(r"\.pdf$", re.I)
 
 
 class DePDF(Base):
-    _cached_properties = Base._cached_properties + ['_same', '_logo', '_pages', '_html_pages']
+    object_type = 'pdf'
+    _cached_properties = Base._cached_properties + ['_profile', '_pages', '_html_pages']
+    _open_kwargs = None  # pdfplumber.open keyword arguments, used to re-open the file in worker processes
 
     @check_config
     def __init__(self, pdf, config=None, **kwargs):
@@ -24,11 +34,16 @@ class DePDF(Base):
         :param config: depdf.config.Config class
         """
         check_config_type(config)
-        config.update(**kwargs)
-        self._config = config
+        self._config = config.copy(**kwargs)
+        init_config_environment(self._config)
         check_pdf_type(pdf)
         self._pdf = pdf
         self.prefix = self.get_prefix()
+        self.page_errors = {}
+        self.page_stats = []  # PageStats.to_dict of every converted page
+        self._stats_hooks = []
+        self._pending_stats = []  # PageStats of created pages which are not reported yet
+        self.image_registry = ImageRegistry()  # repeated images across pages share one rendered file
 
     def __repr__(self):
         return '<depdf.DePDF: {}>'.format(self.prefix)
@@ -38,21 +53,25 @@ class DePDF(Base):
             return self.config.unique_prefix
         pdf_base_name = ntpath.basename(self.pdf.stream.name)
         prefix = pdf_appendix_re.sub('', pdf_base_name)
-        self.config.unique_prefix = prefix
+        self._config = self.config.copy(unique_prefix=prefix)
         return prefix
 
     @classmethod
     @check_config
     def load(cls, file_name, config=None, **kwargs):
-        plumber_pdf = pdfplumber.open(file_name, **kwargs)
-        return cls(plumber_pdf, config=config, **kwargs)
+        config_kwargs = {k: v for k, v in kwargs.items() if k in DEFAULT_CONFIG_KEYS}
+        open_kwargs = {k: v for k, v in kwargs.items() if k not in DEFAULT_CONFIG_KEYS}
+        plumber_pdf = pdfplumber.open(file_name, **open_kwargs)
+        de_pdf = cls(plumber_pdf, config=config, **config_kwargs)
+        de_pdf._open_kwargs = open_kwargs
+        return de_pdf
 
     @classmethod
     def open(cls, *args, **kwargs):
         return cls.load(*args, **kwargs)
 
     def save_html(self):
-        return super().write_to(self.prefix + '.html')
+        return self.write_html(self.prefix + '.html')
 
     @property
     def config(self):
@@ -61,8 +80,24 @@ class DePDF(Base):
     @config.setter
     def config(self, value):
         check_config_type(value)
-        self.refresh()
-        self._config = value
+        old_config, self._config = self._config, value
+        init_config_environment(value)
+        self.prefix = self.get_prefix()
+        if is_rendering_change(old_config, self.config):
+            self.rerender(self.config)
+        else:
+            self.refresh()
+
+    def rerender(self, config):
+        """
+        keep the document profile and the processed pages, render the html again with the config rendering values
+        """
+        for p in ['_html', '_html_pages']:
+            self.__dict__.pop(p, None)
+        pages = getattr(self, '_pages', None)
+        if pages is not None:
+            pages.max_cached_pages = getattr(self.config, 'max_cached_pages')
+            pages.rerender(config)
 
     @property
     def pdf(self):
@@ -82,51 +117,197 @@ class DePDF(Base):
     def page_num(self):
         return len(self.pdf.pages)
 
+    @property
+    def profile(self):
+        """
+        :return: document prepass of page geometry, orientation groups, header & footer and logo
+        """
+        return self._get_cached_property('_profile', self.load_profile)
+
     @property
     def same(self):
-        same_flag = getattr(self.config, 'header_footer_flag')
-        same = self._get_cached_property('_same', pdf_head_tail, self.pdf, config=self.config) if same_flag else []
-        return same
+        return self.profile.same
 
     @property
     def logo(self):
-        logo_flag = getattr(self.config, 'logo_flag')
-        logo = self._get_cached_property('_logo', pdf_logo, self.pdf) if logo_flag else []
-        return logo
+        return self.profile.logo
+
+    def load_profile(self):
+        cache_dir = getattr(self.config, 'cache_dir')
+        if not cache_dir:
+            return pdf_profile(self.pdf, config=self.config)
+        cache = PageCache(cache_dir, size_limit=getattr(self.config, 'cache_size_limit'))
+        cache_key = make_cache_key(pdf_digest(self.pdf), 'profile', config_fingerprint(self.config))
+        value = cache.get(cache_key)
+        if value is not None:
+            try:
+                return DocumentProfile.from_dict(value, config=self.config)
+            except (KeyError, TypeError, ValueError) as e:
+                log.warning('{0}: invalid profile cache entry: {1}'.format(self.prefix, e))
+        profile = pdf_profile(self.pdf, config=self.config)
+        cache.set(cache_key, profile.to_dict)
+        return profile
 
     @property
     def pages(self):
         return self._get_cached_property('_pages', self.generate_pages)
 
     def generate_pages(self):
-        pages = [
-            DePage(page, pid=str(pid + 1), same=self.same, logo=self.logo)
-            for pid, page in enumerate(self.pdf.pages)
-        ]
-        return pages
+        return LazyPages(self, max_cached_pages=getattr(self.config, 'max_cached_pages'))
+
+    def create_page(self, page_index):
+        """
+        :param page_index: page index starts from 0
+        :return: depdf.page.DePage class
+        """
+        page = DePage(self.pdf.pages[page_index], pid=str(page_index + 1), same=self.same, logo=self.logo,
+                      config=self.config, image_registry=self.image_registry)
+        self._pending_stats.append(page.stats)
+        return page
+
+    @property
+    def open_kwargs(self):
+        if self._open_kwargs is not None:
+            return self._open_kwargs
+        open_kwargs = {'pages': self.pdf.pages_to_parse, 'precision': self.pdf.precision}
+        if self.pdf.laparams is not None:
+            open_kwargs['laparams'] = vars(self.pdf.laparams)
+        return open_kwargs
+
+    @property
+    def file_name(self):
+        return getattr(self.pdf.stream, 'name', None)
 
     @property
     def html_pages(self):
         return self._get_cached_property('_html_pages', self.extract_html_pages)
 
     def extract_html_pages(self):
-        html_pages = [page.to_html for page in self.pages]
-        return html_pages
+        return list(self.iter_html_pages())
+
+    def iter_html_pages(self):
+        """
+        :return: generator of page html strings, each page is released as soon as it is yielded
+        """
+        html_pages = getattr(self, '_html_pages', None)
+        if html_pages is not None:
+            yield from html_pages
+            return
+        self.page_errors, self.page_stats = {}, []
+        workers = getattr(self.config, 'workers')
+        if workers and workers > 1:
+            if self.file_name:
+                yield from self.iter_html_pages_parallel()
+                return
+            log.warning('{}: parallel conversion requires a pdf file path, fall back to serial'.format(self.prefix))
+        for page in self.iter_pages():
+            yield page.to_html
+
+    def iter_pages(self):
+        """
+        :return: generator of DePage, pages not kept by self.pages are released before the next page is created
+        the stats of every page are reported once the caller is done with it
+        """
+        self.page_stats = []
+        pages = getattr(self, '_pages', None)
+        if pages is not None:
+            for page in pages:
+                yield page
+                self.finish_page(page)
+            return
+        for page_index, plumber_page in enumerate(self.pdf.pages):
+            page = self.create_page(page_index)
+            yield page
+            self.finish_page(page)
+            del page
+            plumber_page.flush_cache()
+
+    def iter_html_pages_parallel(self):
+        for page_index, html_page, error, page_stats in pdf_pages_to_html(
+                self.file_name, self.page_num, same=self.same, logo=self.logo,
+                open_kwargs=self.open_kwargs, config=self.config):
+            if error is not None:
+                pid = str(page_index + 1)
+                log.error('{0} / page-{1} conversion failed:\n{2}'.format(self.prefix, pid, error))
+                self.page_errors[pid] = error
+                html_page = ''
+            else:
+                self.finish_page_stats(page_stats)
+            yield html_page
+
+    def add_stats_hook(self, hook):
+        """
+        :param hook: callable which receives the stats dict of every page as soon as the page is converted
+        pages processed through self.pages are reported by self.stats or self.close
+        """
+        self._stats_hooks.append(hook)
+
+    def finish_page_stats(self, page_stats):
+        self.page_stats.append(page_stats)
+        for hook in self._stats_hooks:
+            hook(page_stats)
+
+    def finish_page(self, page):
+        if page.stats in self._pending_stats:
+            self._pending_stats.remove(page.stats)
+        self.finish_page_stats(page.stats.to_dict)
+
+    def flush_page_stats(self):
+        """
+        report the processed pages created by self.pages, pages which are not processed yet are kept pending
+        """
+        pending = []
+        for page_stats in self._pending_stats:
+            if page_stats.stages:
+                self.finish_page_stats(page_stats.to_dict)
+            else:
+                pending.append(page_stats)
+        self._pending_stats = pending
 
     @property
-    def html(self):
-        if not self._html and hasattr(self, 'to_html'):
-            return self.to_html
-        return self._html
+    def stats(self):
+        """
+        :return: per-document totals and percentiles over the converted pages of every processing stage
+        """
+        self.flush_page_stats()
+        return aggregate_page_stats(self.page_stats)
 
     @property
     def to_html(self):
-        pdf_class = getattr(self.config, 'pdf_class')
-        html = '<div class="{pdf_class}">'.format(pdf_class=pdf_class)
-        for pid, html_page in enumerate(self.html_pages):
-            html += '<!--page-{pid}-->{html_page}'.format(pid=pid + 1, html_page=html_page)
-        html += '</div>'
-        return html
+        return ''.join(self.wrap_html_pages(self.html_pages))
+
+    def iter_html(self):
+        """
+        :return: generator of html chunks, the pdf wrapper and every page as soon as it is processed
+        """
+        return self.wrap_html_pages(self.iter_html_pages())
+
+    def wrap_html_pages(self, html_pages):
+        return wrap_html_pages(html_pages, getattr(self.config, 'pdf_class'))
+
+    def write_html(self, fp):
+        """
+        :param fp: file path or writable text stream, eg. socket.makefile('w')
+        """
+        if isinstance(fp, str):
+            with open(fp, 'w') as file:
+                return self.write_html(file)
+        for chunk in self.iter_html():
+            fp.write(chunk)
+
+    def write_jsonl(self, fp):
+        """
+        :param fp: file path or writable text stream
+        :return: number of table and paragraph records written
+        """
+        return write_jsonl(self, fp)
+
+    def save_tables_csv(self, output_dir=''):
+        """
+        :param output_dir: directory of the csv files, current directory by default, created if missing
+        :return: list of csv file names
+        """
+        return save_tables_csv(self, output_dir=output_dir)
 
     def __enter__(self):
         return self
@@ -135,10 +316,66 @@ class DePDF(Base):
         self.close()
 
     def close(self):
+        self.flush_page_stats()
         self.pdf.flush_cache()
         self.pdf.close()
 
 
+class LazyPages(Sequence):
+    """
+    Sequence of DePage which are created on first access,
+    the least recently used pages are released and their pdfplumber caches flushed.
+    """
+
+    def __init__(self, de_pdf, max_cached_pages=None):
+        """
+        :param de_pdf: depdf.pdf.DePDF class
+        :param max_cached_pages: maximum number of pages kept, None keeps all pages
+        """
+        self._de_pdf = de_pdf
+        self.max_cached_pages = max_cached_pages
+        self._cached_pages = OrderedDict()
+
+    def __repr__(self):
+        return '<depdf.LazyPages: {} pages, {} cached>'.format(len(self), len(self._cached_pages))
+
+    def __len__(self):
+        return self._de_pdf.page_num
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        page_num = len(self)
+        if index < 0:
+            index += page_num
+        if not 0 <= index < page_num:
+            raise IndexError('page index out of range')
+        page = self._cached_pages.get(index)
+        if page is not None:
+            self._cached_pages.move_to_end(index)
+            return page
+        page = self._de_pdf.create_page(index)
+        self._cached_pages[index] = page
+        self.evict()
+        return page
+
+    def evict(self):
+        max_pages = self.max_cached_pages
+        while max_pages is not None and len(self._cached_pages) > max(max_pages, 1):
+            _, page = self._cached_pages.popitem(last=False)
+            page.page.flush_cache()
+
+    def rerender(self, config):
+        for page in self._cached_pages.values():
+            page.rerender(config)
+        self.evict()
+
+    def clear(self):
+        for page in self._cached_pages.values():
+            page.page.flush_cache()
+        self._cached_pages.clear()
+
+
 def check_pdf_type(pdf):
     if not isinstance(pdf, pdfplumber.PDF):
         raise PDFTypeError(pdf)
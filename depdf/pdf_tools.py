@@ -1,7 +1,16 @@
-from decimal import Decimal
+import traceback
+
+import pdfplumber
 
 from depdf.config import check_config, PDF_IMAGE_KEYS
-from depdf.page_tools import analyze_page_orientation
+from depdf.log import logger_init
+from depdf.page import DePage
+from depdf.page_tools import analyze_page_orientation, ImageRegistry, PAGE_LANDSCAPE, PAGE_PORTRAIT
+from depdf.pool import WorkerPool
+from depdf.utils import convert_object_numbers, get_number_type
+
+log = logger_init(__name__)
+_worker_context = {}  # per-process state of the page conversion worker
 
 
 def check_page_orientation(pdf, pid):
@@ -13,30 +22,147 @@ def check_page_orientation(pdf, pid):
     return analyze_page_orientation(pdf.pages[pid])
 
 
+class DocumentProfile(object):
+    """
+    Document prepass result, page geometry is read from the page boxes without parsing page contents.
+    Only the sampled pages are parsed (once) for header & footer and logo detection,
+    their object counts are recorded on the way. Counting the other pages would parse every page
+    up front, their counts are reported by the page stats once the pages are converted.
+    """
+
+    @check_config
+    def __init__(self, pdf, config=None):
+        """
+        :param pdf: pdfplumber.pdf.PDF class
+        :param config: depdf config class
+        """
+        self._pdf = pdf
+        self.number_type = get_number_type(getattr(config, 'numeric_backend'))
+        self.set_page_sizes([(page.width, page.height) for page in pdf.pages])
+        self.object_counts = {}  # sampled page number starts from 0 => object kind => count
+        self.same, self.logo = [], []
+        self._words, self._images = {}, {}
+
+    def __repr__(self):
+        return '<depdf.DocumentProfile: {} pages>'.format(self.page_num)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_pdf'] = None
+        state['_words'], state['_images'] = {}, {}
+        return state
+
+    @property
+    def to_dict(self):
+        """
+        :return: plain dict of the prepass result, see from_dict
+        """
+        return {
+            'page_sizes': self.page_sizes, 'same': self.same, 'logo': self.logo,
+            'object_counts': {str(k): v for k, v in self.object_counts.items()},  # cache dict keys are str
+        }
+
+    @classmethod
+    @check_config
+    def from_dict(cls, value, config=None):
+        """
+        :param value: dict of DocumentProfile.to_dict, eg. loaded from the page cache
+        :param config: depdf config class
+        :return: DocumentProfile without the pdf, page orientations are derived from the page sizes
+        """
+        profile = cls.__new__(cls)
+        profile._pdf = None
+        profile.number_type = get_number_type(getattr(config, 'numeric_backend'))
+        profile.set_page_sizes([tuple(i) for i in value['page_sizes']])
+        profile.object_counts = {int(k): v for k, v in value['object_counts'].items()}
+        profile.same, profile.logo = value['same'], value['logo']
+        profile._words, profile._images = {}, {}
+        return profile
+
+    def set_page_sizes(self, page_sizes):
+        self.page_sizes = page_sizes
+        self.orientations = [PAGE_LANDSCAPE if w >= h else PAGE_PORTRAIT for w, h in self.page_sizes]
+        # the first portrait page is usually the cover, skip it
+        self.portrait_pages = [i for i, o in enumerate(self.orientations) if o == PAGE_PORTRAIT and i != 0]
+        self.landscape_pages = [i for i, o in enumerate(self.orientations) if o == PAGE_LANDSCAPE]
+
+    @property
+    def page_num(self):
+        return len(self.page_sizes)
+
+    def sample_page(self, pid):
+        page = self._pdf.pages[pid]
+        if pid not in self.object_counts:
+            self.object_counts[pid] = {kind: len(objs) for kind, objs in page.objects.items()}
+        return page
+
+    def page_words(self, pid):
+        """
+        :param pid: page number starts from 0
+        :return: copies of the page words, safe to be marked by the caller
+        """
+        if pid not in self._words:
+            self._words[pid] = [
+                convert_object_numbers(w, self.number_type)
+                for w in self.sample_page(pid).extract_words(x_tolerance=6, y_tolerance=6, keep_blank_chars=True)
+            ]
+        return [dict(w) for w in self._words[pid]]
+
+    def page_images(self, pid):
+        if pid not in self._images:
+            self._images[pid] = self.sample_page(pid).images
+        return self._images[pid]
+
+    def release(self):
+        self._pdf = None
+        self._words, self._images = {}, {}
+
+
+@check_config
+def pdf_profile(pdf, config=None):
+    """
+    :param pdf: plumber pdf object
+    :param config: depdf config class
+    :return: DocumentProfile with header & footer and logo filled according to config flags
+    """
+    profile = DocumentProfile(pdf, config=config)
+    if getattr(config, 'header_footer_flag'):
+        profile.same = pdf_head_tail(pdf, config=config, profile=profile)
+    if getattr(config, 'logo_flag'):
+        profile.logo = pdf_logo(pdf, profile=profile)
+    profile.release()
+    return profile
+
+
 @check_config
-def pdf_head_tail(pdf, config=None):
+def pdf_head_tail(pdf, config=None, profile=None):
     """
     :param pdf: plumber pdf object
     :param config: depdf config class
+    :param profile: DocumentProfile class, sampled pages are shared with logo detection
     :return: PDF 文件的页眉和页脚
     """
+    if profile is None:
+        profile = DocumentProfile(pdf, config=config)
     offset = getattr(config, 'default_head_tail_page_offset_percent')
-    same_diff_tolerance = Decimal('0.5')  # todo parameter
+    number_type = get_number_type(getattr(config, 'numeric_backend'))
+    half = number_type('0.5')
+    same_diff_tolerance = number_type('0.5')  # todo parameter
     page_1, page_2 = 0, 1  # 需要拿来对比页眉和页脚的页码  # todo parameter
     same = []
-    page_num = len(pdf.pages)
     # Portrait pages
-    port_pages = [i for i in range(page_num) if pdf.pages[i].width < pdf.pages[i].height and i != 0]
+    port_pages = profile.portrait_pages
     pt_size = len(port_pages)
     # Landscape pages
-    land_pages = [i for i in range(page_num) if pdf.pages[i].width >= pdf.pages[i].height]
+    land_pages = profile.landscape_pages
     ld_size = len(land_pages)
 
     def check_same(p1, p2, orientation=None, pure_text=False, same_text=None):
-        fpage = pdf.pages[p1].extract_words(x_tolerance=6, y_tolerance=6, keep_blank_chars=True)
+        fpage = profile.page_words(p1)
         fpl = len(fpage)
-        spage = pdf.pages[p2].extract_words(x_tolerance=6, y_tolerance=6, keep_blank_chars=True) if p2 else None
+        spage = profile.page_words(p2) if p2 else None
         spl = len(spage) if p2 else None
+        p1_height = number_type(profile.page_sizes[p1][1])
 
         def head_tail(s='head', pt=False, st=same_text):
             sps = fpl + 1 if spl is None else spl
@@ -44,12 +170,12 @@ def pdf_head_tail(pdf, config=None):
             end = min(fpl, sps) if s == 'head' else min(fpl, sps) + 1
             for i in range(start, end):
                 k = i if s == 'head' else -i
-                if abs(fpage[k]['top'] / pdf.pages[p1].height - Decimal('0.5')) <= Decimal('0.5') - Decimal(offset):
+                if abs(fpage[k]['top'] / p1_height - half) <= half - number_type(offset):
                     break
                 fpc = fpage[k]['text'] if pt else fpage[k]
                 if st:
                     if fpc in st:
-                        fpage[k]['mode'] = check_page_orientation(pdf, p1)
+                        fpage[k]['mode'] = profile.orientations[p1]
                         fpage[k]['level'] = s
                         if fpage[k] not in same:
                             same.append(fpage[k])
@@ -102,18 +228,24 @@ def pdf_head_tail(pdf, config=None):
     return same
 
 
-def pdf_logo(pdf):
+def pdf_logo(pdf, profile=None):
+    """
+    :param pdf: plumber pdf object
+    :param profile: DocumentProfile class, sampled pages are shared with header & footer detection
+    :return: PDF 文件的水印和 logo
+    """
+    if profile is None:
+        profile = DocumentProfile(pdf)
     page_1, page_2 = 0, 1  # 需要拿来对比水印的页码  # todo parameter
     logo = []
-    page_num = len(pdf.pages)
-    port_pages = [i for i in range(page_num) if pdf.pages[i].width < pdf.pages[i].height and i != 0]
+    port_pages = profile.portrait_pages
     pt_size = len(port_pages)
-    land_pages = [i for i in range(page_num) if pdf.pages[i].width >= pdf.pages[i].height]
+    land_pages = profile.landscape_pages
     ld_size = len(land_pages)
 
     def compare_image(p1, p2, s='head'):
-        fpage = pdf.pages[p1].images
-        spage = pdf.pages[p2].images
+        fpage = profile.page_images(p1)
+        spage = profile.page_images(p2)
         fpl = len(fpage)
         spl = len(spage)
         start = 0 if s == 'head' else 1
@@ -138,3 +270,73 @@ def pdf_logo(pdf):
         compare_image(land_pages[page_1], land_pages[page_2])
 
     return logo
+
+
+def init_page_worker(file_name, open_kwargs, same, logo, config):
+    """
+    :param file_name: pdf file path, re-opened once inside each worker process
+    :param open_kwargs: pdfplumber.open keyword arguments
+    :param same: header & footer computed by the parent process
+    :param logo: watermark and logo computed by the parent process
+    :param config: depdf config class
+    """
+    _worker_context.update(
+        pdf=pdfplumber.open(file_name, **open_kwargs),
+        same=same, logo=logo, config=config, image_registry=ImageRegistry()
+    )
+
+
+def convert_page_worker(page_index):
+    """
+    :param page_index: page index starts from 0
+    :return: (page_index, page html or None, error traceback or None, page stats dict or None)
+    """
+    plumber_page = _worker_context['pdf'].pages[page_index]
+    pid = str(page_index + 1)
+    try:
+        page = DePage(plumber_page, pid=pid, same=_worker_context['same'], logo=_worker_context['logo'],
+                      config=_worker_context['config'], image_registry=_worker_context['image_registry'])
+        return page_index, page.to_html, None, page.stats.to_dict
+    except Exception:
+        return page_index, None, traceback.format_exc(), None
+    finally:
+        plumber_page.flush_cache()
+
+
+@check_config
+def pdf_pages_to_html(file_name, page_num, same=None, logo=None, open_kwargs=None, config=None):
+    """
+    :param file_name: pdf file path
+    :param page_num: number of pages to convert
+    :param same: header & footer
+    :param logo: watermark and logo
+    :param open_kwargs: pdfplumber.open keyword arguments
+    :param config: depdf config class
+    :return: generator of (page_index, page html or None, error traceback or None, page stats or None) in page order
+    a worker process which dies only fails the page it was converting, the pool is restarted for the other pages
+    """
+    workers = getattr(config, 'workers')
+    max_pages = getattr(config, 'max_pages_per_worker')
+    init_args = (file_name, open_kwargs or {}, same or [], logo or [], config)
+    pool = WorkerPool(min(workers, max(page_num, 1)), initializer=init_page_worker, initargs=init_args,
+                      max_tasks_per_worker=max_pages)
+    results, next_index = {}, 0
+    for page_index, res, e in pool.imap_unordered(convert_page_worker, ((i, (i,)) for i in range(page_num))):
+        if e is not None:
+            res = page_index, None, ''.join(traceback.format_exception_only(type(e), e)), None
+        results[page_index] = res
+        while next_index in results:
+            yield results.pop(next_index)
+            next_index += 1
+
+
+def wrap_html_pages(html_pages, pdf_class):
+    """
+    :param html_pages: iterable of page html strings in page order
+    :param pdf_class: html class of the pdf div
+    :return: generator of the pdf html chunks
+    """
+    yield '<div class="{pdf_class}">'.format(pdf_class=pdf_class)
+    for pid, html_page in enumerate(html_pages):
+        yield '<!--page-{pid}-->{html_page}'.format(pid=pid + 1, html_page=html_page)
+    yield '</div>'
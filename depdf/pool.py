@@ -0,0 +1,117 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from depdf.log import logger_init
+
+log = logger_init(__name__)
+
+
+class WorkerPool(object):
+    """
+    Process pool of isolated tasks. A worker process which dies (eg. killed for memory or crashed inside
+    pdfminer or Wand) only fails the task it was running: the pool is restarted, and the tasks which were
+    running at the same time are run again one by one to find the one which broke the pool.
+    """
+
+    def __init__(self, workers, initializer=None, initargs=(), max_tasks_per_worker=None):
+        """
+        :param workers: number of worker processes
+        :param initializer: callable run once in every new worker process
+        :param initargs: initializer arguments
+        :param max_tasks_per_worker: restart the worker processes after workers * N submitted tasks
+            to keep memory bounded, the running tasks are finished by the old processes
+        """
+        self.workers = max(workers, 1)
+        self.initializer = initializer
+        self.initargs = initargs
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self._executor = None
+        self._submitted = 0  # tasks submitted to the current executor
+
+    def __repr__(self):
+        return '<depdf.WorkerPool: {} workers>'.format(self.workers)
+
+    @property
+    def executor(self):
+        limit = self.max_tasks_per_worker
+        if self._executor is not None and limit and self._submitted >= limit * self.workers:
+            self.restart()
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=self.initializer,
+                                                 initargs=self.initargs)
+            self._submitted = 0
+        return self._executor
+
+    def submit(self, func, args):
+        try:
+            future = self.executor.submit(func, *args)
+        except BrokenProcessPool:  # a worker died after the last check
+            self.restart()
+            future = self.executor.submit(func, *args)
+        self._submitted += 1
+        return future
+
+    def restart(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def shutdown(self, wait_flag=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait_flag)
+            self._executor = None
+
+    def imap_unordered(self, func, tasks, max_in_flight=None):
+        """
+        :param func: picklable function run in the worker processes
+        :param tasks: iterable of (key, args), consumed lazily
+        :param max_in_flight: maximum number of tasks submitted and not yet yielded, defaults to 2 * workers
+        :return: generator of (key, result, exception) in completion order, the exception is
+            BrokenProcessPool if the worker process running the task died
+        """
+        max_in_flight = max(max_in_flight or self.workers * 2, 1)
+        tasks = iter(tasks)
+        pending = {}  # future => (key, args, isolated)
+        suspects = deque()  # tasks running while a worker died
+        exhausted = False
+        try:
+            while pending or suspects or not exhausted:
+                if suspects:
+                    if not pending:
+                        key, args = suspects.popleft()
+                        pending[self.submit(func, args)] = (key, args, True)
+                else:
+                    while not exhausted and len(pending) < max_in_flight:
+                        try:
+                            key, args = next(tasks)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        pending[self.submit(func, args)] = (key, args, False)
+                if not pending:
+                    continue
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    key, args, isolated = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as e:
+                        broken = True
+                        if isolated:
+                            log.error('worker process died while running task {}'.format(key))
+                            yield key, None, e
+                        else:
+                            suspects.append((key, args))
+                        continue
+                    except Exception as e:
+                        yield key, None, e
+                        continue
+                    yield key, result, None
+                if broken:
+                    self.restart()
+        finally:
+            for future in pending:
+                future.cancel()
+            self.shutdown(wait_flag=not pending)  # tasks still running on early close are not waited for
@@ -0,0 +1,265 @@
+import io
+import re
+
+from depdf.error import RenderBackendError
+from depdf.utils import construct_style
+
+markdown_escape_re = re.compile(r'([\\`*_\[\]#|<>])')
+
+
+class Renderer(object):
+    """
+    Walk the extracted object tree once and write the output into a text stream.
+    Every object is dispatched to render_{object_type}, objects without a render method are skipped.
+    """
+    page_separator = ''
+
+    def __init__(self, fp=None):
+        """
+        :param fp: writable text stream, io.StringIO by default
+        """
+        self.fp = io.StringIO() if fp is None else fp
+
+    def write(self, text):
+        self.fp.write(text)
+
+    def getvalue(self):
+        return self.fp.getvalue()
+
+    def render(self, obj):
+        render_function = getattr(self, 'render_{}'.format(getattr(obj, 'object_type', None)), None)
+        if render_function is not None:
+            render_function(obj)
+        return self
+
+    def render_objects(self, objects):
+        for obj in objects or []:
+            self.render(obj)
+
+    def render_string(self, obj):
+        """
+        :return: obj rendered into a separate string with the same backend, eg. the content of a table cell
+        """
+        return type(self)().render(obj).getvalue()
+
+    def render_pdf(self, pdf):
+        for pid, page in enumerate(pdf.iter_pages()):  # page stats are reported by iter_pages
+            if pid:
+                self.write(self.page_separator)
+            self.render(page)
+
+    def render_page(self, page):
+        objects = page.objects  # process page first so that paragraph flags are available
+        with page.stats.stage('render', objects=len(objects)):  # mini pages are processed while rendering
+            self.page_start(page)
+            self.render_objects(objects)
+            self.page_end(page)
+
+    render_mini_page = render_page
+
+    def page_start(self, page):
+        pass
+
+    def page_end(self, page):
+        pass
+
+    def render_cell(self, cell):
+        if hasattr(cell, 'text'):
+            self.write(cell.text)
+        else:
+            self.render_objects(cell.inner_objects)
+
+    @staticmethod
+    def skip_table(table):
+        """
+        :return: True if skip_empty_table is set and none of the table cells has content
+        """
+        if not getattr(table.config, 'skip_empty_table'):
+            return False
+        return not any(getattr(cell, 'text', None) or cell.inner_objects for row in table.rows for cell in row if cell)
+
+
+class HtmlRenderer(Renderer):
+
+    def render_pdf(self, pdf):
+        for chunk in pdf.iter_html():  # pages may be converted in worker processes
+            self.write(chunk)
+
+    def page_start(self, page):
+        if page.object_type == 'mini_page':
+            page_id, page_class = 'mini-page-{}'.format(page.pid), getattr(page.config, 'mini_page_class')
+        else:
+            page_id, page_class = 'page-{}'.format(page.pid), getattr(page.config, 'page_class')
+        self.write('<div id="{}" class="{}" new_para_start="{}" new_para_end="{}">'.format(
+            page_id, page_class, page.new_para_start_flag, page.new_para_end_flag
+        ))
+
+    def page_end(self, page):
+        self.write('</div>')
+
+    def render_paragraph(self, paragraph):
+        para_id = 'page-{pid}-paragraph-{para_id}'.format(pid=paragraph.pid, para_id=paragraph.para_id)
+        para_class = '{para_class} page-{pid}'.format(
+            para_class=getattr(paragraph.config, 'paragraph_class'), pid=paragraph.pid
+        )
+        style_text = construct_style(style=paragraph.style)
+        align_text = ' align="{}"'.format(paragraph.align) if paragraph.align else ''
+        self.write('<p id="{para_id}" class="{para_class}"{align_text}{style_text}>'.format(
+            para_id=para_id, para_class=para_class, style_text=style_text, align_text=align_text
+        ))
+        if hasattr(paragraph, 'text'):
+            self.write(str(paragraph.text))
+        else:
+            self.render_objects(paragraph.inner_objects)
+        self.write('</p>')
+
+    def render_text(self, text):
+        self.write(text.text)
+
+    def render_span(self, span):
+        self.write('<span class="{span_class}"{style_text}>{span_text}</span>'.format(
+            span_class=getattr(span.config, 'span_class'), span_text=span.text, style_text=construct_style(span.style)
+        ))
+
+    def render_image(self, image):
+        img_id = 'page-{pid}-image-{img_idx}'.format(pid=image.pid, img_idx=image.img_idx)
+        img_class = '{img_class} page-{pid}'.format(img_class=getattr(image.config, 'image_class'), pid=image.pid)
+        self.write('<img id="{img_id}" class="{img_class}" src="{src}" width="{percent}%"></img>'.format(
+            img_id=img_id, img_class=img_class, src=image.src, percent=min(round(image.percent), 100)
+        ))
+
+    def render_table(self, table):
+        if self.skip_table(table):
+            return
+        self.write('<table id="page-{pid}-table-{tid}" class="{table_class} page-{pid}">'.format(
+            pid=table.pid, tid=table.tid, table_class=getattr(table.config, 'table_class')
+        ))
+        spans = table.cell_spans
+        for rid, row in enumerate(table.rows):
+            self.write('<tr>')
+            for cid, cell in enumerate(row):
+                if cell is None:
+                    continue
+                row_span, col_span = spans[rid, cid]
+                self.write('<td')
+                if row_span > 1:
+                    self.write(' rowspan="{}"'.format(row_span))
+                if col_span > 1:
+                    self.write(' colspan="{}"'.format(col_span))
+                self.write('>')
+                self.render(cell)
+                self.write('</td>')
+            self.write('</tr>')
+        self.write('</table>')
+
+
+class TextRenderer(Renderer):
+    """
+    Plain text, paragraphs and tables are separated by blank lines, table cells by tabs and pages by form feeds.
+    """
+    page_separator = '\f'
+
+    def render_paragraph(self, paragraph):
+        if hasattr(paragraph, 'text'):
+            self.write(self.escape(str(paragraph.text)))
+        else:
+            for oid, obj in enumerate(paragraph.inner_objects):
+                if oid:
+                    self.write(' ' if obj.object_type == 'span' else '\n')  # span continues the previous line
+                self.render(obj)
+        self.write('\n\n')
+
+    def render_text(self, text):
+        self.write(self.escape(text.text))
+
+    render_span = render_text
+
+    def render_cell(self, cell):
+        if hasattr(cell, 'text'):
+            self.write('\n'.join(self.escape(i) for i in cell.text.split('<br>')))
+        else:
+            self.render_objects(cell.inner_objects)
+
+    def cell_string(self, cell):
+        return ' '.join(self.render_string(cell).split()) if cell else ''
+
+    def table_grid(self, table):
+        """
+        :return: rows of single line cell strings, positions covered by merged cells are empty
+        """
+        column_num = max([len(row) for row in table.rows] or [0])
+        return [[self.cell_string(cell) for cell in row] + [''] * (column_num - len(row)) for row in table.rows]
+
+    def render_table(self, table):
+        if self.skip_table(table):
+            return
+        for row in self.table_grid(table):
+            self.write('\t'.join(row) + '\n')
+        self.write('\n')
+
+    @staticmethod
+    def escape(text):
+        return text
+
+
+class MarkdownRenderer(TextRenderer):
+    """
+    Markdown, tables are written as pipe tables with the first row as header, merged cells are not spanned.
+    """
+    page_separator = '---\n\n'
+
+    def render_image(self, image):
+        self.write('![page-{}-image-{}]({})\n\n'.format(image.pid, image.img_idx, image.src))
+
+    def cell_string(self, cell):
+        if not cell:
+            return ''
+        return '<br>'.join(i.strip() for i in self.render_string(cell).splitlines() if i.strip())
+
+    def render_table(self, table):
+        if self.skip_table(table):
+            return
+        grid = self.table_grid(table)
+        if not grid:
+            return
+        for rid, row in enumerate(grid):
+            self.write('| {} |\n'.format(' | '.join(row)))
+            if rid == 0:
+                self.write('|{}|\n'.format('|'.join([' --- '] * len(row))))
+        self.write('\n')
+
+    @staticmethod
+    def escape(text):
+        return markdown_escape_re.sub(r'\\\1', text)
+
+
+RENDERERS = {
+    'html': HtmlRenderer,
+    'markdown': MarkdownRenderer,
+    'text': TextRenderer,
+}
+
+
+def get_renderer(backend):
+    """
+    :param backend: renderer name in RENDERERS, eg. 'markdown', or a Renderer subclass
+    :return: Renderer subclass
+    """
+    if isinstance(backend, type) and issubclass(backend, Renderer):
+        return backend
+    if backend not in RENDERERS:
+        raise RenderBackendError(backend)
+    return RENDERERS[backend]
+
+
+def render(obj, fp=None, backend='html'):
+    """
+    :param obj: depdf object, eg. DePDF, DePage, Table or Paragraph
+    :param fp: writable text stream, the rendered string is returned if not set
+    :param backend: renderer name in RENDERERS or a Renderer subclass
+    :return: rendered string if fp is not set
+    """
+    renderer = get_renderer(backend)(fp)
+    renderer.render(obj)
+    if fp is None:
+        return renderer.getvalue()
@@ -5,12 +5,14 @@ import logging
 DEFAULT_LOGO_FLAG = True
 DEFAULT_HEADER_FOOTER_FLAG = True
 DEFAULT_TEMP_DIR_PREFIX = 'temp_depdf'
+DEFAULT_MAX_CACHED_PAGES = None  # => depdf.pdf.DePDF.pages, None keeps all pages, a number releases the least recently used ones
 
 # general page extraction config
 DEFAULT_TABLE_FLAG = True
 DEFAULT_PARAGRAPH_FLAG = True
 DEFAULT_IMAGE_FLAG = True
 DEFAULT_RESOLUTION = 144
+DEFAULT_NUMERIC_BACKEND = 'decimal'  # 'decimal' or 'float', number type of depdf geometry, pdfplumber stays on Decimal
 DEFAULT_PAGE_NUM_TOP_FRACTION = Decimal('0.75')
 DEFAULT_PAGE_NUM_LEFT_FRACTION = Decimal('0.44')
 DEFAULT_PAGE_NUM_RIGHT_FRACTION = Decimal('0.56')
@@ -20,12 +22,15 @@ DEFAULT_MULTIPLE_COLUMNS_FLAG = True
 DEFAULT_MAX_COLUMNS = 3
 DEFAULT_COLUMN_REGION_HALF_WIDTH = 4
 DEFAULT_MIN_COLUMN_REGION_OBJECTS = 1
+DEFAULT_MIN_COLUMN_WIDTH_FRACTION = Decimal('0.25')  # => depdf.page_tools.find_column_separators
+DEFAULT_MIN_COLUMN_OBJECTS_FRACTION = Decimal('0.1')  # => depdf.page_tools.find_column_separators
 
 # char
 DEFAULT_CHAR_OVERLAP_SIZE = 3  # => depdf.page_tools.remove_duplicate_chars
 DEFAULT_CHAR_SIZE = Decimal('12')  # => depdf.page_tools.calculate_average_char_size
 DEFAULT_CHAR_SIZE_UPPER = Decimal('30')  # => depdf.page_tools.calculate_average_char_size
 DEFAULT_CHAR_SIZE_LOWER = Decimal('3')  # => depdf.page_tools.calculate_average_char_size
+DEFAULT_CHAR_INDEX_CELL_SIZE = 20  # => depdf.page_tools.CharIndex, grid cell size of the page char index
 
 # table extraction config
 DEFAULT_TABLE_CELL_MERGE_TOLERANCE = 5
@@ -35,13 +40,25 @@ DEFAULT_MAX_DOUBLE_LINE_TOLERANCE = 3  # => depdf.page_tools.remove_single_lines
 DEFAULT_MIN_DOUBLE_LINE_TOLERANCE = Decimal('0.05')  # => depdf.page_tools.remove_single_lines
 DEFAULT_VERTICAL_DOUBLE_LINE_TOLERANCE = Decimal('2')  # => depdf.page_tools.remove_single_lines
 DEFAULT_SKIP_EMPTY_TABLE = False
+DEFAULT_CELL_INDEX_CELL_SIZE = 20  # => depdf.page_tools.CellIndex, grid cell size of the table cell index
 DEFAULT_ADD_VERTICAL_LINES_FLAG = False  # 是否为表格自动增加可能缺失的竖线
 DEFAULT_ADD_HORIZONTAL_LINES_FLAG = False  # 是否为表格自动增加可能缺失的横线
 DEFAULT_ADD_HORIZONTAL_LINE_TOLERANCE = Decimal('0.1')  # 增加表格顶部和底部的横线的参数
 
 # image
 DEFAULT_MIN_IMAGE_SIZE = 80  # minimum width or height of image which to be ignored
+DEFAULT_IMAGE_DEDUPE_FLAG = False  # repeated embedded images are rendered once and share the same file
 DEFAULT_IMAGE_RESOLUTION = 300
+DEFAULT_MAX_CONCURRENT_RENDERS = 1  # => depdf.page.DePage.extract_images, images are rendered inline unless raised
+
+# parallel page conversion
+DEFAULT_WORKERS = 1  # => depdf.pdf.DePDF.extract_html_pages, number of worker processes
+DEFAULT_MAX_PAGES_PER_WORKER = None  # recycle worker process after N pages to keep memory bounded
+DEFAULT_ASYNC_MAX_CONCURRENCY = 4  # => depdf.aio, maximum blocking conversion calls running at the same time
+
+# on-disk result cache
+DEFAULT_CACHE_DIR = None  # => depdf.cache.PageCache, cache is disabled if not set
+DEFAULT_CACHE_SIZE_LIMIT = 1 << 30  # maximum cache size in bytes, least recently used pages are evicted
 
 # head & tail extraction
 DEFAULT_HEAD_TAIL_PAGE_OFFSET_PERCENT = 0.1  # head/tail max-height percent form top & bottom of page
@@ -0,0 +1,93 @@
+from contextlib import contextmanager
+import math
+import time
+
+STATS_PERCENTILES = (50, 90, 99)
+
+
+class PageStats(object):
+    """
+    Wall time (seconds) and input / output object counts of every processing stage of a page.
+    """
+
+    def __init__(self, pid='1'):
+        self.pid = pid
+        self.stages = {}  # stage name => {'time': seconds, count name: count}
+        self.children = []  # stats of mini pages
+
+    def __repr__(self):
+        return '<depdf.PageStats: ({}, {:.3f}s)>'.format(self.pid, self.total_time)
+
+    @contextmanager
+    def stage(self, name, **counts):
+        """
+        :param name: stage name
+        :param counts: stage input counts, output counts can be added to the yielded record
+        """
+        record = self.record(name, **counts)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['time'] += time.perf_counter() - start
+
+    def record(self, name, **counts):
+        record = self.stages.setdefault(name, {'time': 0})
+        record.update(counts)
+        return record
+
+    @property
+    def total_time(self):
+        return sum(i['time'] for i in self.stages.values())
+
+    @property
+    def to_dict(self):
+        return {
+            'pid': self.pid,
+            'total_time': self.total_time,
+            'stages': {k: dict(v) for k, v in self.stages.items()},
+            'children': [i.to_dict for i in self.children],
+        }
+
+
+def percentile(sorted_values, percent):
+    """
+    :param sorted_values: sorted list of numbers
+    :param percent: percentile from 0 to 100, nearest-rank method
+    :return: percentile value
+    """
+    if not sorted_values:
+        return 0
+    rank = max(int(math.ceil(percent / 100 * len(sorted_values))), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize_values(values):
+    sorted_values = sorted(values)
+    summary = {'total': sum(sorted_values), 'max': sorted_values[-1] if sorted_values else 0}
+    for p in STATS_PERCENTILES:
+        summary['p{}'.format(p)] = percentile(sorted_values, p)
+    return summary
+
+
+def aggregate_page_stats(page_stats):
+    """
+    :param page_stats: list of PageStats.to_dict of the document pages
+    :return: document totals and percentiles over pages, time of each stage and the summed stage counts
+    """
+    stages = {}
+    for page in page_stats:
+        for name, record in page['stages'].items():
+            stage = stages.setdefault(name, {'times': [], 'counts': {}})
+            stage['times'].append(record['time'])
+            for key, value in record.items():
+                if key != 'time' and isinstance(value, (int, float)) and not isinstance(value, bool):
+                    stage['counts'][key] = stage['counts'].get(key, 0) + value
+    return {
+        'pages': len(page_stats),
+        'time': summarize_values([i['total_time'] for i in page_stats]),
+        'stages': {
+            name: dict(time=summarize_values(stage['times']), pages=len(stage['times']), **stage['counts'])
+            for name, stage in stages.items()
+        },
+    }
@@ -1,9 +1,13 @@
+from decimal import Decimal
+
 from bs4 import BeautifulSoup
 
+from depdf.error import NumericBackendError
 from depdf.log import logger_init
 from depdf.settings import DEFAULT_HTML_PARSER
 
 log = logger_init(__name__)
+NUMBER_TYPES = {'decimal': Decimal, 'float': float}
 
 
 def convert_html_to_soup(html, parser=DEFAULT_HTML_PARSER):
@@ -14,6 +18,27 @@ def convert_soup_to_html(soup):
     return str(soup)
 
 
+def get_number_type(numeric_backend='decimal'):
+    """
+    :param numeric_backend: 'decimal' or 'float'
+    :return: number type used in geometry calculation
+    """
+    if numeric_backend not in NUMBER_TYPES:
+        raise NumericBackendError(numeric_backend)
+    return NUMBER_TYPES[numeric_backend]
+
+
+def convert_object_numbers(obj, number_type=Decimal):
+    """将 pdfplumber 对象中的 Decimal 数值转为 numeric backend 的数值类型
+    :param obj: pdfplumber object (dict)
+    :param number_type: Decimal or float
+    :return: obj itself in decimal mode, a converted copy otherwise
+    """
+    if number_type is Decimal:
+        return obj
+    return {k: number_type(v) if isinstance(v, Decimal) else v for k, v in obj.items()}
+
+
 def calc_overlap(a, b):
     """检查两个线段的重叠部分长度
     :param a: [a_lower, a_upper]
@@ -33,6 +58,18 @@ def calc_overlap(a, b):
     return abs(overlap_length)
 
 
+def freeze_object(obj):
+    """将 dict / list 转为可哈希的 tuple，用于按值去重
+    :param obj: pdfplumber object (dict), list or scalar value
+    :return: hashable value, equal objects give equal values
+    """
+    if isinstance(obj, dict):
+        return dict, tuple(sorted((k, freeze_object(v)) for k, v in obj.items()))
+    if isinstance(obj, (list, tuple)):
+        return type(obj), tuple(freeze_object(i) for i in obj)
+    return obj
+
+
 def calc_bbox(objects):
     x0_list, top_list, x1_list, bottom_list = [], [], [], []
     for inner in objects:
@@ -0,0 +1,315 @@
+"""
+Micro benchmarks of depdf page tools with synthetic inputs of controlled size.
+
+Every case is timed for growing input sizes and the empirical scaling exponent
+(slope of log(time) against log(size)) is reported, cases which scale worse than
+their limit are reported as failures, eg. an accidental quadratic loop.
+
+usage: python test/benchmark.py [--quick] [case ...]
+the repository root is added to sys.path, so it runs from a checkout without installing depdf
+"""
+from decimal import Decimal
+import math
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from depdf.components.table import Cell, Table
+from depdf.page_tools import (
+    CellIndex, add_horizontal_lines, analyze_char_size, calculate_paragraph_border, edges_to_lines,
+    find_column_separators, merge_page_figures, remove_duplicate_chars, remove_single_lines
+)
+from depdf.render import HtmlRenderer
+
+SIZES = (1000, 10000, 100000)
+QUICK_SIZES = (1000, 3000, 10000)
+MIN_SAMPLE_TIME = 0.05  # repeat fast calls until the sample takes at least this long (seconds)
+DEFAULT_MAX_EXPONENT = 1.3  # linear or n*log(n) algorithms stay well below this
+
+PAGE_WIDTH = Decimal('595.000')
+LINE_HEIGHT = 14
+CHARS_PER_LINE = 80
+
+
+def d(value):
+    return Decimal(value).quantize(Decimal('0.001'))
+
+
+def gen_chars(n, overprint=1, seed=1):
+    """
+    :param n: number of distinct chars, laid out in lines on a (very long) page
+    :param overprint: times every char is printed, > 1 simulates bold text made of overprinted chars
+    :param seed: random seed
+    :return: list of pdfplumber like char dicts
+    """
+    rnd = random.Random(seed)
+    chars = []
+    for idx in range(n):
+        line, col = divmod(idx, CHARS_PER_LINE)
+        size = rnd.choice((10, 10, 10, 12, 9))
+        x0, top = 40 + col * 6, 40 + line * LINE_HEIGHT
+        for k in range(overprint):
+            offset = Decimal('0.2') * k
+            char = {
+                'object_type': 'char', 'text': rnd.choice('abcdefghij'), 'fontname': 'Font', 'upright': 1,
+                'size': d(size), 'adv': d('0.5'), 'width': d(size * Decimal('0.5')), 'height': d(size),
+                'x0': d(x0 + offset), 'x1': d(x0 + offset + 5), 'top': d(top), 'bottom': d(top + size),
+            }
+            char['y0'], char['y1'], char['doctop'] = -char['bottom'], -char['top'], char['top']
+            chars.append(char)
+    return chars
+
+
+def gen_edges(n, duplicate_ratio=0.5, seed=2):
+    """
+    :param n: number of edges, horizontal and vertical table rulings
+    :param duplicate_ratio: share of exact duplicated edges
+    :param seed: random seed
+    :return: list of pdfplumber like edge dicts
+    """
+    rnd = random.Random(seed)
+    edges = []
+    while len(edges) < n:
+        if edges and rnd.random() < duplicate_ratio:
+            edges.append(dict(rnd.choice(edges)))
+            continue
+        idx = len(edges)
+        if idx % 2:
+            x, top = d(40 + (idx % 50) * 10), d(40 + (idx // 50) * 20)
+            edges.append({'orientation': 'v', 'x0': x, 'x1': x, 'top': top, 'bottom': top + 20, 'y0': -top - 20,
+                          'y1': -top, 'width': d(0), 'height': d(20)})
+        else:
+            y = d(40 + (idx // 50) * 20)
+            x0 = d(40 + (idx % 50) * 10)
+            edges.append({'orientation': 'h', 'x0': x0, 'x1': x0 + 10, 'top': y, 'bottom': y, 'y0': -y,
+                          'y1': -y, 'width': d(10), 'height': d(0)})
+    return edges
+
+
+def gen_dotted_lines(n):
+    """
+    :param n: number of short segments of dotted leader lines, every other row is doubled
+    :return: list of horizontal line dicts
+    """
+    lines = []
+    per_row = 150
+    for idx in range(n):
+        row, col = divmod(idx, per_row)
+        y = d(40 + (row // 2) * 12 + (row % 2) * Decimal('1.5'))
+        x0 = d(60 + col * 3)
+        lines.append({'orientation': 'h', 'x0': x0, 'x1': x0 + 1, 'top': y, 'bottom': y, 'y0': -y, 'y1': -y,
+                      'width': d(1), 'height': d(0)})
+    return lines
+
+
+def gen_table_lines(n):
+    """
+    :param n: number of vertical rulings of a long table, horizontal rulings close top & bottom
+    :return: (v_lines, h_lines)
+    """
+    v_lines = []
+    for idx in range(n):
+        row, col = divmod(idx, 10)
+        x, top = d(40 + col * 50), d(40 + row * 15)
+        v_lines.append({'orientation': 'v', 'x0': x, 'x1': x, 'top': top, 'bottom': top + 15, 'height': d(15)})
+    h_lines = [
+        {'orientation': 'h', 'x0': d(40), 'x1': d(490), 'top': d(40 + row * 15), 'bottom': d(40 + row * 15),
+         'width': d(450)}
+        for row in range(1, n // 10)
+    ]
+    return v_lines, h_lines
+
+
+def gen_images(n):
+    images = []
+    for idx in range(n):
+        top = d(40 + idx * 100)
+        images.append({'object_type': 'image', 'x0': d(60), 'x1': d(400), 'top': top, 'bottom': top + 90,
+                       'width': d(340), 'height': d(90), 'srcsize': (d(680), d(180)), 'bits': 8,
+                       'name': 'Im{}'.format(idx)})
+    return images
+
+
+def gen_phrases(n):
+    phrases = []
+    for idx in range(n):
+        top = d(40 + idx * LINE_HEIGHT)
+        x0 = d(40 if idx % 7 else 64)
+        phrases.append({'text': 'phrase {}'.format(idx), 'x0': x0, 'x1': d(555 if idx % 7 != 6 else 300),
+                        'top': top, 'bottom': top + 10})
+    return phrases
+
+
+def gen_table(n, columns=10):
+    rows = []
+    for rid in range(max(n // columns, 1)):
+        rows.append([
+            Cell(bbox=(d(50 * cid), d(15 * rid), d(50 * cid + 50), d(15 * rid + 15)),
+                 text='cell {}-{}'.format(rid, cid))
+            for cid in range(columns)
+        ])
+    return Table(rows)
+
+
+def case_remove_duplicate_chars(n):
+    chars = gen_chars(n)
+    return lambda: remove_duplicate_chars(list(chars), overlap_size=3)
+
+
+def case_remove_duplicate_chars_overprinted(n):
+    chars = gen_chars(n // 3, overprint=3)
+    return lambda: remove_duplicate_chars(list(chars), overlap_size=3)
+
+
+def case_edges_to_lines(n):
+    edges = gen_edges(n)
+    return lambda: edges_to_lines(edges)
+
+
+def case_remove_single_lines(n):
+    h_lines, _ = edges_to_lines(gen_edges(n))
+    return lambda: remove_single_lines(h_lines, max_double=3, min_double=Decimal('0.05'), vertical_double=2)
+
+
+def case_remove_single_lines_dotted(n):
+    lines = gen_dotted_lines(n)
+    return lambda: remove_single_lines(lines, max_double=3, min_double=Decimal('0.05'), vertical_double=2)
+
+
+def case_add_horizontal_lines(n):
+    v_lines, h_lines = gen_table_lines(n)
+    return lambda: add_horizontal_lines(v_lines, h_lines)
+
+
+def case_merge_page_figures(n):
+    images = gen_images(n // 10)
+    tables = [SimpleNamespace(bbox=(d(0), d(40 + t * 50000), PAGE_WIDTH, d(10040 + t * 50000))) for t in range(3)]
+    logo = [{'srcsize': (d(1), d(1)), 'height': d(1), 'width': d(1), 'bits': 1}]
+    page = SimpleNamespace(figures=[], images=images)
+
+    def run():
+        page.images = [dict(i) for i in images]
+        return merge_page_figures(page, tables_raw=tables, logo=logo)
+    return run
+
+
+def case_calculate_paragraph_border(n, image_text=False):
+    phrases = gen_phrases(n // 10)
+    height = d(80 + len(phrases) * LINE_HEIGHT)
+    tables = [SimpleNamespace(bbox=(d(0), d(100 + t * 1000), PAGE_WIDTH, d(200 + t * 1000))) for t in range(n // 1000)]
+    images = [{'bbox': (d(40), d(300), d(400), d(400))}]
+    if image_text:  # scanned page, the whole text layer lies on an image
+        images.append({'bbox': (d(0), d(0), PAGE_WIDTH, height)})
+
+    def run():
+        page = SimpleNamespace(
+            tables_raw=tables, images_raw=images, ave_cs=Decimal(10), number_type=Decimal,
+            pagination_phrases=[], phrases=phrases, same=[], same_tmp=[], width=PAGE_WIDTH, height=height,
+            _table_phrases=[], _image_phrases=[], store=None,
+        )
+        return calculate_paragraph_border(page)
+    return run
+
+
+def case_calculate_paragraph_border_image_text(n):
+    return case_calculate_paragraph_border(n, image_text=True)
+
+
+def case_analyze_char_size(n):
+    chars = gen_chars(n)
+    return lambda: analyze_char_size(chars)
+
+
+def case_assign_cell_objects(n):
+    chars = gen_chars(n)
+    rows = n // CHARS_PER_LINE + 1
+    cells = [
+        (d(40 + col * 60), d(40 + row * LINE_HEIGHT), d(100 + col * 60), d(40 + (row + 1) * LINE_HEIGHT))
+        for row in range(rows) for col in range(CHARS_PER_LINE * 6 // 60)
+    ]
+    return lambda: CellIndex(cells).assign({'char': chars})
+
+
+def case_find_column_separators(n):
+    chars = gen_chars(n)
+    for char in chars[CHARS_PER_LINE // 2::CHARS_PER_LINE]:
+        char['text'] = ' '  # gutter in the middle of every line
+    chars = [i for i in chars if i['text'] != ' ']
+    return lambda: find_column_separators(chars, PAGE_WIDTH, max_columns=3, half_width=2)
+
+
+def case_render_table(n):
+    table = gen_table(n // 10)
+    return lambda: HtmlRenderer().render(table).getvalue()
+
+
+CASES = {
+    'remove_duplicate_chars': case_remove_duplicate_chars,
+    'remove_duplicate_chars[overprinted]': case_remove_duplicate_chars_overprinted,
+    'edges_to_lines': case_edges_to_lines,
+    'remove_single_lines': case_remove_single_lines,
+    'remove_single_lines[dotted]': case_remove_single_lines_dotted,
+    'add_horizontal_lines': case_add_horizontal_lines,
+    'merge_page_figures': case_merge_page_figures,
+    'calculate_paragraph_border': case_calculate_paragraph_border,
+    'calculate_paragraph_border[image_text]': case_calculate_paragraph_border_image_text,
+    'analyze_char_size': case_analyze_char_size,
+    'assign_cell_objects': case_assign_cell_objects,
+    'find_column_separators': case_find_column_separators,
+    'render_table': case_render_table,
+}
+
+
+def time_call(func):
+    """
+    :param func: function without arguments
+    :return: best seconds per call
+    """
+    best, total, calls = None, 0, 0
+    while total < MIN_SAMPLE_TIME or calls < 3:
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        total += elapsed
+        calls += 1
+    return best
+
+
+def scaling_exponent(sizes, seconds):
+    """
+    :return: least squares slope of log(seconds) against log(sizes)
+    """
+    xs = [math.log(i) for i in sizes]
+    ys = [math.log(max(i, 1e-9)) for i in seconds]
+    x_mean, y_mean = sum(xs) / len(xs), sum(ys) / len(ys)
+    numerator = sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys))
+    denominator = sum((x - x_mean) ** 2 for x in xs)
+    return numerator / denominator
+
+
+def run_case(name, sizes, max_exponent=DEFAULT_MAX_EXPONENT):
+    seconds = [time_call(CASES[name](n)) for n in sizes]
+    exponent = scaling_exponent(sizes, seconds)
+    timings = '  '.join('n={}: {:.2f}ms'.format(n, s * 1000) for n, s in zip(sizes, seconds))
+    status = 'ok' if exponent <= max_exponent else 'FAIL'
+    print('{:<40} {:<4} exponent={:.2f}  {}'.format(name, status, exponent, timings))
+    return exponent <= max_exponent
+
+
+def main(argv):
+    sizes = QUICK_SIZES if '--quick' in argv else SIZES
+    names = [i for i in argv if not i.startswith('--')] or list(CASES)
+    failures = [name for name in names if not run_case(name, sizes)]
+    if failures:
+        print('scaling regressions: {}'.format(', '.join(failures)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TEST_DIR))  # run the tests from a checkout without installing depdf
+
+from depdf import Config  # noqa: E402
+
+TEST_PDF = os.path.join(TEST_DIR, 'test.pdf')  # page 2 has a table
+TEST_MC_PDF = os.path.join(TEST_DIR, 'test_mc.pdf')  # single page of two columns
+
+
+@pytest.fixture
+def config(tmp_path):
+    # rendering page images needs ImageMagick, the behaviour tests only look at text, tables and paragraphs
+    return Config(image_flag=False, temp_dir_prefix=str(tmp_path / 'temp_depdf'))
@@ -0,0 +1,15 @@
+import pytest
+
+from benchmark import CASES, scaling_exponent
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_benchmark_case(name):
+    CASES[name](300)()  # every case builds its input and runs at a small size
+
+
+def test_scaling_exponent():
+    sizes = (1000, 10000, 100000)
+    assert scaling_exponent(sizes, [n * 1e-6 for n in sizes]) == pytest.approx(1)
+    assert scaling_exponent(sizes, [n * n * 1e-9 for n in sizes]) == pytest.approx(2)
+    assert scaling_exponent(sizes, [0.001 for _ in sizes]) == pytest.approx(0)
@@ -0,0 +1,471 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import csv
+from decimal import Decimal
+import io
+import json
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import TEST_MC_PDF, TEST_PDF
+from depdf import (
+    Config, DePDF, DePage, convert_batch, convert_page_to_html, convert_page_to_html_async, convert_pages_to_html,
+    convert_pdf_tables_to_csv, convert_pdf_to_html, convert_pdf_to_html_async, convert_pdf_to_markdown,
+    extract_page_tables, extract_tables, iter_html_pages_async
+)
+from depdf import api, page as page_module, pdf_tools
+from depdf.cache import PageCache
+from depdf.error import RenderBackendError
+from depdf.export import iter_records, write_jsonl
+from depdf.page_tools import ImageRegistry, get_render_executor
+from depdf.pdf_tools import DocumentProfile, pdf_profile
+from depdf.render import Renderer
+
+
+def crash_on_second_page(plumber_page, pid='1', **kwargs):
+    if pid == '2':
+        os._exit(1)  # the worker process dies as on an out of memory kill
+    return DePage(plumber_page, pid=pid, **kwargs)
+
+
+class CrashingDePDF(DePDF):
+    @classmethod
+    def load(cls, file_name, *args, **kwargs):
+        if file_name == TEST_MC_PDF:
+            os._exit(1)
+        return DePDF.load(file_name, *args, **kwargs)
+
+
+def processed_page(pdf, index):
+    """
+    :return: processed page of the pdf, the first column mini page of multi column pages
+    """
+    page = pdf.pages[index]
+    if page.multi_column_separator:
+        page = page.objects[0]
+    page.objects
+    return page
+
+
+@pytest.mark.parametrize('path', [TEST_PDF, TEST_MC_PDF])
+def test_parallel_pages(path, config):
+    with DePDF.load(path, config=config) as pdf:
+        html = pdf.to_html
+    with DePDF.load(path, config=config.copy(workers=2, max_pages_per_worker=1)) as pdf:
+        assert pdf.to_html == html
+        assert pdf.page_errors == {}
+
+
+def test_parallel_pages_worker_died(config, monkeypatch):
+    with DePDF.load(TEST_PDF, config=config) as pdf:
+        html_pages = pdf.html_pages
+    monkeypatch.setattr(pdf_tools, 'DePage', crash_on_second_page)  # inherited by the forked worker processes
+    with DePDF.load(TEST_PDF, config=config.copy(workers=2)) as pdf:
+        assert pdf.html_pages == [html_pages[0], '']
+        assert list(pdf.page_errors) == ['2']
+        assert 'BrokenProcessPool' in pdf.page_errors['2']
+
+
+def test_stream_html(config):
+    with DePDF.load(TEST_PDF, config=config) as pdf:
+        html = pdf.to_html
+    with DePDF.load(TEST_PDF, config=config) as pdf:
+        chunks = list(pdf.iter_html())
+        assert '_pages' not in pdf.__dict__ and '_html_pages' not in pdf.__dict__  # nothing is kept
+    assert len(chunks) == 4 and ''.join(chunks) == html
+    fp = io.StringIO()
+    with DePDF.load(TEST_PDF, config=config) as pdf:
+        pdf.write_html(fp)
+    assert fp.getvalue() == html
+
+
+@pytest.mark.parametrize('path', [TEST_PDF, TEST_MC_PDF])
+@pytest.mark.parametrize('kwargs', [{}, {'add_horizontal_lines_flag': True, 'curved_line_flag': True}])
+def test_float_numeric_backend(path, kwargs, config):
+    config = config.copy(**kwargs)
+    with DePDF.load(path, config=config) as pdf:
+        html = pdf.to_html
+        tables = [len(page.tables) for page in pdf.pages]
+    with DePDF.load(path, config=config.copy(numeric_backend='float')) as pdf:
+        assert pdf.to_html == html
+        assert [len(page.tables) for page in pdf.pages] == tables
+        page = processed_page(pdf, -1)
+        assert page.phrases and all(isinstance(i['top'], float) for i in page.phrases)
+        assert isinstance(page.ave_cs, float)
+
+
+@pytest.mark.parametrize('path', [TEST_PDF, TEST_MC_PDF])
+def test_numpy_page_store(path, config, monkeypatch):
+    pytest.importorskip('numpy')
+    config = config.copy(numeric_backend='float')
+    with DePDF.load(path, config=config) as pdf:
+        html = pdf.to_html
+        assert processed_page(pdf, 0).store is not None
+    monkeypatch.setattr(page_module, 'create_page_store', lambda chars, number_type=None: None)
+    with DePDF.load(path, config=config) as pdf:
+        assert pdf.to_html == html
+
+
+def test_page_cache_round_trip(tmp_path):
+    cache = PageCache(str(tmp_path / 'cache'))
+    value = {'bbox': (Decimal('1.5'), Decimal('2')), 'items': [1, 0.5, 'text', None, True], 'nested': {'a': []}}
+    assert cache.get('key') is None
+    cache.set('key', value)
+    assert cache.get('key') == value
+    assert isinstance(cache.get('key')['bbox'], tuple)
+    cache.set('object', {'value': object()})  # unsupported values are not written
+    assert cache.get('object') is None
+
+
+def test_page_cache_stores_json(tmp_path):
+    cache = PageCache(str(tmp_path / 'cache'))
+    cache.set('key', {'number': Decimal('3.25')})
+    with open(cache.db_path, 'rb') as f:
+        assert b'{"number":{"__decimal__":"3.25"}}' in f.read()
+
+
+@pytest.mark.parametrize('path', [TEST_PDF, TEST_MC_PDF])
+def test_page_cache_hit(path, config, tmp_path):
+    config = config.copy(cache_dir=str(tmp_path / 'cache'))
+    with DePDF.load(path, config=config) as pdf:
+        html = pdf.to_html
+    with DePDF.load(path, config=config) as pdf:
+        assert pdf.to_html == html
+        for page_stats in pdf.page_stats:
+            assert page_stats['stages']['cache_read']['hit']
+            assert 'multi_column_check' not in page_stats['stages']
+
+
+@pytest.mark.parametrize('numeric_backend', ['decimal', 'float'])
+def test_page_cache_mini_pages(numeric_backend, config, tmp_path):
+    config = config.copy(cache_dir=str(tmp_path / 'cache'), numeric_backend=numeric_backend)
+    with DePDF.load(TEST_MC_PDF, config=config) as pdf:
+        mini_pages = pdf.pages[0].objects
+        sizes = [(i.bbox, i.width, i.height) for i in mini_pages]
+    with DePDF.load(TEST_MC_PDF, config=config) as pdf:
+        restored = pdf.pages[0].objects
+        assert [(i.bbox, i.width, i.height) for i in restored] == sizes
+        with pytest.raises(AttributeError, match='page cache'):
+            restored[0].page
+
+
+def test_config_is_immutable():
+    config = Config(table_class='table')
+    with pytest.raises(AttributeError):
+        config.table_class = 'other'
+    assert config.copy() is config.copy(table_class='table') is config
+    copied = config.copy(table_flag=False)
+    assert copied.table_flag is False and config.table_flag is True
+    assert copied.fingerprint != config.fingerprint
+    assert config.copy(workers=4, page_class='page').fingerprint == config.fingerprint
+    assert pickle.loads(pickle.dumps(config)) == config
+
+
+def test_config_update_raises():
+    config = Config()
+    with pytest.raises(AttributeError, match='copy'):
+        config.update(table_flag=False)
+    assert config.table_flag is True
+
+
+def test_rendering_config_change(config):
+    with DePDF.load(TEST_PDF, config=config) as pdf:
+        page = pdf.pages[0]
+        objects, html = page.objects, page.html
+        page.config = page.config.copy(paragraph_class='para', table_class='table')
+        assert page.objects is objects
+        assert page.html != html and 'class="para page-1"' in page.html and 'pdf-paragraph' not in page.html
+        page.config = page.config.copy(paragraph_flag=False)  # extraction change
+        assert page.__dict__.get('_objects') is None
+        assert page.objects is not objects
+
+    with DePDF.load(TEST_PDF, config=config) as pdf:
+        html, pages = pdf.html, [i.objects for i in pdf.pages]
+        profile = pdf.profile
+        pdf.config = pdf.config.copy(table_class='table')
+        assert pdf.profile is profile
+        assert all(i.objects is j for i, j in zip(pdf.pages, pages))
+        assert pdf.html == html.replace('pdf-table', 'table') != html
+
+
+def test_document_profile(config, tmp_path):
+    with DePDF.load(TEST_PDF, config=config) as pdf:
+        pages = pdf.pdf.pages
+        # the first portrait page is skipped as the cover, pages 1 and 2 are sampled
+        profile = pdf_profile(SimpleNamespace(pages=pages * 2), config=config)
+        assert profile.page_sizes == [(i.width, i.height) for i in pages * 2]
+        assert profile.portrait_pages == [1, 2, 3]
+        assert profile.object_counts == {
+            1: {kind: len(objs) for kind, objs in pages[1].objects.items()},
+            2: {kind: len(objs) for kind, objs in pages[0].objects.items()},
+        }
+    cache = PageCache(str(tmp_path / 'cache'))
+    cache.set('profile', profile.to_dict)
+    restored = DocumentProfile.from_dict(cache.get('profile'), config=config)
+    assert restored.to_dict == profile.to_dict
+    assert restored.object_counts == profile.object_counts
+
+
+class FakeRenderer(object):
+    """
+    Records the image renders of depdf.page.render_image, the png files are not written.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.files, self.threads = [], set()
+        self.running = self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, image_page, img_file, resolution):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+            self.files.append(img_file)
+            self.threads.add(threading.current_thread().name)
+        return img_file
+
+
+def test_render_executor_bound():
+    renderer = FakeRenderer(delay=0.02)
+    executor = get_render_executor(2)
+    assert get_render_executor(2) is executor
+    for future in [executor.submit(renderer, None, 'image_{}.png'.format(i), 72) for i in range(8)]:
+        future.result()
+    assert len(renderer.files) == 8
+    assert renderer.peak == 2
+    assert all(i.startswith('depdf-render') for i in renderer.threads)
+
+
+def render_in_child(max_renders):
+    return get_render_executor(max_renders).submit(os.getpid).result(timeout=5)
+
+
+def test_render_executor_after_fork():
+    get_render_executor(2).submit(time.sleep, 0).result()  # the parent pool has running threads
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('fork')) as pool:
+        assert pool.submit(render_in_child, 2).result() != os.getpid()
+
+
+@pytest.mark.parametrize('max_renders', [1, 3])
+def test_page_image_renders(max_renders, config, monkeypatch):
+    renderer = FakeRenderer(delay=0.02)
+    monkeypatch.setattr(page_module, 'render_image', renderer)
+    config = config.copy(image_flag=True, min_image_size=0, max_concurrent_renders=max_renders)
+    with DePDF.load(TEST_PDF, config=config) as pdf:
+        page = pdf.pages[0]
+        srcs = [i.src for i in page.objects if i.object_type == 'image']
+        assert srcs and renderer.files == srcs  # joined before the page objects are returned
+        assert page.stats.stages['images']['renders'] == (len(srcs) if max_renders > 1 else 0)
+    if max_renders > 1:
+        assert all(i.startswith('depdf-render') for i in renderer.threads)
+    else:
+        assert renderer.threads == {threading.current_thread().name}
+
+
+def page_image_srcs(page):
+    return [i.src for i in page.objects if i.object_type == 'image']
+
+
+def test_image_dedupe(config, monkeypatch):
+    renderer = FakeRenderer()
+    monkeypatch.setattr(page_module, 'render_image', renderer)
+    config = config.copy(image_flag=True, min_image_size=0, image_dedupe_flag=True)
+    with DePDF.load(TEST_PDF, config=config) as pdf:
+        first, second = page_image_srcs(pdf.pages[0]), page_image_srcs(pdf.pages[1])
+        assert renderer.files == first + second  # different images miss
+        repeated = DePage(pdf.pdf.pages[0], pid='3', config=pdf.config, image_registry=pdf.image_registry)
+        assert page_image_srcs(repeated) == first  # the same image again hits, the file is shared
+        assert renderer.files == first + second
+        assert pdf.image_registry.files == set(first + second)
+
+
+def test_image_dedupe_disabled(config, monkeypatch):
+    renderer = FakeRenderer()
+    monkeypatch.setattr(page_module, 'render_image', renderer)
+    config = config.copy(image_flag=True, min_image_size=0)
+    with DePDF.load(TEST_PDF, config=config) as pdf:
+        first = page_image_srcs(pdf.pages[0])
+        repeated = DePage(pdf.pdf.pages[0], pid='3', config=pdf.config, image_registry=pdf.image_registry)
+        assert page_image_srcs(repeated) != first
+        assert renderer.files == first + page_image_srcs(repeated)
+        assert not pdf.image_registry.files
+
+
+def test_image_registry(tmp_path):
+    registry = ImageRegistry()
+    img_file = str(tmp_path / 'image.png')
+    assert registry.claim(img_file)
+    assert not registry.claim(img_file)
+    rendered = tmp_path / 'rendered.png'
+    rendered.write_bytes(b'png')  # rendered by another worker process
+    assert not ImageRegistry().claim(str(rendered))
+
+
+def test_page_stats(config):
+    with DePDF.load(TEST_PDF, config=config) as pdf:
+        pdf.to_html
+        page_stats = pdf.page_stats
+        stats = pdf.stats
+    assert [i['pid'] for i in page_stats] == ['1', '2']
+    assert {'dedupe_chars', 'phrases', 'lines', 'tables', 'paragraphs'} <= set(page_stats[1]['stages'])
+    assert page_stats[1]['stages']['tables']['tables'] == 1
+    assert stats['pages'] == 2
+    assert stats['stages']['tables']['tables'] == 1 and stats['stages']['tables']['pages'] == 2
+    assert set(stats['time']) == {'total', 'max', 'p50', 'p90', 'p99'}
+
+
+def test_page_stats_of_every_path(config):
+    with DePDF.load(TEST_PDF, config=config) as pdf:
+        reported = []
+        pdf.add_stats_hook(lambda page_stats: reported.append(page_stats['pid']))
+        write_jsonl(pdf, io.StringIO())
+        assert reported == ['1', '2']
+        assert pdf.stats['pages'] == 2
+    with DePDF.load(TEST_PDF, config=config) as pdf:
+        pdf.pages[1].objects
+        assert pdf.stats['pages'] == 1
+
+
+def test_lazy_pages(config):
+    with DePDF.load(TEST_PDF, config=config) as pdf:
+        pages = pdf.pages
+        assert len(pages) == pdf.page_num == 2
+        assert pages[0] is pages[0] is pages[-2]
+        assert [i.pid for i in pages[:]] == ['1', '2']
+        with pytest.raises(IndexError):
+            pages[2]
+    with DePDF.load(TEST_PDF, config=config.copy(max_cached_pages=1)) as pdf:
+        first = pdf.pages[0]
+        assert pdf.pages[1] is not first
+        assert pdf.pages[0] is not first  # released by the lru bound and created again
+        assert pdf.pages[0].to_html == first.to_html
+
+
+def test_open_once_pages_api(config, monkeypatch):
+    html_pages = {pid: convert_page_to_html(TEST_PDF, pid, config=config) for pid in [1, 2]}
+    tables = [i.to_html for i in extract_page_tables(TEST_PDF, 2, config=config)]
+    assert tables
+    loads = []
+    load_pdf = api.load_pdf
+    monkeypatch.setattr(api, 'load_pdf', lambda *args, **kwargs: loads.append(args) or load_pdf(*args, **kwargs))
+    assert convert_pages_to_html(TEST_PDF, config=config) == html_pages
+    assert [i.to_html for i in extract_tables(TEST_PDF, pages=[2], config=config)[2]] == tables
+    assert len(loads) == 2
+    with pytest.raises(IndexError):
+        convert_pages_to_html(TEST_PDF, pages=range(1, 4), config=config)
+
+
+def test_async_api(config):
+    async def convert():
+        html_pages = [i async for i in iter_html_pages_async(TEST_PDF, config=config)]
+        html = await convert_pdf_to_html_async(TEST_PDF, config=config)
+        page_html = await convert_page_to_html_async(TEST_PDF, 2, config=config)
+        return html_pages, html, page_html
+
+    html_pages, html, page_html = asyncio.run(convert())
+    assert len(html_pages) == 2
+    assert html == convert_pdf_to_html(TEST_PDF, config=config)
+    assert page_html == html_pages[1] == convert_page_to_html(TEST_PDF, 2, config=config)
+
+
+def test_async_timeout(config):
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(convert_pdf_to_html_async(TEST_PDF, timeout=0, config=config))
+
+
+def test_convert_batch(config, tmp_path):
+    paths = [TEST_PDF, str(tmp_path / 'missing.pdf'), TEST_MC_PDF]
+    progress = []
+    results = sorted(convert_batch(paths, workers=2, config=config, progress=lambda *args: progress.append(args)),
+                     key=lambda x: x.index)
+    assert [i.ok for i in results] == [True, False, True]
+    assert isinstance(results[1].exception, FileNotFoundError)
+    assert results[0].html == convert_pdf_to_html(TEST_PDF, config=config)
+    assert results[2].stats['pages'] == 1
+    assert [i[0] for i in progress] == [1, 2, 3]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_convert_batch_failing_file(workers, config, tmp_path):
+    broken = tmp_path / 'broken.pdf'
+    broken.write_bytes(b'not a pdf')
+    paths = [TEST_PDF, str(broken), TEST_PDF]
+    results = sorted(convert_batch(paths, workers=workers, config=config), key=lambda x: x.index)
+    assert [i.ok for i in results] == [True, False, True]
+    assert results[1].html is None and results[1].error
+    assert results[0].html == results[2].html == convert_pdf_to_html(TEST_PDF, config=config)
+
+
+def test_convert_batch_worker_died(config, monkeypatch):
+    monkeypatch.setattr(api, 'DePDF', CrashingDePDF)  # inherited by the forked worker processes
+    paths = [TEST_PDF, TEST_MC_PDF, TEST_PDF, TEST_PDF]
+    results = sorted(convert_batch(paths, workers=2, config=config, max_in_flight=4), key=lambda x: x.index)
+    assert [i.ok for i in results] == [True, False, True, True]
+    assert type(results[1].exception).__name__ == 'BrokenProcessPool'
+    html = convert_pdf_to_html(TEST_PDF, config=config)
+    assert all(i.html == html for i in results if i.ok)
+
+
+def test_write_jsonl(config):
+    fp = io.StringIO()
+    with DePDF.load(TEST_PDF, config=config) as pdf:
+        count = write_jsonl(pdf, fp)
+        records = list(iter_records(pdf))
+    lines = fp.getvalue().splitlines()
+    assert count == len(lines) == len(records)
+    assert [json.loads(i) for i in lines] == records
+    tables = [i for i in records if i['type'] == 'table']
+    assert tables and tables[0]['page'] == 2
+    table = tables[0]
+    assert len(table['cells']) <= table['rows'] * table['columns']
+    assert all(set(i) == {'row', 'column', 'rowspan', 'colspan', 'bbox', 'text'} for i in table['cells'])
+    assert any(i['type'] == 'paragraph' and i['text'] for i in records)
+
+
+def test_tables_csv(config, tmp_path):
+    output_dir = str(tmp_path / 'csv' / 'nested')
+    file_names = convert_pdf_tables_to_csv(TEST_PDF, output_dir, config=config)
+    assert file_names and all(os.path.dirname(i) == output_dir for i in file_names)
+    with DePDF.load(TEST_PDF, config=config) as pdf:
+        table = pdf.pages[1].tables[0]
+    with open(file_names[0], encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    assert len(rows) == len(table.rows)
+    assert len({len(i) for i in rows}) == 1
+
+
+def test_render_backends(config):
+    with DePDF.load(TEST_PDF, config=config) as pdf:
+        assert pdf.render() == pdf.to_html
+        page = pdf.pages[1]
+        assert page.render(backend='html') == page.to_html
+        fp = io.StringIO()
+        assert page.render(fp, backend='text') is None
+        assert fp.getvalue() == page.render(backend='text')
+        text = pdf.render(backend='text')
+        markdown = pdf.render(backend='markdown')
+    assert text.count('\f') == 1
+    assert '<' not in text.replace('<br>', '')
+    assert '| --- |' in markdown and '\n---\n' in markdown
+    assert markdown == convert_pdf_to_markdown(TEST_PDF, config=config)
+
+
+def test_render_backend_errors(config):
+    class ParagraphCounter(Renderer):
+        def render_paragraph(self, paragraph):
+            self.write('p')
+
+    with DePDF.load(TEST_PDF, config=config) as pdf:
+        with pytest.raises(RenderBackendError):
+            pdf.render(backend='pdf')
+        assert set(pdf.render(backend=ParagraphCounter)) == {'p'}
@@ -0,0 +1,420 @@
+"""
+The optimized page tools must give the same results as the baseline algorithms on the same inputs,
+the baseline implementations are kept here as the reference.
+"""
+from decimal import Decimal
+import random
+
+import pdfplumber
+from pdfplumber.page import DerivedPage
+import pytest
+
+from benchmark import PAGE_WIDTH, d, gen_chars, gen_dotted_lines, gen_edges
+from conftest import TEST_PDF
+from depdf.page_tools import (
+    CellIndex, CharIndex, IntervalIndex, PageStore, analyze_char_size, analyze_line_height, edges_to_lines,
+    find_column_separators, may_contain_table, most_common_ints, remove_duplicate_chars, remove_single_lines
+)
+from depdf.settings import (
+    DEFAULT_COLUMN_REGION_HALF_WIDTH, DEFAULT_MAX_COLUMNS, DEFAULT_MIN_COLUMN_OBJECTS_FRACTION,
+    DEFAULT_MIN_COLUMN_REGION_OBJECTS, DEFAULT_MIN_COLUMN_WIDTH_FRACTION
+)
+from depdf.utils import convert_object_numbers
+
+
+def baseline_remove_duplicate_chars(chars, overlap_size=3):
+    delete_index_list = []
+    for char_index, char in enumerate(chars):
+        for i in reversed(range(char_index)):
+            tmp_char = chars[i]
+            if abs(tmp_char['x0'] - char['x0']) < overlap_size and \
+                    abs(tmp_char['y0'] - char['y0']) < overlap_size and \
+                    abs(tmp_char['x1'] - char['x1']) < overlap_size and \
+                    abs(tmp_char['y1'] - char['y1']) < overlap_size and \
+                    tmp_char['text'] == char['text']:
+                delete_index_list.append(char_index)
+                break
+    deleted_chars = []
+    deleted_count = 0
+    for each_delete_index in delete_index_list:
+        deleted_chars.append(chars[each_delete_index - deleted_count])
+        del chars[each_delete_index - deleted_count]
+        deleted_count += 1
+    return deleted_chars
+
+
+def baseline_edges_to_lines(edges):
+    h_lines, v_lines = [], []
+    for i in edges:
+        if i['orientation'] == 'h':
+            if i not in h_lines:
+                h_lines.append(i)
+        else:
+            if i not in v_lines:
+                v_lines.append(i)
+    return h_lines, v_lines
+
+
+def baseline_remove_single_lines(lines, max_double=3, min_double=0.05, vertical_double=2, m='h'):
+    new_lines = []
+    key_1 = 'y0' if m == 'h' else 'x0'
+    key_2 = 'x0' if m == 'h' else 'y0'
+    key_3 = 'x1' if m == 'h' else 'y1'
+    for i, li in enumerate(lines):
+        if li not in new_lines:
+            nearest_lines = list(filter(
+                lambda x:
+                    min_double < abs(li[key_1] - x[key_1]) <= max_double
+                    and abs(li[key_2] - x[key_2]) <= vertical_double
+                    and abs(li[key_3] - x[key_3]) <= vertical_double
+                    and li != x, lines[:]
+            ))
+            if nearest_lines:
+                new_lines.append(li)
+                new_lines.extend(nearest_lines)
+    return new_lines
+
+
+def baseline_cell_region(pdf_page, cell):
+    return pdf_page.filter(
+        lambda x: 'top' in x and 'bottom' in x and 'x0' in x and 'x1' in x and
+                  x['top'] >= cell[1] - (x['bottom'] - x['top']) / 2 and
+                  x['bottom'] <= cell[3] + (x['bottom'] - x['top']) / 2 and
+                  x['x0'] >= cell[0] - (x['x1'] - x['x0']) / 2 and
+                  x['x1'] <= cell[2] + (x['x1'] - x['x0']) / 2
+    )
+
+
+def baseline_column_separators(pdf_page, max_columns, half_width, max_objects):
+    separator = []
+    for column_number in range(2, max_columns + 1):
+        column_size = pdf_page.width / column_number
+        for i in range(1, column_number):
+            s = column_size * i
+            check_bbox = (s - half_width, 0, s + half_width, pdf_page.height)
+            column_region = pdf_page.crop(check_bbox)
+            items = []
+            for k in column_region.objects:
+                items.extend(column_region.objects[k])
+            if len(items) <= max_objects:
+                separator.append(s)
+        if separator:
+            if len(separator) != column_number - 1:
+                separator = []
+            break
+    return separator
+
+
+def baseline_inside_bbox_score(obj, bbox):
+    corners = ((obj['x0'], obj['top']), (obj['x0'], obj['bottom']), (obj['x1'], obj['top']), (obj['x1'], obj['bottom']))
+    return sum(bbox[0] <= x <= bbox[2] and bbox[1] <= y <= bbox[3] for x, y in corners)
+
+
+def baseline_crop_chars(chars, bbox):
+    # pdfplumber 0.5.16 page.crop(bbox).chars
+    cropped = []
+    for char in chars:
+        score = baseline_inside_bbox_score(char, bbox)
+        if score == 4:
+            cropped.append(char)
+        elif score:
+            clipped = dict(char)
+            if char['x0'] < bbox[0]:
+                clipped['x0'] = bbox[0]
+            if char['x1'] > bbox[2]:
+                clipped['x1'] = bbox[2]
+            if char['top'] < bbox[1]:
+                clipped['top'], clipped['doctop'] = bbox[1], char['doctop'] + bbox[1] - char['top']
+                clipped['y1'] = char['y1'] - (bbox[1] - char['top'])
+            if char['bottom'] > bbox[3]:
+                clipped['bottom'], clipped['y0'] = bbox[3], char['y0'] + bbox[3] - char['bottom']
+            if clipped['x0'] != char['x0'] or clipped['x1'] != char['x1']:
+                clipped['width'] = clipped['x1'] - clipped['x0']
+            if clipped['top'] != char['top'] or clipped['bottom'] != char['bottom']:
+                clipped['height'] = clipped['bottom'] - clipped['top']
+            cropped.append(clipped)
+    return cropped
+
+
+def baseline_within_bbox_chars(chars, bbox):
+    # pdfplumber 0.5.16 page.within_bbox(bbox).chars
+    return [char for char in chars if baseline_inside_bbox_score(char, bbox) == 4]
+
+
+LINE_STEP = 14
+
+
+@pytest.fixture(scope='module')
+def plumber_pdf():
+    with pdfplumber.open(TEST_PDF) as pdf:
+        yield pdf
+
+
+def synthetic_page(plumber_pdf, objects):
+    """
+    :return: pdfplumber page of the first test.pdf page with the given objects only
+    """
+    page = DerivedPage(plumber_pdf.pages[0])
+    page.bbox = plumber_pdf.pages[0].bbox
+    page._objects = objects
+    return page
+
+
+def test_char_index(plumber_pdf):
+    rnd = random.Random(4)
+    for page in (plumber_pdf.pages[0], plumber_pdf.pages[1], synthetic_page(plumber_pdf, {'char': gen_chars(2000)})):
+        index = CharIndex(page.chars)
+        for _ in range(50):
+            x0, top = rnd.uniform(-20, 500), rnd.uniform(-20, 700)
+            bbox = page.decimalize((x0, top, x0 + rnd.uniform(0, 200), top + rnd.uniform(0, 200)))
+            assert index.crop(bbox) == baseline_crop_chars(page.chars, bbox)
+            assert index.within_bbox(bbox) == baseline_within_bbox_chars(page.chars, bbox)
+
+
+def test_char_index_matches_pdfplumber(plumber_pdf):
+    if pdfplumber.__version__ != '0.5.16':
+        pytest.skip('crop semantics of pdfplumber 0.5.16')
+    page = plumber_pdf.pages[1]
+    index = CharIndex(page.chars)
+    for bbox in [(0, 0, page.width, page.height), (80, 260, 300, 270), (-10, 100, 200, 900)]:
+        bbox = page.decimalize(bbox)
+        assert index.crop(bbox) == page.crop(bbox).chars
+        assert index.within_bbox(bbox) == page.within_bbox(bbox).chars
+
+
+def gen_jittered_chars(n, seed=3):
+    # random near duplicates around a few positions, so that the overlap checks are on the bucket borders
+    rnd = random.Random(seed)
+    chars = []
+    for _ in range(n):
+        x0, top = d(rnd.randrange(40, 60) + rnd.random() * 3), d(rnd.randrange(40, 60) + rnd.random() * 3)
+        char = {'text': rnd.choice('ab'), 'x0': x0, 'x1': x0 + 5, 'top': top, 'bottom': top + 10}
+        char['y0'], char['y1'] = -char['bottom'], -char['top']
+        chars.append(char)
+    return chars
+
+
+@pytest.mark.parametrize('chars', [
+    gen_chars(1000), gen_chars(600, overprint=3), gen_jittered_chars(1000)
+], ids=['plain', 'overprinted', 'jittered'])
+@pytest.mark.parametrize('overlap_size', [3, Decimal('0.5')])
+def test_remove_duplicate_chars(chars, overlap_size):
+    baseline_chars, new_chars = list(chars), list(chars)
+    assert remove_duplicate_chars(new_chars, overlap_size) == \
+        baseline_remove_duplicate_chars(baseline_chars, overlap_size)
+    assert new_chars == baseline_chars
+
+
+@pytest.mark.parametrize('duplicate_ratio', [0, 0.5, 0.9])
+def test_edges_to_lines(duplicate_ratio):
+    edges = gen_edges(2000, duplicate_ratio=duplicate_ratio)
+    assert edges_to_lines(edges) == baseline_edges_to_lines(edges)
+
+
+@pytest.mark.parametrize('lines', [
+    edges_to_lines(gen_edges(1500))[0], gen_dotted_lines(1500), gen_edges(600, duplicate_ratio=0.5)
+], ids=['rulings', 'dotted', 'duplicated'])
+@pytest.mark.parametrize('kwargs', [
+    {}, {'max_double': 3, 'min_double': Decimal('0.05'), 'vertical_double': 2}, {'max_double': 0, 'vertical_double': 0}
+])
+def test_remove_single_lines(lines, kwargs):
+    for m in ('h', 'v'):
+        assert remove_single_lines(lines, m=m, **kwargs) == baseline_remove_single_lines(lines, m=m, **kwargs)
+
+
+def gen_store_chars(n, seed=6):
+    # char sizes from width / adv, from size and from the default when both are out of range
+    rnd = random.Random(seed)
+    chars = gen_chars(n, seed=seed)
+    for char in chars:
+        char['adv'] = rnd.choice((d('0.5'), d('0.5'), d('0.01'), d('1.2')))
+        char['size'] = rnd.choice((char['size'], d(50)))
+    return [convert_object_numbers(i, float) for i in chars]
+
+
+@pytest.mark.parametrize('chars', [gen_store_chars(3000), gen_store_chars(5, seed=7), []], ids=['page', 'few', 'empty'])
+def test_page_store_char_size(chars):
+    pytest.importorskip('numpy')
+    kwargs = {'char_size_upper': 30, 'char_size_lower': 3, 'default_char_size': 12, 'number_type': float}
+    assert analyze_char_size(chars, store=PageStore(chars), **kwargs) == analyze_char_size(chars, **kwargs)
+
+
+def test_page_store_line_height():
+    np = pytest.importorskip('numpy')
+    chars = gen_store_chars(3000)
+    phrases = [{k: i[k] for k in ('x0', 'x1', 'top', 'bottom')} for i in chars[::7]]
+    store = PageStore()
+    store.load_phrases(phrases)
+    assert analyze_line_height(phrases, 6.0, store=store) == pytest.approx(analyze_line_height(phrases, 6.0))
+    assert analyze_line_height([], 6.0, store=PageStore()) == 6.0
+    assert most_common_ints(store.phrases['x0'], 5) == most_common_ints([i['x0'] for i in phrases], 5)
+    assert most_common_ints(np.array([]), 1) == most_common_ints([], 1) == []
+
+
+def test_cell_index_real_table(plumber_pdf):
+    page = plumber_pdf.pages[1]
+    tables = page.find_tables()
+    assert tables
+    cells = [cell for table in tables for row in table.rows for cell in row.cells if cell]
+    cell_objects = CellIndex(cells).assign(page.objects)
+    for cell, objects in zip(cells, cell_objects):
+        assert objects == baseline_cell_region(page, cell).objects
+
+
+def test_cell_index_synthetic(plumber_pdf):
+    chars = gen_chars(3000)
+    page = synthetic_page(plumber_pdf, {'char': chars, 'line': []})
+    cells = [
+        (d(37 + col * 57), d(35 + row * 28), d(94 + col * 57), d(63 + row * 28))  # borders cut through the chars
+        for row in range(14) for col in range(9)
+    ]
+    cell_objects = CellIndex(cells).assign(page.objects)
+    for cell, objects in zip(cells, cell_objects):
+        assert objects == baseline_cell_region(page, cell).objects
+
+
+def make_line(x0, top, x1, bottom, page_height=Decimal('841.890')):
+    x0, top, x1, bottom = map(d, (x0, top, x1, bottom))
+    return {
+        'object_type': 'line', 'x0': x0, 'x1': x1, 'top': top, 'bottom': bottom, 'doctop': top,
+        'y0': page_height - bottom, 'y1': page_height - top, 'width': x1 - x0, 'height': bottom - top,
+        'linewidth': d(1),
+    }
+
+
+def make_rect(x0, top, x1, bottom, page_height=Decimal('841.890')):
+    rect = make_line(x0, top, x1, bottom, page_height=page_height)
+    rect['object_type'] = 'rect'
+    return rect
+
+
+def test_may_contain_table_grid(plumber_pdf):
+    grid = [make_line(100, 100 + i * 20, 300, 100 + i * 20) for i in range(4)] + \
+        [make_line(100 + i * 50, 100, 100 + i * 50, 160) for i in range(5)]
+    page = synthetic_page(plumber_pdf, {'line': grid})
+    assert page.extract_tables()
+    assert may_contain_table(page)
+    assert may_contain_table(plumber_pdf.pages[1])
+
+
+def test_may_contain_table_random_edges(plumber_pdf):
+    # may_contain_table is a necessary condition, whenever it is False the table finder finds nothing
+    rnd = random.Random(5)
+    skipped = 0
+    for _ in range(300):
+        objects = {'line': [], 'rect': []}
+        for _ in range(rnd.randint(0, 5)):
+            x, y, length = rnd.randrange(100, 300, 10), rnd.randrange(100, 300, 10), rnd.randrange(0, 80, 10)
+            if rnd.random() < 0.5:
+                objects['line'].append(make_line(x, y, x + length, y))
+            else:
+                objects['line'].append(make_line(x, y, x, y + length))
+        if rnd.random() < 0.3:
+            x, y = rnd.randrange(100, 300, 10), rnd.randrange(100, 300, 10)
+            objects['rect'].append(make_rect(x, y, x + rnd.randrange(0, 80, 10), y + rnd.randrange(0, 30, 10)))
+        page = synthetic_page(plumber_pdf, objects)
+        if not may_contain_table(page):
+            skipped += 1
+            assert page.extract_tables() == []
+    assert skipped
+
+
+def gen_column_chars(columns, lines=40):
+    """
+    :param columns: list of (x0, x1) of the text columns
+    :return: chars of full lines in every column
+    """
+    chars = []
+    for line in range(lines):
+        top = 60 + line * LINE_STEP
+        for x0, x1 in columns:
+            for x in range(x0, x1 - 5 + 1, 6):
+                char = {'object_type': 'char', 'text': 'a', 'x0': d(x), 'x1': d(x + 5), 'top': d(top),
+                        'bottom': d(top + 10), 'doctop': d(top), 'width': d(5), 'height': d(10)}
+                chars.append(char)
+    return chars
+
+
+def column_separators(chars, width, height=Decimal('841.890')):
+    return find_column_separators(
+        chars, width, max_columns=DEFAULT_MAX_COLUMNS, half_width=DEFAULT_COLUMN_REGION_HALF_WIDTH,
+        max_objects=DEFAULT_MIN_COLUMN_REGION_OBJECTS,
+        min_column_width=float(width * DEFAULT_MIN_COLUMN_WIDTH_FRACTION),
+        min_column_objects=float(DEFAULT_MIN_COLUMN_OBJECTS_FRACTION), height=height
+    )
+
+
+def gutter(chars, left_x1, right_x0):
+    return (max(float(i['x1']) for i in chars if i['x1'] <= left_x1),
+            min(float(i['x0']) for i in chars if i['x0'] >= right_x0))
+
+
+@pytest.mark.parametrize('columns', [
+    [(40, 555)],
+    [(40, 285), (310, 555)],
+    [(40, 180), (215, 375), (415, 555)],
+], ids=['single', 'two', 'three'])
+def test_find_column_separators(plumber_pdf, columns):
+    chars = gen_column_chars(columns)
+    page = synthetic_page(plumber_pdf, {'char': chars})
+    baseline = baseline_column_separators(page, DEFAULT_MAX_COLUMNS, DEFAULT_COLUMN_REGION_HALF_WIDTH,
+                                          DEFAULT_MIN_COLUMN_REGION_OBJECTS)
+    separators = column_separators(chars, page.width)
+    assert len(separators) == len(baseline) == len(columns) - 1
+    for (_, left_x1), (right_x0, _), old, new in zip(columns, columns[1:], baseline, separators):
+        gap = gutter(chars, left_x1, right_x0)
+        assert gap[0] <= old <= gap[1]
+        assert new == pytest.approx(sum(gap) / 2)  # the middle of the gutter between the column text
+
+
+def test_find_column_separators_off_center_gutter(plumber_pdf):
+    # the baseline only checked the fixed positions width / columns and misses this gutter
+    columns = [(40, 280), (300, 560)]
+    chars = gen_column_chars(columns)
+    page = synthetic_page(plumber_pdf, {'char': chars})
+    assert baseline_column_separators(page, DEFAULT_MAX_COLUMNS, DEFAULT_COLUMN_REGION_HALF_WIDTH,
+                                      DEFAULT_MIN_COLUMN_REGION_OBJECTS) == []
+    assert column_separators(chars, page.width) == [pytest.approx(sum(gutter(chars, 280, 300)) / 2)]
+
+
+def test_find_column_separators_ignores_page_width_objects():
+    chars = gen_column_chars([(40, 285), (310, 555)])
+    banner = {'x0': d(20), 'x1': d(575), 'top': d(20), 'bottom': d(50)}
+    separators = column_separators(chars, PAGE_WIDTH)
+    assert len(separators) == 1
+    assert column_separators(chars + [banner], PAGE_WIDTH) == separators
+    frame = make_rect(20, 20, 575, 820)
+    assert column_separators(chars + [frame], PAGE_WIDTH) == separators
+
+
+def test_find_column_separators_ruled_table():
+    # two column table with full width rules and one interior vertical rule at x=300, it is not split
+    rows = 20
+    chars = [i for i in gen_column_chars([(70, 200), (310, 500)], lines=rows) if i['top'] < 100 + rows * 20]
+    for i in chars:
+        row = (i['top'] - 60) // LINE_STEP
+        i['top'], i['bottom'] = 105 + row * 20, 115 + row * 20
+    lines = [make_line(60, 100 + i * 20, 540, 100 + i * 20) for i in range(rows + 1)] + \
+        [make_line(x, 100, x, 100 + rows * 20) for x in (60, 300, 540)]
+    assert column_separators(chars, PAGE_WIDTH)  # the text alone looks like two columns
+    assert column_separators(chars + lines, PAGE_WIDTH) == []
+
+
+def test_find_column_separators_tolerated_gutter_object():
+    chars = gen_column_chars([(40, 285), (310, 555)])
+    dot = dict(chars[0], x0=d(290), x1=d(293))
+    center = sum(gutter(chars, 285, 310)) / 2
+    assert column_separators(chars, PAGE_WIDTH) == column_separators(chars + [dot], PAGE_WIDTH) == [center]
+
+
+def test_interval_index():
+    rnd = random.Random(8)
+    intervals = []
+    for idx in range(200):
+        start = d(rnd.randrange(0, 800) + rnd.random())
+        intervals.append((start, start + d(rnd.choice((0, 5, 40)) + rnd.random()), idx))
+    intervals.append((d(50), d(40), 'empty'))
+    index = IntervalIndex(intervals)
+    points = [i[0] for i in intervals] + [i[1] for i in intervals] + [d(rnd.uniform(-10, 900)) for _ in range(500)]
+    for point in points:
+        assert index.query(point) == [value for start, end, value in intervals if start <= point <= end]